@@ -1,17 +1,38 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field, replace as replace_fields
+import difflib
+import hashlib
 from pathlib import Path
+import asyncio
 import time
+from typing import Literal
 
 from engine.templates import (
+    dockerignore,
     docker_compose_yml,
+    mysql_cnf,
+    nginx_conf,
     nginx_default_conf,
     php_dockerfile,
+    php_fpm_max_children,
+    php_fpm_pool_conf,
     php_ini_overrides,
+    php_preload_script,
+    php_watch_dockerfile,
 )
-from engine.fs import ensure_file, ensure_directory, safe_backup
-from engine.laravel import ensure_env_defaults
-from engine.docker_health import get_service_health
+from engine.fs import MountError, ensure_directory, _atomic_write
+from engine.backups import BackupStore
+from engine.host import detect_host_resources
+from engine.project_config import (
+    ProjectConfig,
+    load_project_config,
+    save_project_config,
+)
+from engine.laravel import plan_env_defaults
+from engine.docker import run_sync
+from engine.docker_health import get_service_health_async, watch_service_health
+from engine.tracing import span
 
 
 # -------------------------------------------------
@@ -44,115 +65,396 @@ def validate_project_for_docker(project: Path) -> None:
 
 
 # -------------------------------------------------
-# Use case: generate docker setup
+# Generation plan
 # -------------------------------------------------
-def generate_docker_files(
+FileAction = Literal["create", "update", "delete", "unchanged"]
+
+
+@dataclass(frozen=True)
+class PlannedFile:
+    path: Path
+    action: FileAction
+    description: str
+    content: str | None = None   # new content; None for delete / unchanged
+    diff: str = ""               # unified diff against what is on disk
+    backup: bool = False         # back up the current file before applying
+
+
+@dataclass(frozen=True)
+class DockerFilesPlan:
+    project: Path
+    files: list[PlannedFile]
+    env_keys: list[str] = field(default_factory=list)
+    config: ProjectConfig | None = None  # saved to .docker/config.json on apply
+
+    @property
+    def changes(self) -> list[PlannedFile]:
+        return [f for f in self.files if f.action != "unchanged"]
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.changes
+
+
+def plan_docker_files(
     project: Path,
     *,
     overwrite_compose: bool = True,
     update_env: bool = True,
-) -> list[str]:
+    config: ProjectConfig | None = None,
+) -> DockerFilesPlan:
     """
-    Generate all Docker-related files for a Laravel project.
-
-    This function intentionally makes docker-compose.yml authoritative.
-    Existing compose files are backed up and overridden to prevent
-    accidental Docker Compose merging.
+    Render every generated file in memory and compare it with disk.
+
+    Touches nothing. The plan lists only what `apply_docker_files_plan`
+    would change; identical files are reported as unchanged.
+
+    - The Dockerfile is created when missing; an existing one is only
+      replaced when it is an unedited output of an earlier template
+    - PHP and nginx config follow the selected profile
+    - my.cnf and the php-fpm pool are re-sized from the Docker host
+    - Replaced files are kept in the backup store
+    - docker-compose.yml is authoritative when `overwrite_compose` is set
+    - docker-compose.override.yml is removed to prevent Compose merging
+    - `config` defaults to the project's saved config
     """
-    # -------------------------------------------------
-    # Preflight (NO side effects)
-    # -------------------------------------------------
     validate_project_for_docker(project)
+    config = config or load_project_config(project)
 
-    actions: list[str] = []
+    files: list[PlannedFile] = []
 
-    # -------------------------------------------------
-    # Directory structure
-    # -------------------------------------------------
-    docker_dir = project / "docker"
-    nginx_dir = docker_dir / "nginx"
-    php_dir = docker_dir / "php"
-
-    for directory in (docker_dir, nginx_dir, php_dir):
-        ensure_directory(directory)
-
-    actions.append("Ensured docker/, nginx/, php/ directories")
-
-    # -------------------------------------------------
-    # Static config files
-    # -------------------------------------------------
-    _ensure_static_file(
-        nginx_dir / "default.conf",
-        nginx_default_conf(),
-        actions,
-        "Generated nginx default.conf",
+    files.append(
+        _plan_file(
+            project,
+            "docker/php/Dockerfile",
+            php_dockerfile(),
+            "PHP Dockerfile",
+            replace=_previously_generated_dockerfile(project / "docker/php/Dockerfile"),
+        )
     )
 
-    _ensure_static_file(
-        php_dir / "Dockerfile",
-        php_dockerfile(),
-        actions,
-        "Generated PHP Dockerfile",
+    host = detect_host_resources()
+    ini = php_ini_overrides(config.php_profile)
+    memory_limit_mb = _memory_limit_mb(ini)
+
+    files.append(
+        _plan_file(
+            project,
+            "docker/php/zz-overrides.ini",
+            ini,
+            f"PHP ini overrides ({config.php_profile} profile)",
+            replace=True,
+        )
     )
-
-    _ensure_static_file(
-        php_dir / "zz-overrides.ini",
-        php_ini_overrides(),
-        actions,
-        "Generated PHP ini overrides",
+    files.append(
+        _plan_file(
+            project,
+            "docker/php/www.conf",
+            php_fpm_pool_conf(
+                cpus=host.cpus,
+                memory_bytes=host.memory_bytes,
+                memory_limit_mb=memory_limit_mb,
+                profile=config.php_profile,
+            ),
+            f"php-fpm pool ({host.cpus} CPUs, {host.memory_mb}M {host.source})",
+            replace=True,
+        )
     )
 
-    # -------------------------------------------------
-    # docker-compose.yml (authoritative)
-    # -------------------------------------------------
-    compose_path = project / "docker-compose.yml"
-    override_path = project / "docker-compose.override.yml"
+    # nginx runs one worker per CPU; keep idle FastCGI connections to at
+    # most half the fpm workers
+    children = php_fpm_max_children(
+        cpus=host.cpus,
+        memory_bytes=host.memory_bytes,
+        memory_limit_mb=memory_limit_mb,
+    )
+    files.append(
+        _plan_file(
+            project,
+            "docker/nginx/nginx.conf",
+            nginx_conf(config.php_profile),
+            f"nginx.conf ({config.php_profile} profile)",
+            replace=True,
+        )
+    )
+    files.append(
+        _plan_file(
+            project,
+            "docker/nginx/default.conf",
+            nginx_default_conf(
+                config.php_profile,
+                upstream_keepalive=max(1, children // (2 * host.cpus)),
+            ),
+            f"nginx default.conf ({config.php_profile} profile)",
+            replace=True,
+        )
+    )
+    if config.watch:
+        files.append(
+            _plan_file(
+                project,
+                "docker/php/Dockerfile.watch",
+                php_watch_dockerfile(),
+                "PHP Dockerfile for watch mode",
+                replace=True,
+            )
+        )
+        files.append(
+            _plan_file(project, ".dockerignore", dockerignore(), ".dockerignore", replace=False)
+        )
 
-    if overwrite_compose:
-        if compose_path.exists():
-            backup = safe_backup(compose_path)
-            actions.append(f"Backed up docker-compose.yml → {backup.name}")
-
-        if override_path.exists():
-            backup = safe_backup(override_path)
-            override_path.unlink()
-            actions.append(
-                f"Removed docker-compose.override.yml "
-                f"(backup → {backup.name})"
+    if config.preloads:
+        files.append(
+            _plan_file(
+                project,
+                "docker/php/preload.php",
+                php_preload_script(),
+                "PHP opcache preload script",
+                replace=True,
             )
+        )
+
+    files.append(
+        _plan_file(
+            project,
+            "docker/mysql/my.cnf",
+            mysql_cnf(
+                cpus=host.cpus,
+                memory_bytes=host.memory_bytes,
+                budget_mb=config.mysql_memory_mb,
+            ),
+            f"MySQL my.cnf ({host.cpus} CPUs, {host.memory_mb}M {host.source})",
+            replace=True,
+        )
+    )
 
-    compose_path.write_text(
-        docker_compose_yml(project.name),
-        encoding="utf-8",
+    compose = docker_compose_yml(
+        project.name,
+        db_mode=config.db_mode,
+        mount_strategy=config.mount_strategy,
+        port_slot=config.port_slot,
     )
-    actions.append("Generated docker-compose.yml (authoritative)")
+    compose_plan = _plan_file(
+        project,
+        "docker-compose.yml",
+        compose,
+        "docker-compose.yml (authoritative)",
+        replace=overwrite_compose,
+    )
+    files.append(compose_plan)
+
+    # A kept compose file keeps the options it was generated with
+    saved = load_project_config(project)
+    compose_matches = (
+        compose_plan.action != "unchanged"
+        or _digest(compose_plan.path.read_bytes()) == _digest(compose.encode("utf-8"))
+    )
+
+    override_path = project / "docker-compose.override.yml"
+    if overwrite_compose and override_path.is_file():
+        files.append(
+            PlannedFile(
+                path=override_path,
+                action="delete",
+                description="docker-compose.override.yml",
+                backup=True,
+            )
+        )
 
-    # -------------------------------------------------
-    # .env defaults
-    # -------------------------------------------------
+    env_keys: list[str] = []
     if update_env:
-        changed_keys = ensure_env_defaults(project)
-        if changed_keys:
-            actions.append(
-                "Updated .env keys: " + ", ".join(sorted(changed_keys))
+        env_content, env_keys = plan_env_defaults(project)
+        if env_content is not None:
+            files.append(
+                _plan_file(
+                    project,
+                    ".env",
+                    env_content,
+                    ".env keys: " + ", ".join(sorted(env_keys)),
+                    replace=True,
+                )
             )
-        else:
-            actions.append("No .env changes required")
+
+    return DockerFilesPlan(
+        project=project,
+        files=files,
+        env_keys=env_keys,
+        config=(
+            config
+            if compose_matches
+            else replace_fields(
+                config,
+                db_mode=saved.db_mode,
+                mount_strategy=saved.mount_strategy,
+                port_slot=saved.port_slot,
+            )
+        ),
+    )
+
+
+def _plan_file(
+    project: Path,
+    rel: str,
+    content: str,
+    label: str,
+    *,
+    replace: bool,
+) -> PlannedFile:
+    path = project / rel
+
+    if path.is_dir():
+        raise MountError(f"Expected file but found directory: {path}")
+
+    if not path.exists():
+        return PlannedFile(
+            path=path,
+            action="create",
+            description=label,
+            content=content,
+            diff=_diff(rel, "", content),
+        )
+
+    current = path.read_bytes()
+    if not replace or _digest(current) == _digest(content.encode("utf-8")):
+        return PlannedFile(path=path, action="unchanged", description=label)
+
+    return PlannedFile(
+        path=path,
+        action="update",
+        description=label,
+        content=content,
+        diff=_diff(rel, current.decode("utf-8", errors="replace"), content),
+        backup=rel != ".env",
+    )
+
+
+# sha256 of Dockerfiles written by earlier versions of php_dockerfile():
+# standalone alpine builds, without and with BuildKit cache mounts
+_PREVIOUS_DOCKERFILES = frozenset({
+    "221a9318b81b720f15388a46b99e131b2ba3e343b92b1d0defafe045844a04f8",
+    "12ce04a8c777941dca87eb9bf1ae7c0c6f9343556b24881b1e93f4357c05e73b",
+})
+
+
+def _previously_generated_dockerfile(path: Path) -> bool:
+    """
+    True if the Dockerfile is exactly what an earlier template produced.
+
+    Hand-edited Dockerfiles are never replaced. A current-template
+    Dockerfile pinned to an older base image tag also counts.
+    """
+    try:
+        current = path.read_bytes().replace(b"\r\n", b"\n")
+    except OSError:
+        return False
+
+    if _digest(current) in _PREVIOUS_DOCKERFILES:
+        return True
+
+    lines = current.decode("utf-8", errors="replace").splitlines(keepends=True)
+    expected = php_dockerfile().splitlines(keepends=True)
+    return (
+        len(lines) == len(expected)
+        and lines[0].startswith("ARG PHP_BASE_IMAGE=")
+        and lines[1:] == expected[1:]
+    )
+
+
+def _memory_limit_mb(ini: str) -> int:
+    """
+    memory_limit from ini content in MB (PHP default when absent).
+    """
+    units = {"K": 1 / 1024, "M": 1, "G": 1024}
+    limit = 128
+
+    for line in ini.splitlines():
+        key, _, value = line.partition("=")
+        if key.strip() != "memory_limit":
+            continue
+        value = value.strip().upper()
+        try:
+            if value and value[-1] in units:
+                limit = int(int(value[:-1]) * units[value[-1]])
+            else:
+                limit = int(value) // 1024 ** 2
+        except ValueError:
+            continue
+
+    return limit if limit > 0 else 1024  # -1 means unlimited
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _diff(rel: str, old: str, new: str) -> str:
+    return "".join(
+        difflib.unified_diff(
+            old.splitlines(keepends=True),
+            new.splitlines(keepends=True),
+            fromfile=f"a/{rel}" if old else "/dev/null",
+            tofile=f"b/{rel}",
+        )
+    )
+
+
+def apply_docker_files_plan(plan: DockerFilesPlan) -> list[str]:
+    """
+    Apply the changes of a plan. Unchanged files are not touched
+    (no backup, no rewrite, no mtime change).
+    """
+    actions: list[str] = []
+    backups = BackupStore(plan.project)
+
+    for planned in plan.changes:
+        if planned.backup and planned.path.exists():
+            entry = backups.backup(planned.path)
+            actions.append(f"Backed up {entry.path} ({entry.hash[:12]})")
+
+        if planned.action == "delete":
+            planned.path.unlink()
+            actions.append(f"Removed {planned.description}")
+            continue
+
+        ensure_directory(planned.path.parent)
+        _atomic_write(planned.path, planned.content or "")
+        verb = "Generated" if planned.action == "create" else "Updated"
+        actions.append(f"{verb} {planned.description}")
+
+    if plan.config is not None and save_project_config(plan.project, plan.config):
+        actions.append("Saved project config (.docker/config.json)")
+
+    if not actions:
+        actions.append("All Docker files up to date, nothing written")
 
     return actions
 
 
 # -------------------------------------------------
-# Helpers
+# Use case: generate docker setup
 # -------------------------------------------------
-def _ensure_static_file(
-    path: Path,
-    content: str,
-    actions: list[str],
-    message: str,
-) -> None:
-    ensure_file(path, content)
-    actions.append(message)
+def generate_docker_files(
+    project: Path,
+    *,
+    overwrite_compose: bool = True,
+    update_env: bool = True,
+    config: ProjectConfig | None = None,
+) -> list[str]:
+    """
+    Generate all Docker-related files for a Laravel project.
+
+    This function intentionally makes docker-compose.yml authoritative.
+    Existing compose files are backed up and overridden to prevent
+    accidental Docker Compose merging. Files whose content would not
+    change are left untouched.
+    """
+    plan = plan_docker_files(
+        project,
+        overwrite_compose=overwrite_compose,
+        update_env=update_env,
+        config=config,
+    )
+    return apply_docker_files_plan(plan)
 
 
 # -------------------------------------------------
@@ -165,14 +467,51 @@ def wait_for_service_healthy(
     timeout: int = 60,
     poll_interval: int = 3,
 ) -> bool:
+    """
+    Block until `service` is healthy, it dies, or `timeout` passes.
+    """
+    with span(f"healthy {service}", "wait") as attrs:
+        healthy = run_sync(
+            wait_for_service_healthy_async(
+                project,
+                service,
+                timeout=timeout,
+                poll_interval=poll_interval,
+            )
+        )
+        attrs["ready"] = healthy
+    return healthy
+
+
+async def wait_for_service_healthy_async(
+    project: Path,
+    service: str,
+    *,
+    timeout: int = 60,
+    poll_interval: int = 3,
+) -> bool:
+    """
+    Event-driven health wait.
+
+    Reacts to `docker events` as they arrive. Only if the event stream
+    is unavailable does it fall back to polling, starting fast and
+    backing off up to `poll_interval` seconds.
+    """
     deadline = time.monotonic() + timeout
 
+    watched = await watch_service_health(project, service, deadline=deadline)
+    if watched is not None:
+        return watched
+
+    delay = 0.25
+
     while time.monotonic() < deadline:
-        health = get_service_health(project, service)
+        health = await get_service_health_async(project, service, max_age=0)
 
         if health in ("healthy", "none"):
             return True
 
-        time.sleep(poll_interval)
+        await asyncio.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+        delay = min(delay * 2, poll_interval)
 
     return False
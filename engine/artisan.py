@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
 from typing import Sequence
 
-from engine.docker import CommandResult, _run
+from engine.docker import CommandResult, _run, _run_async, compose_project_name
+from engine.docker_api import DockerAPIError, get_docker_api
 
 
 def artisan(
@@ -30,17 +32,73 @@ def artisan(
             stderr="No artisan command provided",
         )
 
+    via_api = _artisan_via_api(project, args, timeout)
+    if via_api is not None:
+        return via_api
+
     return _run(
-        [
-            "docker",
-            "compose",
-            "exec",
-            "-T",  # no TTY (important for Streamlit / CI)
-            "app",
-            "php",
-            "artisan",
-            *args,
-        ],
+        _artisan_cmd(args),
+        cwd=project,
+        timeout=timeout,
+    )
+
+
+async def artisan_async(
+    project: Path,
+    args: Sequence[str],
+    *,
+    timeout: int = 120,
+) -> CommandResult:
+    """
+    Async variant of `artisan` with the same assumptions.
+    """
+    if not args:
+        return CommandResult.failure(
+            stderr="No artisan command provided",
+        )
+
+    via_api = await asyncio.to_thread(_artisan_via_api, project, args, timeout)
+    if via_api is not None:
+        return via_api
+
+    return await _run_async(
+        _artisan_cmd(args),
         cwd=project,
         timeout=timeout,
     )
+
+
+def _artisan_cmd(args: Sequence[str]) -> list[str]:
+    return [
+        "docker",
+        "compose",
+        "exec",
+        "-T",  # no TTY (important for Streamlit / CI)
+        "app",
+        "php",
+        "artisan",
+        *args,
+    ]
+
+
+def _artisan_via_api(
+    project: Path,
+    args: Sequence[str],
+    timeout: int,
+) -> CommandResult | None:
+    """
+    Exec through the Engine API. None means: fall back to the CLI.
+    """
+    api = get_docker_api()
+    if api is None:
+        return None
+
+    try:
+        container = api.running_container(compose_project_name(project), "app")
+    except DockerAPIError:
+        return None
+
+    if container is None:
+        return None
+
+    return api.exec(container, ["php", "artisan", *args], timeout=timeout)
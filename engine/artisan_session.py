@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+from collections import deque
+import json
+from pathlib import Path
+import queue
+import subprocess
+import threading
+import time
+from typing import IO, Callable, Sequence
+
+from engine.artisan import artisan
+from engine.docker import (
+    CommandResult,
+    _command_span,
+    _kill_process_group,
+    _process_group_kwargs,
+    _run,
+)
+
+
+READY_MARKER = "@@LDM-READY@@"
+RESULT_MARKER = "@@LDM-RESULT@@"
+
+# Boots Laravel once, then runs one artisan invocation per stdin line
+# (a JSON array of arguments) and answers with one framed JSON line.
+# Markers may follow stray output that lacked a trailing newline
+# (e.g. an `echo` in app code), so they are searched for anywhere.
+# READY carries the in-container PID so a timed-out command can be killed.
+_PHP_LOOP = r"""
+require 'vendor/autoload.php';
+$app = require 'bootstrap/app.php';
+$kernel = $app->make(Illuminate\Contracts\Console\Kernel::class);
+$kernel->bootstrap();
+fwrite(STDOUT, "@@LDM-READY@@" . getmypid() . "\n");
+fflush(STDOUT);
+while (($line = fgets(STDIN)) !== false) {
+    $args = json_decode($line, true);
+    if (!is_array($args)) {
+        continue;
+    }
+    $output = new Symfony\Component\Console\Output\BufferedOutput();
+    $error = '';
+    try {
+        $input = new Symfony\Component\Console\Input\ArgvInput(array_merge(['artisan'], $args));
+        $code = $kernel->handle($input, $output);
+    } catch (Throwable $e) {
+        $code = 1;
+        $error = (string) $e;
+    }
+    fwrite(STDOUT, "@@LDM-RESULT@@" . json_encode(
+        ['exit_code' => (int) $code, 'stdout' => $output->fetch(), 'stderr' => $error],
+        JSON_INVALID_UTF8_SUBSTITUTE
+    ) . "\n");
+    fflush(STDOUT);
+}
+"""
+
+
+class ArtisanSession:
+    """
+    Long-lived `docker compose exec` running artisan commands in one
+    bootstrapped Laravel process.
+
+    Exec setup and framework bootstrap are paid once per session
+    instead of once per command. If the session cannot start, or dies
+    (e.g. a command calls exit()), `run` falls back to one-off
+    `artisan()` calls so callers never need a second code path.
+
+    Usage:
+        with ArtisanSession(project) as session:
+            session.run(["migrate:fresh"])
+            session.run(["db:seed"])
+    """
+
+    def __init__(
+        self,
+        project: Path,
+        *,
+        service: str = "app",
+        startup_timeout: float = 60,
+    ):
+        self.project = project
+        self.service = service
+        self.startup_timeout = startup_timeout
+        self._proc: subprocess.Popen[str] | None = None
+        self._lines: queue.Queue[str | None] = queue.Queue()
+        self._stderr: deque[str] = deque(maxlen=50)
+        self._eof = threading.Event()
+        self._started = False
+        self._pid: int | None = None   # PHP process inside the container
+
+    # ---------- lifecycle ----------
+    def __enter__(self) -> "ArtisanSession":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def start(self) -> CommandResult:
+        """
+        Start the session and wait until Laravel is bootstrapped.
+        """
+        if self._started:
+            return (
+                CommandResult.success()
+                if self.alive
+                else CommandResult.failure(stderr="Artisan session is not running")
+            )
+        self._started = True
+
+        try:
+            self._proc = subprocess.Popen(
+                [
+                    "docker",
+                    "compose",
+                    "exec",
+                    "-T",
+                    self.service,
+                    "php",
+                    "-r",
+                    _PHP_LOOP,
+                ],
+                cwd=str(self.project),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                **_process_group_kwargs(),
+            )
+        except FileNotFoundError:
+            return CommandResult.failure(stderr="Command not found: docker")
+
+        assert self._proc.stdout is not None and self._proc.stderr is not None
+        _pump(self._proc.stdout, self._lines.put, on_close=self._on_stdout_closed)
+        _pump(self._proc.stderr, self._stderr.append)
+
+        deadline = time.monotonic() + self.startup_timeout
+        stray: list[str] = []
+
+        while True:
+            line = self._next_line(deadline)
+            if line is not None and READY_MARKER in line:
+                pid = line.partition(READY_MARKER)[2].strip()
+                self._pid = int(pid) if pid.isdigit() else None
+                return CommandResult.success()
+            if line is None:
+                self.close()
+                return CommandResult.failure(
+                    stderr="Artisan session failed to start\n" + "\n".join(self._stderr),
+                    stdout="\n".join(stray),
+                )
+            stray.append(line)
+
+    def _on_stdout_closed(self) -> None:
+        self._eof.set()
+        self._lines.put(None)
+
+    def close(self) -> None:
+        if self._proc is None:
+            return
+
+        if self._proc.poll() is None:
+            try:
+                assert self._proc.stdin is not None
+                self._proc.stdin.close()
+                self._proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                _kill_process_group(self._proc.pid)
+                self._proc.wait()
+
+        self._proc = None
+
+    # ---------- commands ----------
+    def run(
+        self,
+        args: Sequence[str],
+        *,
+        timeout: float = 120,
+    ) -> CommandResult:
+        """
+        Run one artisan command in the session.
+
+        A timeout kills the session: the PHP process inside the
+        container and the local exec client (the PHP process cannot be
+        interrupted otherwise). Later calls use one-off execs.
+        """
+        if not args:
+            return CommandResult.failure(stderr="No artisan command provided")
+
+        with _command_span(["php", "artisan", *args]) as finish:
+            return finish(self._send(args, timeout=timeout))
+
+    def _send(self, args: Sequence[str], *, timeout: float) -> CommandResult:
+        if not self._started:
+            self.start()
+
+        if not self.alive:
+            return artisan(self.project, args, timeout=int(timeout))
+
+        try:
+            assert self._proc is not None and self._proc.stdin is not None
+            self._proc.stdin.write(json.dumps(list(args)) + "\n")
+            self._proc.stdin.flush()
+        except OSError:
+            self.close()
+            return artisan(self.project, args, timeout=int(timeout))
+
+        deadline = time.monotonic() + timeout
+        stray: list[str] = []
+
+        while True:
+            line = self._next_line(deadline)
+
+            if line is None:
+                timed_out = not self._eof.is_set()
+                if timed_out:
+                    # Killing the exec client leaves the PHP loop running
+                    self._kill_in_container()
+                    _kill_process_group(self._proc.pid)  # type: ignore[union-attr]
+                self.close()
+                return CommandResult.failure(
+                    stderr="Command timed out" if timed_out else (
+                        "Artisan session ended unexpectedly\n" + "\n".join(self._stderr)
+                    ),
+                    stdout="\n".join(stray),
+                )
+
+            prefix, marker, payload = line.partition(RESULT_MARKER)
+            if marker:
+                if prefix:
+                    stray.append(prefix)
+                return _parse_frame(payload, stray)
+
+            stray.append(line)  # output written around the console output
+
+    def _kill_in_container(self) -> None:
+        """
+        Kill the session's PHP process in the container. NEVER raises.
+        """
+        if self._pid is None:
+            return
+        # Shell builtin: slim images may lack a kill binary
+        _run(
+            [
+                "docker",
+                "compose",
+                "exec",
+                "-T",
+                self.service,
+                "sh",
+                "-c",
+                f"kill -9 {self._pid}",
+            ],
+            cwd=self.project,
+            timeout=15,
+        )
+
+    def _next_line(self, deadline: float) -> str | None:
+        """
+        Next stdout line, or None on EOF / deadline.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            return self._lines.get(timeout=remaining)
+        except queue.Empty:
+            return None
+
+
+def _parse_frame(payload: str, stray: list[str]) -> CommandResult:
+    try:
+        frame = json.loads(payload)
+        exit_code = int(frame["exit_code"])
+        stdout = "\n".join([*stray, str(frame.get("stdout") or "")])
+        stderr = str(frame.get("stderr") or "")
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return CommandResult.failure(
+            stderr="Malformed artisan session response",
+            stdout="\n".join(stray),
+        )
+
+    return CommandResult(
+        ok=exit_code == 0,
+        stdout=stdout.strip(),
+        stderr=stderr.strip(),
+        exit_code=exit_code,
+    )
+
+
+def _pump(
+    stream: IO[str],
+    sink: Callable[[str], None],
+    *,
+    on_close: Callable[[], None] | None = None,
+) -> None:
+    """
+    Forward lines from a pipe to `sink` on a daemon thread.
+    """
+
+    def worker() -> None:
+        for line in stream:
+            sink(line.rstrip("\r\n"))
+        if on_close is not None:
+            on_close()
+
+    threading.Thread(target=worker, daemon=True).start()
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+import gzip
+import hashlib
+import json
+from pathlib import Path
+import threading
+from typing import Any
+
+from engine.fs import _atomic_write, ensure_directory
+
+
+class BackupError(RuntimeError):
+    pass
+
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class BackupEntry:
+    path: str          # relative to the project, posix style
+    timestamp: str     # UTC ISO 8601 with microseconds
+    hash: str          # sha256 of the original content
+    size: int          # original size in bytes
+
+    @property
+    def created(self) -> datetime:
+        return datetime.fromisoformat(self.timestamp)
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """
+    Limits applied after every backup. None disables a limit.
+
+    The newest backup of every path is always kept.
+    """
+    max_per_path: int | None = 20
+    max_age: timedelta | None = timedelta(days=90)
+    max_total_bytes: int | None = 50 * 1024 ** 2
+
+
+# -------------------------------------------------
+# Store
+# -------------------------------------------------
+_locks: dict[Path, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(root: Path) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(root.resolve(), threading.Lock())
+
+
+class BackupStore:
+    """
+    Per-project, content-addressed backups under .docker/backups.
+
+    Layout:
+        objects/ab/abcdef....gz   gzip-compressed content, one per hash
+        index.json                [(path, timestamp, hash, size), ...]
+
+    Identical content is stored once no matter how often it is backed
+    up, and re-backing up unchanged content adds no index entry.
+    """
+
+    def __init__(
+        self,
+        project: Path,
+        *,
+        policy: RetentionPolicy | None = None,
+    ):
+        self.project = project
+        self.root = project / ".docker" / "backups"
+        self.policy = policy or RetentionPolicy()
+        self._lock = _lock_for(self.root)
+
+    # ---------- paths ----------
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.gz"
+
+    def _index_path(self) -> Path:
+        return self.root / "index.json"
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return path.resolve().relative_to(self.project.resolve()).as_posix()
+        except ValueError:
+            raise BackupError(f"Not inside the project: {path}") from None
+
+    # ---------- index ----------
+    def _load(self) -> list[BackupEntry]:
+        try:
+            raw: Any = json.loads(self._index_path().read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            return []
+
+        entries: list[BackupEntry] = []
+        for item in raw if isinstance(raw, list) else []:
+            try:
+                entries.append(BackupEntry(**item))
+            except TypeError:
+                continue
+        return entries
+
+    def _save(self, entries: list[BackupEntry]) -> None:
+        ensure_directory(self.root)
+        _atomic_write(
+            self._index_path(),
+            json.dumps([asdict(e) for e in entries], indent=1),
+        )
+
+    # ---------- operations ----------
+    def backup(self, path: Path) -> BackupEntry:
+        """
+        Back up a file and apply the retention policy.
+        """
+        if not path.is_file():
+            raise FileNotFoundError(f"Cannot backup missing file: {path}")
+
+        rel = self._relative(path)
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            entries = self._load()
+            latest = _latest(entries, rel)
+
+            if latest is not None and latest.hash == digest:
+                return latest
+
+            obj = self._object_path(digest)
+            if not obj.exists():
+                ensure_directory(obj.parent)
+                _atomic_write(obj, gzip.compress(data, compresslevel=6))
+
+            entry = BackupEntry(
+                path=rel,
+                timestamp=_next_timestamp(latest),
+                hash=digest,
+                size=len(data),
+            )
+            entries.append(entry)
+            self._save(self._retain(entries))
+            return entry
+
+    def list(self, path: Path | None = None) -> list[BackupEntry]:
+        """
+        Backups, newest first, optionally for a single file.
+        """
+        rel = self._relative(path) if path is not None else None
+        entries = [e for e in self._load() if rel is None or e.path == rel]
+        return sorted(entries, key=lambda e: e.timestamp, reverse=True)
+
+    def restore(
+        self,
+        path: Path,
+        at: datetime | str | None = None,
+    ) -> BackupEntry:
+        """
+        Restore the newest backup of `path` taken at or before `at`
+        (the newest overall when `at` is None).
+
+        The current content is backed up first, so a restore can
+        itself be undone.
+        """
+        if isinstance(at, datetime):
+            at = at.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+        candidates = [
+            e for e in self.list(path)
+            if at is None or e.timestamp <= at
+        ]
+        if not candidates:
+            raise BackupError(f"No backup of {path.name} at or before {at}")
+
+        entry = candidates[0]
+        try:
+            data = gzip.decompress(self._object_path(entry.hash).read_bytes())
+        except (OSError, EOFError, gzip.BadGzipFile) as e:
+            raise BackupError(f"Backup object unreadable: {entry.hash}") from e
+
+        if hashlib.sha256(data).hexdigest() != entry.hash:
+            raise BackupError(f"Backup object corrupt: {entry.hash}")
+
+        if path.is_file():
+            self.backup(path)
+
+        ensure_directory(path.parent)
+        _atomic_write(path, data)
+        return entry
+
+    def prune(self) -> list[BackupEntry]:
+        """
+        Apply the retention policy now; returns the dropped entries.
+        """
+        with self._lock:
+            entries = self._load()
+            kept = self._retain(entries)
+            if len(kept) != len(entries):
+                self._save(kept)
+            return [e for e in entries if e not in kept]
+
+    # ---------- retention ----------
+    def _retain(self, entries: list[BackupEntry]) -> list[BackupEntry]:
+        """
+        Filter entries by the policy and delete unreferenced objects.
+        """
+        policy = self.policy
+        newest = {e.path: e for e in sorted(entries, key=lambda e: e.timestamp)}
+        ordered = sorted(entries, key=lambda e: e.timestamp, reverse=True)
+
+        kept: list[BackupEntry] = []
+        per_path: dict[str, int] = {}
+        cutoff = (
+            datetime.now(timezone.utc) - policy.max_age
+            if policy.max_age is not None
+            else None
+        )
+
+        for entry in ordered:
+            always = newest[entry.path] is entry
+            count = per_path.get(entry.path, 0)
+
+            if not always:
+                if policy.max_per_path is not None and count >= policy.max_per_path:
+                    continue
+                if cutoff is not None and entry.created < cutoff:
+                    continue
+
+            per_path[entry.path] = count + 1
+            kept.append(entry)
+
+        if policy.max_total_bytes is not None:
+            kept = self._within_size(kept, newest, policy.max_total_bytes)
+
+        self._collect_garbage({e.hash for e in kept})
+        return sorted(kept, key=lambda e: e.timestamp)
+
+    def _within_size(
+        self,
+        kept: list[BackupEntry],
+        newest: dict[str, BackupEntry],
+        budget: int,
+    ) -> list[BackupEntry]:
+        """
+        Drop oldest entries until the stored objects fit the budget.
+        """
+        sizes = {e.hash: self._stored_size(e.hash) for e in kept}
+        refs: dict[str, int] = {}
+        for e in kept:
+            refs[e.hash] = refs.get(e.hash, 0) + 1
+
+        total = sum(sizes.values())
+        result = list(kept)  # newest first
+
+        for entry in reversed(kept):
+            if total <= budget:
+                break
+            if newest[entry.path] is entry:
+                continue
+            result.remove(entry)
+            refs[entry.hash] -= 1
+            if refs[entry.hash] == 0:
+                total -= sizes[entry.hash]
+
+        return result
+
+    def _stored_size(self, digest: str) -> int:
+        try:
+            return self._object_path(digest).stat().st_size
+        except OSError:
+            return 0
+
+    def _collect_garbage(self, referenced: set[str]) -> None:
+        for obj in (self.root / "objects").glob("*/*.gz"):
+            if obj.name[: -len(".gz")] not in referenced:
+                obj.unlink(missing_ok=True)
+
+
+def _latest(entries: list[BackupEntry], rel: str) -> BackupEntry | None:
+    matching = [e for e in entries if e.path == rel]
+    return max(matching, key=lambda e: e.timestamp) if matching else None
+
+
+def _next_timestamp(previous: BackupEntry | None) -> str:
+    """
+    Current UTC time, nudged forward so timestamps per path never collide.
+    """
+    now = datetime.now(timezone.utc)
+    if previous is not None and now <= previous.created:
+        now = previous.created + timedelta(microseconds=1)
+    return now.isoformat(timespec="microseconds")
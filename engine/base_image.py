@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import io
+from pathlib import Path
+import threading
+
+from engine.docker import CommandResult, _run, _run_binary
+from engine.docker_api import DockerAPIError, get_docker_api
+from engine.templates import php_base_dockerfile, php_base_image_tag
+
+
+# One build per tag at a time, even when many projects start together
+_locks: dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(tag: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(tag, threading.Lock())
+
+
+def image_exists(tag: str, *, cwd: Path) -> bool:
+    """
+    True if the image is present locally. NEVER raises.
+    """
+    api = get_docker_api()
+    if api is not None:
+        try:
+            return bool(api.inspect_image(tag))
+        except DockerAPIError:
+            return False
+
+    return _run(
+        ["docker", "image", "inspect", "--format", "{{.Id}}", tag],
+        cwd=cwd,
+        timeout=30,
+    ).ok
+
+
+def uses_php_base_image(project: Path, *, watch: bool = False) -> bool:
+    """
+    True if the project's image builds on the shared base image.
+
+    Watch mode always builds Dockerfile.watch, which starts from the
+    base image. Otherwise it depends on the Dockerfile: ones generated
+    before the shared base existed build everything themselves (and
+    are never replaced), so they need no base image.
+    """
+    if watch:
+        return True
+
+    for name in ("Dockerfile", "Dockerfile.watch"):
+        try:
+            dockerfile = (project / "docker" / "php" / name).read_text(encoding="utf-8")
+        except OSError:
+            continue
+        if "PHP_BASE_IMAGE" in dockerfile:
+            return True
+    return False
+
+
+def ensure_php_base_image(cwd: Path) -> tuple[CommandResult, bool]:
+    """
+    Make sure the shared PHP base image for the current template exists.
+
+    The tag is derived from the base Dockerfile template, so a template
+    change produces a new image while older projects keep theirs.
+
+    Returns (result, built) where `built` tells whether a build ran.
+    """
+    tag = php_base_image_tag()
+
+    with _lock_for(tag):
+        if image_exists(tag, cwd=cwd):
+            return CommandResult.success(stdout=tag), False
+
+        # Dockerfile on stdin: the base image needs no build context
+        result = _run_binary(
+            ["docker", "build", "--tag", tag, "-"],
+            cwd=cwd,
+            stdin=io.BytesIO(php_base_dockerfile().encode("utf-8")),
+            timeout=1800,
+        )
+        return result, True
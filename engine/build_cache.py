@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.fingerprint import hash_files, read_stamp, write_stamp
+
+
+# Files that feed the app image build
+BUILD_INPUTS = (
+    "docker/php/Dockerfile",
+    "docker/php/zz-overrides.ini",
+    "docker-compose.yml",
+)
+
+
+def _stamp_path(project: Path) -> Path:
+    return project / ".docker" / "build.json"
+
+
+def build_fingerprint(project: Path) -> str:
+    """
+    Hash of the build context inputs.
+
+    The base image is covered through the FROM line in the Dockerfile;
+    a moved upstream tag is not detected (rebuild manually for that).
+    """
+    return hash_files(project, BUILD_INPUTS)
+
+
+def build_up_to_date(project: Path) -> bool:
+    """
+    True if the inputs are unchanged since the last successful build.
+    """
+    stamp = read_stamp(_stamp_path(project))
+    return bool(stamp) and stamp.get("fingerprint") == build_fingerprint(project)
+
+
+def record_build(project: Path) -> None:
+    """
+    Remember the inputs after a *successful* build.
+    """
+    write_stamp(_stamp_path(project), {"fingerprint": build_fingerprint(project)})
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import gzip
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+
+from engine.docker import (
+    CommandResult,
+    _env_file_value,
+    _run_binary,
+    compose_project_name,
+)
+from engine.fingerprint import hash_files
+from engine.fs import user_cache_dir
+
+
+# Everything that determines the content of a fresh + seeded database
+SNAPSHOT_INPUTS = (
+    "database/migrations",
+    "database/seeders",
+    "database/factories",
+)
+
+DEFAULT_BUDGET_BYTES = 2 * 1024 ** 3
+
+# Overrides the default budget (in MiB) for the UI / presets
+BUDGET_ENV = "LDM_SNAPSHOT_BUDGET_MB"
+
+# Credentials come from the mysql container's own environment; the
+# database is the app's DB_DATABASE (LDM_DB), else the container default
+_DUMP = (
+    'exec mysqldump -uroot -p"$MYSQL_ROOT_PASSWORD" '
+    "--single-transaction --routines --triggers --add-drop-database "
+    '--databases "${LDM_DB:-$MYSQL_DATABASE}"'
+)
+_RESTORE = 'exec mysql -uroot -p"$MYSQL_ROOT_PASSWORD"'
+
+
+# -------------------------------------------------
+# Keys
+# -------------------------------------------------
+def snapshot_key(project: Path) -> str:
+    """
+    Cache key: project name plus a hash of migrations, seeders,
+    factories and the database name (dumps recreate the database by
+    name, so a renamed DB_DATABASE must not reuse them).
+    """
+    digest = hashlib.sha256(
+        "\0".join([
+            hash_files(project, SNAPSHOT_INPUTS),
+            database_name(project) or "",
+        ]).encode("utf-8")
+    ).hexdigest()[:24]
+    return f"{compose_project_name(project)}-{digest}"
+
+
+def database_name(project: Path) -> str | None:
+    """
+    DB_DATABASE from the project's .env; None means the container default.
+    """
+    return _env_file_value(project / ".env", "DB_DATABASE")
+
+
+# -------------------------------------------------
+# Cache
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Snapshot:
+    key: str
+    path: Path
+    size: int
+
+
+class SnapshotCache:
+    """
+    Gzipped SQL dumps on local disk with LRU eviction.
+
+    A file's mtime doubles as its last-use time: hits touch it and
+    eviction removes the oldest files until the budget is met.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        *,
+        budget_bytes: int | None = None,
+    ):
+        self.root = root or user_cache_dir() / "db-snapshots"
+        self.budget_bytes = budget_bytes if budget_bytes is not None else _env_budget()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.sql.gz"
+
+    def lookup(self, key: str) -> Snapshot | None:
+        path = self._path(key)
+        try:
+            os.utime(path)
+            return Snapshot(key=key, path=path, size=path.stat().st_size)
+        except OSError:
+            return None
+
+    def entries(self) -> list[Snapshot]:
+        """
+        All snapshots, least recently used first.
+        """
+        found: list[tuple[float, Snapshot]] = []
+        for path in self.root.glob("*.sql.gz"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            key = path.name[: -len(".sql.gz")]
+            found.append((st.st_mtime, Snapshot(key=key, path=path, size=st.st_size)))
+
+        return [snapshot for _, snapshot in sorted(found, key=lambda t: t[0])]
+
+    def evict(self, *, keep: str | None = None) -> list[Snapshot]:
+        """
+        Remove least recently used snapshots until under budget.
+        """
+        entries = self.entries()
+        total = sum(e.size for e in entries)
+        removed: list[Snapshot] = []
+
+        for entry in entries:
+            if total <= self.budget_bytes:
+                break
+            if entry.key == keep:
+                continue
+            try:
+                entry.path.unlink()
+            except OSError:
+                continue
+            total -= entry.size
+            removed.append(entry)
+
+        return removed
+
+    # ---------- dump / restore ----------
+    def save(self, project: Path, key: str) -> CommandResult:
+        """
+        Dump the project database into the cache under `key`.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=str(self.root), suffix=".tmp")
+        tmp = Path(tmp_name)
+
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                fileobj=raw, mode="wb", compresslevel=3,
+            ) as sink:
+                result = _run_binary(
+                    _exec_mysql(project, _DUMP),
+                    cwd=project,
+                    stdout=sink,  # type: ignore[arg-type]
+                )
+
+            if result.ok:
+                tmp.replace(self._path(key))
+                self.evict(keep=key)
+            return result
+
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def restore(self, project: Path, snapshot: Snapshot) -> CommandResult:
+        """
+        Load a snapshot into the project database (drops it first).
+        """
+        try:
+            with gzip.open(snapshot.path, "rb") as source:
+                return _run_binary(
+                    _exec_mysql(project, _RESTORE),
+                    cwd=project,
+                    stdin=source,  # type: ignore[arg-type]
+                )
+        except (OSError, EOFError) as e:
+            return CommandResult.failure(stderr=f"Snapshot unreadable: {e}")
+
+
+def _exec_mysql(project: Path, script: str) -> list[str]:
+    database = database_name(project)
+    env = ["-e", f"LDM_DB={database}"] if database else []
+    return ["docker", "compose", "exec", "-T", *env, "mysql", "sh", "-c", script]
+
+
+def _env_budget() -> int:
+    try:
+        return int(os.environ[BUDGET_ENV]) * 1024 ** 2
+    except (KeyError, ValueError):
+        return DEFAULT_BUDGET_BYTES
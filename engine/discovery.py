@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+import hashlib
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any
+
+from engine.fs import _atomic_write, user_cache_dir
+
+
+INDEX_VERSION = 1
+
+# Never descended into during discovery
+PRUNED_DIRS = frozenset({"vendor", "node_modules", ".git"})
+
+DEFAULT_MAX_WORKERS = 8
+
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class ProjectFacts:
+    """
+    What discovery knows about a folder, derived from composer.json.
+    """
+    is_laravel: bool
+    has_sail: bool = False
+    framework_version: str | None = None  # composer constraint, e.g. ^11.0
+
+
+@dataclass(frozen=True)
+class _Signature:
+    """
+    Cheap change detector: composer.json mtime/size plus artisan presence.
+    """
+    mtime_ns: int
+    size: int
+    has_artisan: bool
+
+
+NOT_LARAVEL = ProjectFacts(is_laravel=False)
+
+
+# -------------------------------------------------
+# Facts
+# -------------------------------------------------
+def parse_composer_facts(composer: Path, *, has_artisan: bool) -> ProjectFacts:
+    """
+    Parse composer.json into ProjectFacts. NEVER raises.
+    """
+    if not has_artisan:
+        return NOT_LARAVEL
+
+    try:
+        data = json.loads(composer.read_text(encoding="utf-8"))
+    except (json.JSONDecodeError, OSError, UnicodeDecodeError):
+        return NOT_LARAVEL
+
+    if not isinstance(data, dict):
+        return NOT_LARAVEL
+
+    require = data.get("require") or {}
+    require_dev = data.get("require-dev") or {}
+
+    if "laravel/framework" not in require:
+        return NOT_LARAVEL
+
+    return ProjectFacts(
+        is_laravel=True,
+        has_sail="laravel/sail" in require_dev,
+        framework_version=str(require["laravel/framework"]),
+    )
+
+
+def _signature(project: Path) -> _Signature | None:
+    try:
+        st = (project / "composer.json").stat()
+    except OSError:
+        return None
+
+    return _Signature(
+        mtime_ns=st.st_mtime_ns,
+        size=st.st_size,
+        has_artisan=(project / "artisan").is_file(),
+    )
+
+
+def _signature_from_entries(entries: dict[str, os.DirEntry[str]]) -> _Signature | None:
+    """
+    Build a signature from scandir results, reusing cached dirent info.
+    """
+    composer = entries.get("composer.json")
+    if composer is None:
+        return None
+
+    try:
+        st = composer.stat()
+    except OSError:
+        return None
+
+    artisan = entries.get("artisan")
+    return _Signature(
+        mtime_ns=st.st_mtime_ns,
+        size=st.st_size,
+        has_artisan=artisan is not None and artisan.is_file(),
+    )
+
+
+_memo: dict[Path, tuple[_Signature, ProjectFacts]] = {}
+_memo_lock = threading.Lock()
+
+
+def project_facts(project: Path) -> ProjectFacts:
+    """
+    Facts for a single project, re-parsed only when composer.json changed.
+    """
+    signature = _signature(project)
+    if signature is None:
+        with _memo_lock:
+            _memo.pop(project, None)
+        return NOT_LARAVEL
+
+    with _memo_lock:
+        cached = _memo.get(project)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    facts = parse_composer_facts(
+        project / "composer.json",
+        has_artisan=signature.has_artisan,
+    )
+    with _memo_lock:
+        _memo[project] = (signature, facts)
+    return facts
+
+
+# -------------------------------------------------
+# On-disk index
+# -------------------------------------------------
+class DiscoveryIndex:
+    """
+    Persistent map of folder -> (signature, facts) for one projects root.
+
+    Stored in the user cache directory so the projects root itself is
+    never written to.
+    """
+
+    def __init__(self, root: Path, path: Path | None = None):
+        self.root = root
+        self.path = path or _index_path(root)
+        self._entries: dict[str, tuple[_Signature, ProjectFacts]] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def lookup(
+        self,
+        project: Path,
+        signature: _Signature | None = None,
+    ) -> ProjectFacts:
+        """
+        Return facts for a folder, parsing composer.json only if changed.
+
+        Pass `signature` when the caller already has the stat data.
+        Safe to call from several threads.
+        """
+        key = self._key(project)
+        if signature is None:
+            signature = _signature(project)
+
+        if signature is None:
+            self.forget(project)
+            return NOT_LARAVEL
+
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        facts = parse_composer_facts(
+            project / "composer.json",
+            has_artisan=signature.has_artisan,
+        )
+        with self._lock:
+            self._entries[key] = (signature, facts)
+            self._dirty = True
+        return facts
+
+    def forget(self, project: Path) -> None:
+        """
+        Drop a folder whose composer.json is gone.
+        """
+        with self._lock:
+            if self._entries.pop(self._key(project), None) is not None:
+                self._dirty = True
+
+    def retain(self, projects: set[Path]) -> None:
+        """
+        Forget folders that were not seen in the latest scan.
+        """
+        keep = {self._key(p) for p in projects}
+        with self._lock:
+            stale = [k for k in self._entries if k not in keep]
+            for key in stale:
+                del self._entries[key]
+            self._dirty = self._dirty or bool(stale)
+
+    def save(self) -> None:
+        """
+        Persist the index if anything changed. NEVER raises.
+        """
+        if not self._dirty:
+            return
+
+        payload = {
+            "version": INDEX_VERSION,
+            "root": str(self.root),
+            "entries": {
+                key: {"signature": asdict(sig), "facts": asdict(facts)}
+                for key, (sig, facts) in sorted(self._entries.items())
+            },
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.path, json.dumps(payload, indent=1))
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _key(self, project: Path) -> str:
+        try:
+            return project.relative_to(self.root).as_posix()
+        except ValueError:
+            return project.as_posix()
+
+    def _load(self) -> None:
+        try:
+            payload: Any = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+            return
+
+        if not isinstance(payload, dict) or payload.get("version") != INDEX_VERSION:
+            return
+
+        for key, entry in (payload.get("entries") or {}).items():
+            try:
+                self._entries[key] = (
+                    _Signature(**entry["signature"]),
+                    ProjectFacts(**entry["facts"]),
+                )
+            except (KeyError, TypeError):
+                continue
+
+
+def _index_path(root: Path) -> Path:
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return user_cache_dir() / "discovery" / f"{digest}.json"
+
+
+# -------------------------------------------------
+# Discovery
+# -------------------------------------------------
+def discover_projects(
+    projects_root: Path,
+    *,
+    max_depth: int = 1,
+    index: DiscoveryIndex | None = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> dict[Path, ProjectFacts]:
+    """
+    Return Laravel projects up to `max_depth` levels below `projects_root`.
+
+    - Depth 1 means direct children only
+    - Laravel projects, vendor/, node_modules/ and .git are not descended into
+    - Symlinked folders are only followed at depth 1 (no cycles)
+    - Each level is scanned in parallel; dirent type info from
+      os.scandir is reused instead of stat-ing every folder
+
+    composer.json is only re-read for folders whose signature changed
+    since the previous scan.
+    """
+    index = index or DiscoveryIndex(projects_root)
+
+    seen: set[Path] = set()
+    found: dict[Path, ProjectFacts] = {}
+
+    level = [
+        (Path(entry.path), 1)
+        for entry in _scan(projects_root).values()
+        if _is_dir(entry, follow_symlinks=True)
+    ]
+
+    def visit(item: tuple[Path, int]) -> tuple[ProjectFacts | None, list[Path]]:
+        directory, depth = item
+        return _visit(directory, depth, max_depth, index)
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix="discovery",
+    ) as pool:
+        while level:
+            next_level: list[tuple[Path, int]] = []
+
+            for (directory, depth), (facts, subdirs) in zip(
+                level,
+                pool.map(visit, level),
+            ):
+                seen.add(directory)
+                if facts is not None and facts.is_laravel:
+                    found[directory] = facts
+                next_level.extend((d, depth + 1) for d in subdirs)
+
+            level = next_level
+
+    index.retain(seen)
+    index.save()
+    return found
+
+
+def _visit(
+    directory: Path,
+    depth: int,
+    max_depth: int,
+    index: DiscoveryIndex,
+) -> tuple[ProjectFacts | None, list[Path]]:
+    """
+    Classify one folder and return the subfolders worth descending into.
+    """
+    entries = _scan(directory)
+
+    facts = None
+    signature = _signature_from_entries(entries)
+    if signature is None:
+        # composer.json deleted since the last scan: not a project anymore
+        index.forget(directory)
+    else:
+        facts = index.lookup(directory, signature)
+        if facts.is_laravel:
+            return facts, []
+
+    if depth >= max_depth:
+        return facts, []
+
+    return facts, [
+        Path(entry.path)
+        for name, entry in entries.items()
+        if name not in PRUNED_DIRS and _is_dir(entry, follow_symlinks=False)
+    ]
+
+
+def _scan(directory: Path) -> dict[str, os.DirEntry[str]]:
+    try:
+        with os.scandir(directory) as it:
+            return {entry.name: entry for entry in it}
+    except OSError:
+        return {}
+
+
+def _is_dir(entry: os.DirEntry[str], *, follow_symlinks: bool) -> bool:
+    try:
+        return entry.is_dir(follow_symlinks=follow_symlinks)
+    except OSError:
+        return False
@@ -1,9 +1,32 @@
 from __future__ import annotations
 
 from pathlib import Path
-from dataclasses import dataclass
+from contextlib import contextmanager
+import contextvars
+from dataclasses import dataclass, replace
+import asyncio
+from collections import deque
+import functools
+import os
+import re
+import shutil
+import signal
 import subprocess
-from typing import Sequence
+import sys
+import threading
+import time
+from typing import Any, Awaitable, BinaryIO, Callable, Iterator, Literal, Sequence, TypeVar
+
+from engine.tracing import in_span, span
+
+
+T = TypeVar("T")
+
+StreamName = Literal["stdout", "stderr"]
+OutputCallback = Callable[[StreamName, str], None]
+
+# Lines of streamed output kept for the final CommandResult
+STREAM_TAIL_LINES = 200
 
 
 # -------------------------------------------------
@@ -15,6 +38,7 @@ class CommandResult:
     stdout: str
     stderr: str
     exit_code: int
+    duration: float = 0.0   # seconds, spawn to exit
 
     @classmethod
     def success(cls, stdout: str = "") -> "CommandResult":
@@ -25,9 +49,104 @@ class CommandResult:
         return cls(False, stdout, stderr, exit_code)
 
 
+# -------------------------------------------------
+# Command spans
+# -------------------------------------------------
+@contextmanager
+def _command_span(cmd: Sequence[str]) -> Iterator[Callable[[CommandResult], CommandResult]]:
+    """
+    Time one command and record it in the active trace.
+
+    Yields `finish`, which stamps the result with its duration (and
+    the span with its exit code). A command run inside another one
+    (e.g. a runner falling back to its blocking twin) is the same
+    process and gets no span of its own.
+    """
+    started = time.monotonic()
+
+    def stamp(result: CommandResult) -> CommandResult:
+        return replace(result, duration=time.monotonic() - started)
+
+    if in_span("command"):
+        yield stamp
+        return
+
+    with span(_command_label(cmd), "command", argv=list(cmd)) as attrs:
+        def finish(result: CommandResult) -> CommandResult:
+            attrs["exit_code"] = result.exit_code
+            attrs["ok"] = result.ok
+            return stamp(result)
+
+        yield finish
+
+
+def _command_label(cmd: Sequence[str]) -> str:
+    """
+    "docker compose exec" for `docker compose exec -T app ...`.
+    """
+    words: list[str] = []
+    for word in cmd[:3]:
+        if word.startswith("-"):
+            break
+        words.append(word)
+    return " ".join(words) or "command"
+
+
+def _traced(run: Callable[..., CommandResult]) -> Callable[..., CommandResult]:
+    @functools.wraps(run)
+    def wrapper(cmd: Sequence[str], *args: Any, **kwargs: Any) -> CommandResult:
+        with _command_span(cmd) as finish:
+            return finish(run(cmd, *args, **kwargs))
+    return wrapper
+
+
+def _traced_async(
+    run: Callable[..., Awaitable[CommandResult]],
+) -> Callable[..., Awaitable[CommandResult]]:
+    @functools.wraps(run)
+    async def wrapper(cmd: Sequence[str], *args: Any, **kwargs: Any) -> CommandResult:
+        with _command_span(cmd) as finish:
+            return finish(await run(cmd, *args, **kwargs))
+    return wrapper
+
+
+# -------------------------------------------------
+# Process groups
+# -------------------------------------------------
+def _process_group_kwargs() -> dict[str, Any]:
+    """
+    Spawn children in their own process group.
+
+    `docker compose` forks helpers (buildx, plugins). Killing only the
+    direct child on timeout leaves those running, so every spawn gets
+    its own group that can be torn down as a whole.
+    """
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _kill_process_group(pid: int) -> None:
+    """
+    Kill a process and everything in its group. NEVER raises.
+    """
+    try:
+        if sys.platform == "win32":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(pid)],
+                capture_output=True,
+                check=False,
+            )
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+
+
 # -------------------------------------------------
 # Command runner (single choke point)
 # -------------------------------------------------
+@_traced
 def _run(
     cmd: Sequence[str],
     *,
@@ -35,33 +154,474 @@ def _run(
     timeout: int = 120,
 ) -> CommandResult:
     try:
-        proc = subprocess.run(
+        proc = subprocess.Popen(
             list(cmd),
             cwd=str(cwd),
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
+            encoding="utf-8",   # same decoding as the async runners
+            errors="replace",
+            **_process_group_kwargs(),
+        )
+    except FileNotFoundError:
+        return CommandResult.failure(
+            stderr=f"Command not found: {cmd[0]}",
+        )
+
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+
+    except subprocess.TimeoutExpired:
+        _kill_process_group(proc.pid)
+        stdout, _ = proc.communicate()
+        return CommandResult.failure(
+            stderr="Command timed out",
+            stdout=(stdout or "").strip(),
+        )
+
+    return CommandResult(
+        ok=proc.returncode == 0,
+        stdout=stdout.strip(),
+        stderr=stderr.strip(),
+        exit_code=proc.returncode,
+    )
+
+
+@_traced
+def _run_binary(
+    cmd: Sequence[str],
+    *,
+    cwd: Path,
+    stdin: BinaryIO | None = None,
+    stdout: BinaryIO | None = None,
+    timeout: int = 600,
+) -> CommandResult:
+    """
+    Run a command streaming raw bytes from `stdin` and/or into `stdout`.
+
+    Used for dumps and restores that must not be held in memory.
+    The returned CommandResult carries stderr only.
+    """
+    try:
+        proc = subprocess.Popen(
+            list(cmd),
+            cwd=str(cwd),
+            stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE if stdout is not None else subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            **_process_group_kwargs(),
+        )
+    except FileNotFoundError:
+        return CommandResult.failure(
+            stderr=f"Command not found: {cmd[0]}",
+        )
+
+    timer = threading.Timer(timeout, _kill_process_group, args=(proc.pid,))
+    stderr: list[bytes] = []
+    threads = [
+        threading.Thread(target=lambda: stderr.append(proc.stderr.read()), daemon=True),  # type: ignore[union-attr]
+    ]
+    if stdout is not None:
+        threads.append(threading.Thread(
+            target=shutil.copyfileobj, args=(proc.stdout, stdout), daemon=True,
+        ))
+
+    timer.start()
+    for thread in threads:
+        thread.start()
+
+    try:
+        if stdin is not None:
+            assert proc.stdin is not None
+            try:
+                shutil.copyfileobj(stdin, proc.stdin)
+            except (BrokenPipeError, OSError):
+                pass  # the process exited early; its exit code tells why
+            finally:
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+
+        proc.wait()
+        for thread in threads:
+            thread.join()
+    finally:
+        timed_out = not timer.is_alive()
+        timer.cancel()
+
+    if timed_out:
+        return CommandResult.failure(stderr="Command timed out")
+
+    return CommandResult(
+        ok=proc.returncode == 0,
+        stdout="",
+        stderr=_decode(b"".join(stderr)).strip(),
+        exit_code=proc.returncode,
+    )
+
+
+# -------------------------------------------------
+# Async command runner
+# -------------------------------------------------
+@_traced_async
+async def _run_async(
+    cmd: Sequence[str],
+    *,
+    cwd: Path,
+    timeout: int = 120,
+) -> CommandResult:
+    """
+    Async counterpart of `_run` with identical result semantics.
+
+    Several of these can be awaited together (see `gather_commands`)
+    so independent docker calls overlap instead of queueing.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(cwd),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **_process_group_kwargs(),
+        )
+    except FileNotFoundError:
+        return CommandResult.failure(
+            stderr=f"Command not found: {cmd[0]}",
+        )
+    except NotImplementedError:
+        # Event loop without subprocess support (Windows selector loop)
+        return await asyncio.to_thread(_run, cmd, cwd=cwd, timeout=timeout)
+
+    communicate = asyncio.ensure_future(proc.communicate())
+
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            asyncio.shield(communicate),
             timeout=timeout,
-            check=False,
         )
 
-        return CommandResult(
-            ok=proc.returncode == 0,
-            stdout=proc.stdout.strip(),
-            stderr=proc.stderr.strip(),
-            exit_code=proc.returncode,
+    except asyncio.TimeoutError:
+        _kill_process_group(proc.pid)
+        stdout, _ = await communicate
+        return CommandResult.failure(
+            stderr="Command timed out",
+            stdout=_decode(stdout).strip(),
         )
 
-    except subprocess.TimeoutExpired as e:
+    except asyncio.CancelledError:
+        _kill_process_group(proc.pid)
+        await communicate
+        raise
+
+    return CommandResult(
+        ok=proc.returncode == 0,
+        stdout=_decode(stdout).strip(),
+        stderr=_decode(stderr).strip(),
+        exit_code=proc.returncode if proc.returncode is not None else -1,
+    )
+
+
+@_traced_async
+async def _run_streaming_async(
+    cmd: Sequence[str],
+    *,
+    cwd: Path,
+    on_line: OutputCallback,
+    timeout: int = 120,
+    tail_lines: int = STREAM_TAIL_LINES,
+) -> CommandResult:
+    """
+    Run a command and report stdout/stderr lines as they arrive.
+
+    Only the last `tail_lines` lines of each stream are kept for the
+    returned CommandResult, so memory stays flat for chatty commands.
+    """
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(cwd),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            **_process_group_kwargs(),
+        )
+    except FileNotFoundError:
+        return CommandResult.failure(
+            stderr=f"Command not found: {cmd[0]}",
+        )
+    except NotImplementedError:
+        return await asyncio.to_thread(
+            _run_streaming_blocking, cmd, cwd, on_line, timeout, tail_lines,
+        )
+
+    tails: dict[StreamName, deque[str]] = {
+        "stdout": deque(maxlen=tail_lines),
+        "stderr": deque(maxlen=tail_lines),
+    }
+
+    async def pump(name: StreamName, reader: asyncio.StreamReader) -> None:
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                return
+            line = _decode(raw).rstrip("\r\n")
+            tails[name].append(line)
+            on_line(name, line)
+
+    assert proc.stdout is not None and proc.stderr is not None
+    tasks = [
+        asyncio.ensure_future(pump("stdout", proc.stdout)),
+        asyncio.ensure_future(pump("stderr", proc.stderr)),
+        asyncio.ensure_future(proc.wait()),
+    ]
+    pumps = asyncio.gather(*tasks)
+
+    try:
+        await asyncio.wait_for(asyncio.shield(pumps), timeout=timeout)
+
+    except asyncio.TimeoutError:
+        _kill_process_group(proc.pid)
+        await pumps
         return CommandResult.failure(
             stderr="Command timed out",
-            stdout=(e.stdout or "").strip(),
+            stdout="\n".join(tails["stdout"]).strip(),
         )
 
+    except BaseException:
+        # Cancelled, or `on_line` raised (e.g. a UI rerun): never leave
+        # the process group running behind the caller's back
+        _kill_process_group(proc.pid)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return CommandResult(
+        ok=proc.returncode == 0,
+        stdout="\n".join(tails["stdout"]).strip(),
+        stderr="\n".join(tails["stderr"]).strip(),
+        exit_code=proc.returncode if proc.returncode is not None else -1,
+    )
+
+
+def _run_streaming(
+    cmd: Sequence[str],
+    *,
+    cwd: Path,
+    on_line: OutputCallback,
+    timeout: int = 120,
+    tail_lines: int = STREAM_TAIL_LINES,
+) -> CommandResult:
+    """
+    Sync facade for `_run_streaming_async`.
+
+    `on_line` is invoked on the calling thread.
+    """
+    return run_sync(
+        _run_streaming_async(
+            cmd,
+            cwd=cwd,
+            on_line=on_line,
+            timeout=timeout,
+            tail_lines=tail_lines,
+        )
+    )
+
+
+def _run_streaming_blocking(
+    cmd: Sequence[str],
+    cwd: Path,
+    on_line: OutputCallback,
+    timeout: int,
+    tail_lines: int,
+) -> CommandResult:
+    """
+    Thread-based fallback for loops without subprocess support.
+
+    stderr is merged into stdout; lines are still delivered live.
+    """
+    try:
+        proc = subprocess.Popen(
+            list(cmd),
+            cwd=str(cwd),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            **_process_group_kwargs(),
+        )
     except FileNotFoundError:
         return CommandResult.failure(
             stderr=f"Command not found: {cmd[0]}",
         )
 
+    timer = threading.Timer(timeout, _kill_process_group, args=(proc.pid,))
+    timer.start()
+    tail: deque[str] = deque(maxlen=tail_lines)
+
+    try:
+        assert proc.stdout is not None
+        for raw in proc.stdout:
+            line = raw.rstrip("\r\n")
+            tail.append(line)
+            on_line("stdout", line)
+        proc.wait()
+    except BaseException:
+        _kill_process_group(proc.pid)
+        proc.wait()
+        raise
+    finally:
+        timed_out = not timer.is_alive()
+        timer.cancel()
+
+    output = "\n".join(tail).strip()
+    if timed_out:
+        return CommandResult.failure(stderr="Command timed out", stdout=output)
+
+    return CommandResult(
+        ok=proc.returncode == 0,
+        stdout=output,
+        stderr="",
+        exit_code=proc.returncode,
+    )
+
+
+async def _spawn_async(
+    cmd: Sequence[str],
+    *,
+    cwd: Path,
+) -> asyncio.subprocess.Process | None:
+    """
+    Start a long-running process with piped stdout (e.g. `docker events`).
+
+    Returns None if the process cannot be started. Callers own the
+    process and must release it with `_terminate_async`.
+    """
+    try:
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=str(cwd),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            **_process_group_kwargs(),
+        )
+    except (FileNotFoundError, NotImplementedError):
+        return None
+
+
+async def _terminate_async(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is None:
+        _kill_process_group(proc.pid)
+    await proc.wait()
+
+
+async def gather_commands(
+    *commands: Awaitable[CommandResult],
+    limit: int | None = None,
+) -> list[CommandResult]:
+    """
+    Await several command coroutines concurrently.
+
+    Results are returned in argument order. `limit` bounds how many
+    processes run at the same time (None = unbounded).
+    """
+    if limit is None:
+        return list(await asyncio.gather(*commands))
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(command: Awaitable[CommandResult]) -> CommandResult:
+        async with semaphore:
+            return await command
+
+    return list(await asyncio.gather(*(bounded(c) for c in commands)))
+
+
+def run_sync(awaitable: Awaitable[T]) -> T:
+    """
+    Run a coroutine to completion from synchronous code.
+
+    Uses a private event loop so it works from Streamlit's script
+    thread as well as from threads that already run a loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        with asyncio.Runner(loop_factory=_new_event_loop) as runner:
+            return runner.run(awaitable)
+
+    # A loop is already running in this thread: hop to a helper thread
+    box: dict[str, Any] = {}
+
+    def worker() -> None:
+        try:
+            box["value"] = run_sync(awaitable)
+        except BaseException as e:  # re-raised in the caller
+            box["error"] = e
+
+    # Copy the context so the helper thread records into the same trace
+    thread = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(worker,),
+        daemon=True,
+    )
+    thread.start()
+    thread.join()
+
+    if "error" in box:
+        raise box["error"]
+    return box["value"]
+
+
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Subprocess-capable event loop.
+
+    bootstrap.setup_asyncio() installs the selector policy on Windows,
+    which cannot spawn subprocesses, so the proactor loop is forced here.
+    """
+    if sys.platform == "win32":
+        return asyncio.ProactorEventLoop()
+    return asyncio.new_event_loop()
+
+
+def _decode(data: bytes | None) -> str:
+    return (data or b"").decode("utf-8", errors="replace")
+
+
+# -------------------------------------------------
+# Compose project identity
+# -------------------------------------------------
+def compose_project_name(project: Path) -> str:
+    """
+    Return the Compose project name Docker uses for this folder.
+
+    Mirrors Compose: COMPOSE_PROJECT_NAME (environment, then the
+    project's .env) wins, otherwise the normalized folder name.
+    """
+    name = os.environ.get("COMPOSE_PROJECT_NAME") or _env_file_value(
+        project / ".env",
+        "COMPOSE_PROJECT_NAME",
+    )
+    if not name:
+        name = project.resolve().name
+
+    return re.sub(r"^[^a-z0-9]+", "", re.sub(r"[^a-z0-9_-]", "", name.lower()))
+
+
+def _env_file_value(path: Path, key: str) -> str | None:
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return None
+
+    for line in lines:
+        k, sep, value = line.partition("=")
+        if sep and k.strip() == key:
+            return value.strip().strip("\"'") or None
+
+    return None
+
 
 # -------------------------------------------------
 # MySQL initialization marker
@@ -100,10 +660,31 @@ def mark_mysql_initialized(project: Path) -> None:
 # -------------------------------------------------
 # Docker Compose commands
 # -------------------------------------------------
-def docker_compose_up(project: Path) -> CommandResult:
+def _compose_up_cmd(build: bool = True) -> list[str]:
+    return [
+        "docker",
+        "compose",
+        "-f",
+        "docker-compose.yml",
+        "up",
+        "-d",
+        *(["--build"] if build else []),
+    ]
+
+
+def docker_compose_up(
+    project: Path,
+    *,
+    build: bool = True,
+    on_output: OutputCallback | None = None,
+) -> CommandResult:
     """
     Build and start the Docker Compose environment.
 
+    With `build=False` images are only built if they do not exist yet.
+    When `on_output` is given, build/start output is streamed to it
+    line by line instead of being buffered until the command exits.
+
     This function does NOT:
     - run migrations
     - inspect container health
@@ -111,21 +692,45 @@ def docker_compose_up(project: Path) -> CommandResult:
 
     It is intentionally narrow in responsibility.
     """
+    if on_output is not None:
+        return _run_streaming(
+            _compose_up_cmd(build),
+            cwd=project,
+            on_line=on_output,
+            timeout=300,
+        )
+
     return _run(
-        [
-            "docker",
-            "compose",
-            "-f",
-            "docker-compose.yml",
-            "up",
-            "-d",
-            "--build",
-        ],
+        _compose_up_cmd(build),
         cwd=project,
         timeout=300,  # builds can be slow
     )
 
 
+async def docker_compose_up_async(
+    project: Path,
+    *,
+    build: bool = True,
+    on_output: OutputCallback | None = None,
+) -> CommandResult:
+    """
+    Async variant of `docker_compose_up`.
+    """
+    if on_output is not None:
+        return await _run_streaming_async(
+            _compose_up_cmd(build),
+            cwd=project,
+            on_line=on_output,
+            timeout=300,
+        )
+
+    return await _run_async(
+        _compose_up_cmd(build),
+        cwd=project,
+        timeout=300,
+    )
+
+
 def docker_compose_down(project: Path) -> CommandResult:
     """
     Stop and remove Docker Compose containers.
@@ -143,3 +748,20 @@ def docker_compose_down(project: Path) -> CommandResult:
         ],
         cwd=project,
     )
+
+
+def docker_compose_restart(project: Path, *services: str) -> CommandResult:
+    """
+    Restart running services (all of them when none are given).
+    """
+    return _run(
+        [
+            "docker",
+            "compose",
+            "-f",
+            "docker-compose.yml",
+            "restart",
+            *services,
+        ],
+        cwd=project,
+    )
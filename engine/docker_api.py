@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import http.client
+import json
+import os
+from pathlib import Path
+import socket
+import struct
+import threading
+import time
+from typing import Any, Iterator, Sequence
+from urllib.parse import quote, urlencode
+
+from engine.docker import CommandResult
+
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+
+# LDM_DOCKER_BACKEND=auto (default: API if reachable) | cli
+BACKEND_ENV = "LDM_DOCKER_BACKEND"
+
+# Seconds before an unreachable daemon is probed again
+_RETRY_AFTER = 30.0
+
+
+class DockerAPIError(RuntimeError):
+    """Raised when the Docker Engine API returns an error or is unreachable."""
+    pass
+
+
+# -------------------------------------------------
+# Transport
+# -------------------------------------------------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """
+    HTTP/1.1 over a Unix domain socket.
+    """
+
+    def __init__(self, socket_path: str, timeout: float | None = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+# -------------------------------------------------
+# Client
+# -------------------------------------------------
+class DockerAPI:
+    """
+    Minimal Docker Engine API client.
+
+    Short requests share one keep-alive connection (guarded by a lock).
+    Streaming endpoints (events, exec) get a dedicated connection.
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, *, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._conn: _UnixHTTPConnection | None = None
+        self._lock = threading.Lock()
+
+    # ---------- plumbing ----------
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        query: dict[str, Any] | None = None,
+        body: Any = None,
+    ) -> Any:
+        url = path + ("?" + urlencode(query) if query else "")
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+
+        with self._lock:
+            for attempt in (1, 2):
+                if self._conn is None:
+                    self._conn = _UnixHTTPConnection(self.socket_path, self.timeout)
+                try:
+                    self._conn.request(method, url, body=payload, headers=headers)
+                    response = self._conn.getresponse()
+                    data = response.read()
+                    break
+                except (http.client.HTTPException, OSError) as e:
+                    # Stale keep-alive connection: reconnect once
+                    self._conn.close()
+                    self._conn = None
+                    if attempt == 2:
+                        raise DockerAPIError(f"Docker API unreachable: {e}") from e
+
+        if response.status >= 400:
+            raise DockerAPIError(_error_message(response.status, data))
+
+        if not data:
+            return None
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return data.decode("utf-8", errors="replace")
+
+    def _open_stream(
+        self,
+        method: str,
+        path: str,
+        *,
+        query: dict[str, Any] | None = None,
+        body: Any = None,
+        timeout: float | None = None,
+    ) -> tuple[_UnixHTTPConnection, http.client.HTTPResponse]:
+        url = path + ("?" + urlencode(query) if query else "")
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+
+        conn = _UnixHTTPConnection(self.socket_path, timeout)
+        try:
+            conn.request(method, url, body=payload, headers=headers)
+            response = conn.getresponse()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            raise DockerAPIError(f"Docker API unreachable: {e}") from e
+
+        if response.status >= 400:
+            data = response.read()
+            conn.close()
+            raise DockerAPIError(_error_message(response.status, data))
+
+        return conn, response
+
+    # ---------- endpoints ----------
+    def ping(self) -> bool:
+        try:
+            return self._request("GET", "/_ping") == "OK"
+        except DockerAPIError:
+            return False
+
+    def info(self) -> dict[str, Any]:
+        return self._request("GET", "/info") or {}
+
+    def list_containers(
+        self,
+        *,
+        labels: dict[str, str] | None = None,
+        all: bool = True,
+    ) -> list[dict[str, Any]]:
+        query: dict[str, Any] = {"all": "1" if all else "0"}
+        if labels:
+            query["filters"] = json.dumps(
+                {"label": [f"{k}={v}" for k, v in labels.items()]}
+            )
+        return self._request("GET", "/containers/json", query=query) or []
+
+    def inspect_container(self, container_id: str) -> dict[str, Any]:
+        return self._request("GET", f"/containers/{quote(container_id)}/json") or {}
+
+    def container_stats(self, container_id: str) -> dict[str, Any]:
+        return self._request(
+            "GET",
+            f"/containers/{quote(container_id)}/stats",
+            query={"stream": "false", "one-shot": "true"},
+        ) or {}
+
+    def inspect_image(self, name: str) -> dict[str, Any]:
+        return self._request("GET", f"/images/{quote(name, safe='')}/json") or {}
+
+    def inspect_volume(self, name: str) -> dict[str, Any]:
+        return self._request("GET", f"/volumes/{quote(name)}") or {}
+
+    def running_container(self, project_name: str, service: str) -> str | None:
+        """
+        Id of a running container for a compose service, if any.
+        """
+        containers = self.list_containers(
+            labels={
+                "com.docker.compose.project": project_name,
+                "com.docker.compose.service": service,
+                "com.docker.compose.oneoff": "False",
+            },
+            all=False,
+        )
+        return containers[0]["Id"] if containers else None
+
+    def events(
+        self,
+        *,
+        filters: dict[str, list[str]] | None = None,
+        timeout: float | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Subscribe to the event stream and yield events as they arrive.
+
+        The subscription is active when this method returns. A read
+        blocking longer than `timeout` raises TimeoutError; closing the
+        iterator closes the connection.
+        """
+        query = {"filters": json.dumps(filters)} if filters else None
+        conn, response = self._open_stream(
+            "GET", "/events", query=query, timeout=timeout,
+        )
+        return _iter_events(conn, response)
+
+    def exec(
+        self,
+        container_id: str,
+        cmd: Sequence[str],
+        *,
+        workdir: str | None = None,
+        timeout: float = 120,
+    ) -> CommandResult:
+        """
+        Run a command in a running container and collect its output.
+
+        This function NEVER raises.
+        """
+        spec: dict[str, Any] = {
+            "AttachStdout": True,
+            "AttachStderr": True,
+            "Tty": False,
+            "Cmd": list(cmd),
+        }
+        if workdir:
+            spec["WorkingDir"] = workdir
+
+        try:
+            created = self._request(
+                "POST",
+                f"/containers/{quote(container_id)}/exec",
+                body=spec,
+            )
+            exec_id = created["Id"]
+
+            conn, response = self._open_stream(
+                "POST",
+                f"/exec/{quote(exec_id)}/start",
+                body={"Detach": False, "Tty": False},
+                timeout=timeout,
+            )
+            try:
+                stdout, stderr = _demux(response)
+            finally:
+                conn.close()
+
+            info = self._request("GET", f"/exec/{quote(exec_id)}/json") or {}
+
+        except TimeoutError:
+            return CommandResult.failure(stderr="Command timed out")
+        except (DockerAPIError, KeyError, TypeError, OSError) as e:
+            return CommandResult.failure(stderr=str(e))
+
+        exit_code = info.get("ExitCode")
+        exit_code = exit_code if isinstance(exit_code, int) else -1
+
+        return CommandResult(
+            ok=exit_code == 0,
+            stdout=stdout.strip(),
+            stderr=stderr.strip(),
+            exit_code=exit_code,
+        )
+
+
+def _iter_events(
+    conn: _UnixHTTPConnection,
+    response: http.client.HTTPResponse,
+) -> Iterator[dict[str, Any]]:
+    try:
+        while True:
+            line = response.readline()
+            if not line:
+                return
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(event, dict):
+                yield event
+    finally:
+        conn.close()
+
+
+def _demux(response: http.client.HTTPResponse) -> tuple[str, str]:
+    """
+    Split Docker's multiplexed stream into stdout / stderr.
+
+    Each frame: 1 byte stream id, 3 padding bytes, 4 byte big-endian size.
+    """
+    out: list[bytes] = []
+    err: list[bytes] = []
+
+    while True:
+        header = response.read(8)
+        if len(header) < 8:
+            break
+        stream, size = header[0], struct.unpack(">I", header[4:])[0]
+        chunk = response.read(size)
+        (err if stream == 2 else out).append(chunk)
+
+    return (
+        b"".join(out).decode("utf-8", errors="replace"),
+        b"".join(err).decode("utf-8", errors="replace"),
+    )
+
+
+def _error_message(status: int, data: bytes) -> str:
+    try:
+        message = json.loads(data).get("message")
+    except (json.JSONDecodeError, AttributeError):
+        message = None
+    return f"Docker API error {status}: {message or data.decode('utf-8', 'replace')}"
+
+
+# -------------------------------------------------
+# Backend selection
+# -------------------------------------------------
+_client: DockerAPI | None = None
+_unavailable_until = 0.0
+_client_lock = threading.Lock()
+
+
+def socket_path_from_env() -> str | None:
+    """
+    Resolve the daemon socket from DOCKER_HOST, if it is a Unix socket.
+    """
+    host = os.environ.get("DOCKER_HOST")
+    if not host:
+        return DEFAULT_SOCKET
+    if host.startswith("unix://"):
+        return host[len("unix://"):]
+    return None  # tcp://, npipe://, ssh:// -> use the CLI
+
+
+def get_docker_api() -> DockerAPI | None:
+    """
+    Return a shared API client, or None when the CLI should be used.
+
+    None is returned when the backend is forced to `cli`, the platform
+    has no Unix sockets, or the daemon does not answer a ping. Negative
+    results are cached briefly so callers can ask on every request.
+    """
+    global _client, _unavailable_until
+
+    backend = os.environ.get(BACKEND_ENV, "auto").lower()
+    if backend == "cli" or not hasattr(socket, "AF_UNIX"):
+        return None
+
+    with _client_lock:
+        if _client is not None:
+            return _client
+        if time.monotonic() < _unavailable_until:
+            return None
+
+        path = socket_path_from_env()
+        if path and Path(path).exists():
+            client = DockerAPI(path)
+            if client.ping():
+                _client = client
+                return client
+            client.close()
+
+        _unavailable_until = time.monotonic() + _RETRY_AFTER
+        return None
+
+
+def reset_docker_api() -> None:
+    """
+    Drop the shared client (e.g. after the daemon restarted).
+    """
+    global _client, _unavailable_until
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _unavailable_until = 0.0
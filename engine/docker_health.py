@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timezone
 import json
 from pathlib import Path
+import re
+import threading
+import time
 from typing import Literal, Any
 
-from engine.docker import _run
+from engine.docker_api import DockerAPI, DockerAPIError, get_docker_api
+from engine.docker import (
+    CommandResult,
+    _run,
+    _run_async,
+    _spawn_async,
+    _terminate_async,
+    compose_project_name,
+)
 
 
 HealthStatus = Literal[
@@ -15,66 +29,626 @@ HealthStatus = Literal[
     "not_found",   # service/container not present yet
 ]
 
+# Seconds a snapshot is served from cache by default
+STATUS_TTL = 2.0
 
-def _extract_container(data: Any) -> Any | None:
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class PublishedPort:
+    host_ip: str
+    host_port: int
+    container_port: int
+    protocol: str = "tcp"
+
+
+@dataclass(frozen=True)
+class ContainerStatus:
+    service: str
+    name: str
+    container_id: str
+    state: str                      # running | exited | restarting | ...
+    health: HealthStatus
+    ports: tuple[PublishedPort, ...] = ()
+    restart_count: int = 0
+    started_at: datetime | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.state == "running"
+
+    @property
+    def uptime(self) -> float | None:
+        """Seconds since the container started, None if not running."""
+        if not self.running or self.started_at is None:
+            return None
+        return (datetime.now(timezone.utc) - self.started_at).total_seconds()
+
+
+@dataclass(frozen=True)
+class EnvironmentStatus:
+    """
+    Every container of one compose project, captured in one pass.
     """
-    Normalize docker compose ps --format json output
-    to a single container representation.
+    project: Path
+    containers: tuple[ContainerStatus, ...]
+    captured_at: float  # time.monotonic()
 
-    Docker may return:
-    - list of dicts
-    - dict keyed by service name
-    - list of strings (container names)
+    @property
+    def services(self) -> list[str]:
+        return sorted({c.service for c in self.containers})
+
+    def service(self, name: str) -> tuple[ContainerStatus, ...]:
+        return tuple(c for c in self.containers if c.service == name)
+
+    def health(self, service: str) -> HealthStatus:
+        """
+        Aggregate health over all running containers of a service.
+
+        The worst state wins, so one unhealthy replica is reported.
+        """
+        running = [c for c in self.service(service) if c.running]
+        if not running:
+            return "not_found"
+
+        states = {c.health for c in running}
+        for status in ("unhealthy", "starting", "none"):
+            if status in states:
+                return status  # type: ignore[return-value]
+        return "healthy"
+
+
+# -------------------------------------------------
+# Snapshot cache
+# -------------------------------------------------
+_cache: dict[Path, EnvironmentStatus] = {}
+_cache_lock = threading.Lock()
+
+
+def invalidate_status_cache(project: Path | None = None) -> None:
     """
-    if isinstance(data, list):
-        return data[0] if data else None
+    Drop cached snapshots (all projects when `project` is None).
 
-    if isinstance(data, dict):
-        return next(iter(data.values()), None)
+    Call after anything that changes container state.
+    """
+    with _cache_lock:
+        if project is None:
+            _cache.clear()
+        else:
+            _cache.pop(project.resolve(), None)
+
+
+def _cached(project: Path, max_age: float) -> EnvironmentStatus | None:
+    with _cache_lock:
+        snapshot = _cache.get(project.resolve())
 
+    if snapshot and time.monotonic() - snapshot.captured_at <= max_age:
+        return snapshot
     return None
 
 
+def _store(snapshot: EnvironmentStatus) -> EnvironmentStatus:
+    with _cache_lock:
+        _cache[snapshot.project.resolve()] = snapshot
+    return snapshot
+
+
+# -------------------------------------------------
+# Queries
+# -------------------------------------------------
+def get_environment_status(
+    project: Path,
+    *,
+    max_age: float = STATUS_TTL,
+) -> EnvironmentStatus:
+    """
+    Return the status of every container in the project.
+
+    Uses the Engine API when the daemon socket is reachable, otherwise
+    one `docker compose ps` plus one `docker inspect` for the whole
+    project, regardless of how many services are queried.
+    Snapshots younger than `max_age` seconds are served from cache.
+
+    This function NEVER raises.
+    """
+    snapshot = _cached(project, max_age)
+    if snapshot is not None:
+        return snapshot
+
+    api = get_docker_api()
+    if api is not None:
+        snapshot = _api_snapshot(api, project)
+        if snapshot is not None:
+            return _store(snapshot)
+
+    entries = _parse_ps(_run(_ps_cmd(), cwd=project))
+    details = _parse_inspect(
+        _run(_inspect_cmd(entries), cwd=project) if entries else None
+    )
+    return _store(_build_snapshot(project, entries, details))
+
+
+async def get_environment_status_async(
+    project: Path,
+    *,
+    max_age: float = STATUS_TTL,
+) -> EnvironmentStatus:
+    """
+    Async variant of `get_environment_status`. NEVER raises.
+    """
+    snapshot = _cached(project, max_age)
+    if snapshot is not None:
+        return snapshot
+
+    api = get_docker_api()
+    if api is not None:
+        snapshot = await asyncio.to_thread(_api_snapshot, api, project)
+        if snapshot is not None:
+            return _store(snapshot)
+
+    entries = _parse_ps(await _run_async(_ps_cmd(), cwd=project))
+    details = _parse_inspect(
+        await _run_async(_inspect_cmd(entries), cwd=project) if entries else None
+    )
+    return _store(_build_snapshot(project, entries, details))
+
+
 def get_service_health(
     project: Path,
     service: str,
+    *,
+    max_age: float = STATUS_TTL,
 ) -> HealthStatus:
     """
     Return the health status of a docker compose service.
 
     This function NEVER raises.
     """
-    result = _run(
-        [
-            "docker",
-            "compose",
-            "ps",
-            "--format",
-            "json",
-            service,
-        ],
-        cwd=project,
-    )
+    return get_environment_status(project, max_age=max_age).health(service)
+
+
+async def get_service_health_async(
+    project: Path,
+    service: str,
+    *,
+    max_age: float = STATUS_TTL,
+) -> HealthStatus:
+    """
+    Async variant of `get_service_health`. NEVER raises.
+    """
+    status = await get_environment_status_async(project, max_age=max_age)
+    return status.health(service)
+
 
+# -------------------------------------------------
+# Parsing
+# -------------------------------------------------
+def _ps_cmd() -> list[str]:
+    return [
+        "docker",
+        "compose",
+        "ps",
+        "--all",
+        "--format",
+        "json",
+    ]
+
+
+def _inspect_cmd(entries: list[dict[str, Any]]) -> list[str]:
+    return [
+        "docker",
+        "inspect",
+        "--format",
+        "json",
+        *(str(e.get("ID", "")) for e in entries),
+    ]
+
+
+def _parse_ps(result: CommandResult) -> list[dict[str, Any]]:
+    """
+    Normalize docker compose ps --format json output to a list.
+
+    Docker may return:
+    - a JSON array of objects (older Compose)
+    - one JSON object per line (Compose >= 2.21)
+    - a dict keyed by service name
+    """
     if not result.ok or not result.stdout:
-        return "not_found"
+        return []
+
+    try:
+        data = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        data = []
+        for line in result.stdout.splitlines():
+            try:
+                data.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    if isinstance(data, dict):
+        data = list(data.values()) if "ID" not in data else [data]
+
+    if not isinstance(data, list):
+        return []
+
+    return [d for d in data if isinstance(d, dict) and d.get("ID")]
+
+
+def _parse_inspect(result: CommandResult | None) -> dict[str, dict[str, Any]]:
+    """
+    Map container id -> inspect data. Missing data is not an error.
+    """
+    if result is None or not result.stdout:
+        return {}
 
     try:
         data = json.loads(result.stdout)
     except json.JSONDecodeError:
-        return "not_found"
+        return {}
+
+    if not isinstance(data, list):
+        return {}
+
+    return {
+        str(d.get("Id", "")): d
+        for d in data
+        if isinstance(d, dict)
+    }
+
+
+def _build_snapshot(
+    project: Path,
+    entries: list[dict[str, Any]],
+    details: dict[str, dict[str, Any]],
+) -> EnvironmentStatus:
+    containers = tuple(
+        _container_status(entry, _match_details(entry, details))
+        for entry in entries
+    )
+    return EnvironmentStatus(
+        project=project,
+        containers=tuple(sorted(containers, key=lambda c: (c.service, c.name))),
+        captured_at=time.monotonic(),
+    )
+
+
+def _match_details(
+    entry: dict[str, Any],
+    details: dict[str, dict[str, Any]],
+) -> dict[str, Any]:
+    short_id = str(entry.get("ID", ""))
+    for full_id, data in details.items():
+        if full_id.startswith(short_id):
+            return data
+    return {}
+
+
+def _container_status(
+    entry: dict[str, Any],
+    details: dict[str, Any],
+) -> ContainerStatus:
+    state = details.get("State") or {}
 
-    container = _extract_container(data)
-    if container is None:
-        return "not_found"
+    return ContainerStatus(
+        service=str(entry.get("Service", "")),
+        name=str(entry.get("Name", "")),
+        container_id=str(entry.get("ID", "")),
+        state=str(entry.get("State", "")).lower() or "unknown",
+        health=_normalize_health(entry.get("Health")),
+        ports=_parse_publishers(entry.get("Publishers")),
+        restart_count=int(details.get("RestartCount") or 0),
+        started_at=_parse_timestamp(state.get("StartedAt")),
+    )
+
+
+def _api_snapshot(api: DockerAPI, project: Path) -> EnvironmentStatus | None:
+    """
+    Build a snapshot from the Engine API. None means: use the CLI.
+    """
+    try:
+        listed = api.list_containers(
+            labels={
+                "com.docker.compose.project": compose_project_name(project),
+                "com.docker.compose.oneoff": "False",
+            },
+        )
+        details = [api.inspect_container(c["Id"]) for c in listed]
+    except (DockerAPIError, KeyError, TypeError):
+        return None
+
+    containers = tuple(_container_from_inspect(d) for d in details if d)
+    return EnvironmentStatus(
+        project=project,
+        containers=tuple(sorted(containers, key=lambda c: (c.service, c.name))),
+        captured_at=time.monotonic(),
+    )
+
+
+def _container_from_inspect(data: dict[str, Any]) -> ContainerStatus:
+    state = data.get("State") or {}
+    labels = (data.get("Config") or {}).get("Labels") or {}
+    health = (state.get("Health") or {}).get("Status")
+
+    return ContainerStatus(
+        service=str(labels.get("com.docker.compose.service", "")),
+        name=str(data.get("Name", "")).lstrip("/"),
+        container_id=str(data.get("Id", ""))[:12],
+        state=str(state.get("Status", "")).lower() or "unknown",
+        health=_normalize_health(health),
+        ports=_parse_port_bindings(
+            (data.get("NetworkSettings") or {}).get("Ports")
+        ),
+        restart_count=int(data.get("RestartCount") or 0),
+        started_at=_parse_timestamp(state.get("StartedAt")),
+    )
+
+
+def _parse_port_bindings(value: Any) -> tuple[PublishedPort, ...]:
+    """
+    Parse inspect's {"3306/tcp": [{"HostIp": ..., "HostPort": ...}]} map.
+    """
+    if not isinstance(value, dict):
+        return ()
+
+    ports: set[PublishedPort] = set()
+    for key, bindings in value.items():
+        container_port, _, protocol = str(key).partition("/")
+        for binding in bindings or []:
+            if not isinstance(binding, dict) or not binding.get("HostPort"):
+                continue
+            ports.add(
+                PublishedPort(
+                    host_ip=str(binding.get("HostIp") or "0.0.0.0"),
+                    host_port=int(binding["HostPort"]),
+                    container_port=int(container_port),
+                    protocol=protocol or "tcp",
+                )
+            )
+
+    return tuple(sorted(ports, key=lambda p: (p.host_port, p.host_ip)))
+
+
+def _normalize_health(value: Any) -> HealthStatus:
+    if value in ("healthy", "unhealthy", "starting"):
+        return value
+    return "none"
+
+
+def _parse_publishers(value: Any) -> tuple[PublishedPort, ...]:
+    if not isinstance(value, list):
+        return ()
+
+    ports: set[PublishedPort] = set()
+    for pub in value:
+        if not isinstance(pub, dict) or not pub.get("PublishedPort"):
+            continue
+        ports.add(
+            PublishedPort(
+                host_ip=str(pub.get("URL") or "0.0.0.0"),
+                host_port=int(pub["PublishedPort"]),
+                container_port=int(pub.get("TargetPort") or 0),
+                protocol=str(pub.get("Protocol") or "tcp"),
+            )
+        )
+
+    return tuple(sorted(ports, key=lambda p: (p.host_port, p.host_ip)))
+
+
+def _parse_timestamp(value: Any) -> datetime | None:
+    """
+    Parse Docker's RFC 3339 timestamps (nanosecond precision).
+    """
+    if not isinstance(value, str) or value.startswith("0001-"):
+        return None
+
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value).replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+# -------------------------------------------------
+# Event stream
+# -------------------------------------------------
+async def watch_service_health(
+    project: Path,
+    service: str,
+    *,
+    deadline: float,
+) -> bool | None:
+    """
+    Wait for a service to become healthy using `docker events`.
+
+    Subscribes once to container events of this compose project and
+    reacts to `health_status` and `die` as they arrive. A `die` that
+    the container's restart policy will recover from is waited out.
+
+    Returns:
+    - True  when the service is healthy (or has no healthcheck)
+    - False when it died for good or `deadline` (time.monotonic) passed
+    - None  when the event stream is unavailable; callers should poll
+
+    This function NEVER raises.
+    """
+    api = get_docker_api()
+    if api is not None:
+        watched = await asyncio.to_thread(
+            _watch_via_api, api, project, service, deadline,
+        )
+        if watched is not None:
+            return watched
+
+    # The CLI may not have subscribed yet when the snapshot below is
+    # taken; --since replays anything emitted from here on, so a
+    # transition in between is not lost.
+    since = time.time()
+    proc = await _spawn_async(
+        _events_cmd(compose_project_name(project), service, since=since),
+        cwd=project,
+    )
+    if proc is None or proc.stdout is None:
+        return None
+
+    try:
+        health = await get_service_health_async(project, service, max_age=0)
+        if health in ("healthy", "none"):
+            return True
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            try:
+                raw = await asyncio.wait_for(proc.stdout.readline(), remaining)
+            except asyncio.TimeoutError:
+                return False
+
+            if not raw:
+                # Stream ended early (daemon unreachable, old CLI...)
+                return None
+
+            event = _parse_event(raw)
+            action = _event_action(event)
+            if action == "health_status: healthy":
+                return True
+            if action == "die":
+                policy = await _run_async(
+                    _restart_policy_cmd(_event_container(event)),
+                    cwd=project,
+                    timeout=10,
+                )
+                if _die_is_final(policy.stdout if policy.ok else "", event):
+                    return False
+
+    finally:
+        await _terminate_async(proc)
+
+
+def _watch_via_api(
+    api: DockerAPI,
+    project: Path,
+    service: str,
+    deadline: float,
+) -> bool | None:
+    filters = {
+        "type": ["container"],
+        "label": [
+            f"com.docker.compose.project={compose_project_name(project)}",
+            f"com.docker.compose.service={service}",
+        ],
+    }
+
+    try:
+        events = api.events(
+            filters=filters,
+            timeout=max(0.1, deadline - time.monotonic()),
+        )
+    except DockerAPIError:
+        return None
+
+    try:
+        if get_service_health(project, service, max_age=0) in ("healthy", "none"):
+            return True
+
+        for event in events:
+            action = _event_action(event)
+            if action == "health_status: healthy":
+                return True
+            if action == "die" and _die_is_final(_api_restart_policy(api, event), event):
+                return False
+            if time.monotonic() >= deadline:
+                return False
+
+        return None  # stream closed by the daemon
+
+    except (TimeoutError, OSError):
+        return False if time.monotonic() >= deadline - 0.1 else None
+
+    finally:
+        events.close()  # type: ignore[attr-defined]
 
-    if isinstance(container, str):
-        return "none"
 
-    if isinstance(container, dict):
-        health = container.get("Health")
-        if health is None:
-            return "none"
-        return health  # healthy | unhealthy | starting
+def _events_cmd(project_name: str, service: str, *, since: float) -> list[str]:
+    return [
+        "docker",
+        "events",
+        "--since",
+        f"{since:.6f}",
+        "--filter",
+        "type=container",
+        "--filter",
+        f"label=com.docker.compose.project={project_name}",
+        "--filter",
+        f"label=com.docker.compose.service={service}",
+        "--format",
+        "{{json .}}",
+    ]
+
+
+def _parse_event(raw: bytes) -> dict[str, Any] | None:
+    try:
+        event = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+    return event if isinstance(event, dict) else None
+
+
+def _event_action(event: dict[str, Any] | None) -> str | None:
+    if event is None:
+        return None
+
+    action = event.get("Action") or event.get("status")
+    return action.strip() if isinstance(action, str) else None
+
+
+def _event_actor(event: dict[str, Any] | None) -> dict[str, Any]:
+    actor = (event or {}).get("Actor")
+    return actor if isinstance(actor, dict) else {}
+
+
+def _event_container(event: dict[str, Any] | None) -> str:
+    return str(_event_actor(event).get("ID") or (event or {}).get("id") or "")
+
+
+# -------------------------------------------------
+# Restart policy
+# -------------------------------------------------
+def _die_is_final(policy: str, event: dict[str, Any] | None) -> bool:
+    """
+    True if Docker will not bring the container back after this `die`.
+
+    An unknown policy counts as "no".
+    """
+    policy = policy.strip()
+    if policy in ("always", "unless-stopped"):
+        return False
+    if policy == "on-failure":
+        attributes = _event_actor(event).get("Attributes") or {}
+        return str(attributes.get("exitCode", "")) == "0"
+    return True
+
+
+def _restart_policy_cmd(container_id: str) -> list[str]:
+    return [
+        "docker",
+        "inspect",
+        "--format",
+        "{{.HostConfig.RestartPolicy.Name}}",
+        container_id,
+    ]
+
+
+def _api_restart_policy(api: DockerAPI, event: dict[str, Any]) -> str:
+    try:
+        details = api.inspect_container(_event_container(event))
+    except DockerAPIError:
+        return ""
 
-    return "not_found"
+    policy = (details.get("HostConfig") or {}).get("RestartPolicy") or {}
+    return str(policy.get("Name") or "")
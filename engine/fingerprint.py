@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+from engine.fs import _atomic_write
+
+
+def hash_files(root: Path, relative_paths: Iterable[str]) -> str:
+    """
+    Content fingerprint over files and directories below `root`.
+
+    Directories contribute every file inside them (recursively).
+    Both names and contents count, so renames change the hash too.
+    Missing paths are recorded as missing rather than skipped.
+    """
+    digest = hashlib.sha256()
+
+    for rel in sorted(set(relative_paths)):
+        base = root / rel
+
+        if base.is_dir():
+            files = sorted(p for p in base.rglob("*") if p.is_file())
+        elif base.is_file():
+            files = [base]
+        else:
+            digest.update(f"missing:{rel}\0".encode("utf-8"))
+            continue
+
+        for path in files:
+            digest.update(path.relative_to(root).as_posix().encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+
+    return digest.hexdigest()
+
+
+def read_stamp(path: Path) -> dict[str, Any] | None:
+    """
+    Read a JSON stamp file. Missing or corrupt stamps read as None.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+
+    return data if isinstance(data, dict) else None
+
+
+def write_stamp(path: Path, data: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(path, json.dumps(data, indent=2, sort_keys=True) + "\n")
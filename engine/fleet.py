@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+import time
+from typing import Callable, Iterable
+
+from engine.docker import run_sync
+from engine.readiness import load_service_specs
+from engine.safety import SafetyContext, SafetyError
+from engine.workflows import (
+    WorkflowResult,
+    start_environment,
+    stop_environment,
+)
+
+
+DEFAULT_MAX_WORKERS = 4
+
+
+# -------------------------------------------------
+# Fleet result
+# -------------------------------------------------
+@dataclass(frozen=True)
+class ProjectRun:
+    project: Path
+    result: WorkflowResult
+    started_at: float   # time.time()
+    duration: float     # seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.result.ok
+
+
+@dataclass(frozen=True)
+class FleetResult:
+    runs: list[ProjectRun]
+    duration: float
+
+    @property
+    def ok(self) -> bool:
+        return all(run.ok for run in self.runs)
+
+    @property
+    def failed(self) -> list[ProjectRun]:
+        return [run for run in self.runs if not run.ok]
+
+
+# -------------------------------------------------
+# Runner
+# -------------------------------------------------
+def run_fleet(
+    projects: Iterable[Path],
+    workflow: Callable[[Path], WorkflowResult],
+    *,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> FleetResult:
+    """
+    Run a workflow for many projects on a bounded worker pool.
+
+    A slow project only occupies its own worker; the others keep going.
+    Runs are returned in input order.
+
+    This function does NOT:
+    - coordinate host ports between projects (see `start_fleet`)
+    - stop on the first failure
+    """
+    projects = list(dict.fromkeys(projects))
+    started = time.monotonic()
+
+    if not projects:
+        return FleetResult(runs=[], duration=0.0)
+
+    runs: dict[Path, ProjectRun] = {}
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(projects))),
+        thread_name_prefix="fleet",
+    ) as pool:
+        futures = {
+            pool.submit(_timed, project, workflow): project
+            for project in projects
+        }
+        for future in as_completed(futures):
+            run = future.result()
+            runs[run.project] = run
+
+    return FleetResult(
+        runs=[runs[p] for p in projects],
+        duration=time.monotonic() - started,
+    )
+
+
+def _timed(
+    project: Path,
+    workflow: Callable[[Path], WorkflowResult],
+) -> ProjectRun:
+    wall_start = time.time()
+    started = time.monotonic()
+
+    try:
+        result = workflow(project)
+    except SafetyError as e:
+        result = WorkflowResult.failure(steps=[], error=str(e))
+    except Exception as e:  # one project must not sink the fleet
+        result = WorkflowResult.failure(
+            steps=[],
+            error=f"Unexpected error: {e}",
+        )
+
+    return ProjectRun(
+        project=project,
+        result=result,
+        started_at=wall_start,
+        duration=time.monotonic() - started,
+    )
+
+
+# -------------------------------------------------
+# Fleet workflows
+# -------------------------------------------------
+def start_fleet(
+    projects: Iterable[Path],
+    *,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    auto_migrate: bool = True,
+    ensure_sail: bool = False,
+) -> FleetResult:
+    """
+    Start several project environments concurrently.
+
+    Host ports are checked up front: a project publishing a port that
+    an earlier project in the list already publishes fails with an
+    error naming both, instead of every `docker compose up` racing for
+    the same ports. Give projects distinct host port slots (see
+    ProjectConfig) to run them side by side.
+    """
+    projects = list(dict.fromkeys(projects))
+    clashes = port_clashes(projects)
+
+    def start(project: Path) -> WorkflowResult:
+        if project in clashes:
+            return WorkflowResult.failure(steps=[], error=clashes[project])
+        return start_environment(
+            project,
+            auto_migrate=auto_migrate,
+            ensure_sail=ensure_sail,
+        )
+
+    return run_fleet(projects, start, max_workers=max_workers)
+
+
+# -------------------------------------------------
+# Host ports
+# -------------------------------------------------
+def published_ports(projects: Iterable[Path]) -> dict[Path, set[int]]:
+    """
+    Host ports each project's compose file publishes.
+
+    Projects whose compose file cannot be resolved publish nothing
+    as far as this check is concerned. NEVER raises.
+    """
+    projects = list(projects)
+
+    async def load() -> list[set[int]]:
+        specs = await asyncio.gather(*(load_service_specs(p) for p in projects))
+        return [
+            {probe.port for spec in (s or {}).values() for probe in spec.probes}
+            for s in specs
+        ]
+
+    return dict(zip(projects, run_sync(load())))
+
+
+def port_clashes(projects: Iterable[Path]) -> dict[Path, str]:
+    """
+    Projects that would publish a host port already taken by an
+    earlier project in the list, with an error message for each.
+    """
+    owners: dict[int, Path] = {}
+    clashes: dict[Path, str] = {}
+
+    for project, ports in published_ports(projects).items():
+        taken = sorted(port for port in ports if port in owners)
+        if taken:
+            clashes[project] = (
+                f"Host port(s) {', '.join(map(str, taken))} already published by "
+                f"{owners[taken[0]].name}; give the projects different host "
+                "port slots and regenerate their Docker files"
+            )
+            continue
+        for port in ports:
+            owners[port] = project
+
+    return clashes
+
+
+def stop_fleet(
+    projects: Iterable[Path],
+    *,
+    confirmed: bool,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> FleetResult:
+    """
+    Stop several project environments concurrently.
+
+    Confirmation is checked per project by the stop workflow.
+    """
+    return run_fleet(
+        projects,
+        lambda project: stop_environment(
+            project,
+            safety=SafetyContext(project=project, confirmed=confirmed),
+        ),
+        max_workers=max_workers,
+    )
@@ -1,27 +1,18 @@
 from pathlib import Path
-from datetime import datetime
+import os
+import stat
+import sys
 import tempfile
 
 
+APP_NAME = "laravel-docker-manager"
+
+
 class MountError(RuntimeError):
     """Raised when an unexpected file/directory is encountered."""
     pass
 
 
-def safe_backup(path: Path) -> Path:
-    """
-    Create a timestamped backup next to the file.
-    Example: docker-compose.yml.bak-20260202-223012
-    """
-    if not path.exists():
-        raise FileNotFoundError(f"Cannot backup missing file: {path}")
-
-    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup = path.with_name(f"{path.name}.bak-{ts}")
-    backup.write_bytes(path.read_bytes())
-    return backup
-
-
 def ensure_file(path: Path, content: str = "") -> None:
     """
     Ensure a file exists.
@@ -49,17 +40,41 @@ def ensure_directory(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
 
-def _atomic_write(path: Path, content: str) -> None:
+def user_cache_dir() -> Path:
+    """
+    Per-user cache directory for this tool (created on demand).
+    - Windows: %LOCALAPPDATA%\\laravel-docker-manager
+    - Others:  $XDG_CACHE_HOME/laravel-docker-manager (~/.cache)
+    """
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        base = Path(os.environ["LOCALAPPDATA"])
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+
+    path = base / APP_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _atomic_write(path: Path, content: str | bytes) -> None:
     """
     Write file content atomically to avoid partial writes.
     """
+    binary = isinstance(content, bytes)
     with tempfile.NamedTemporaryFile(
-        "w",
-        encoding="utf-8",
+        "wb" if binary else "w",
+        encoding=None if binary else "utf-8",
         delete=False,
         dir=str(path.parent),
     ) as tmp:
         tmp.write(content)
         tmp.flush()
 
+    # Temp files are 0600; keep the target's mode (or a normal 0644)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except OSError:
+        mode = 0o644
+    os.chmod(tmp.name, mode)
+
     Path(tmp.name).replace(path)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Literal
+
+from engine.docker import _run
+from engine.docker_api import DockerAPIError, get_docker_api
+
+
+ResourceSource = Literal["docker", "host"]
+
+# Used when neither the daemon nor the OS reports memory
+_FALLBACK_MEMORY = 2 * 1024 ** 3
+
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class HostResources:
+    """
+    CPUs and memory available to containers.
+
+    With Docker Desktop this is the VM, not the machine, which is why
+    the daemon is asked first.
+    """
+    cpus: int
+    memory_bytes: int
+    source: ResourceSource
+
+    @property
+    def memory_mb(self) -> int:
+        return self.memory_bytes // 1024 ** 2
+
+
+# -------------------------------------------------
+# Detection
+# -------------------------------------------------
+_cached: HostResources | None = None
+_cache_lock = threading.Lock()
+
+
+def detect_host_resources(*, refresh: bool = False) -> HostResources:
+    """
+    Resources reported by the Docker daemon, else by this machine.
+
+    Detected once per process. NEVER raises.
+    """
+    global _cached
+
+    with _cache_lock:
+        if _cached is None or refresh:
+            _cached = _from_docker() or _from_host()
+        return _cached
+
+
+def _from_docker() -> HostResources | None:
+    info: Any = None
+
+    api = get_docker_api()
+    if api is not None:
+        try:
+            info = api.info()
+        except DockerAPIError:
+            info = None
+
+    if info is None:
+        result = _run(
+            ["docker", "info", "--format", "{{json .}}"],
+            cwd=Path.cwd(),
+            timeout=15,
+        )
+        if not result.ok:
+            return None
+        try:
+            info = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            return None
+
+    if not isinstance(info, dict):
+        return None
+
+    cpus, memory = info.get("NCPU"), info.get("MemTotal")
+    if not isinstance(cpus, int) or not isinstance(memory, int):
+        return None
+    if cpus <= 0 or memory <= 0:
+        return None
+
+    return HostResources(cpus=cpus, memory_bytes=memory, source="docker")
+
+
+def _from_host() -> HostResources:
+    cpus = os.cpu_count() or 1
+
+    try:
+        memory = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        memory = _windows_memory() or _FALLBACK_MEMORY
+
+    return HostResources(cpus=cpus, memory_bytes=memory, source="host")
+
+
+def _windows_memory() -> int | None:
+    try:
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):  # type: ignore[attr-defined]
+            return int(status.ullTotalPhys)
+    except (AttributeError, OSError, ImportError):
+        pass
+    return None
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
 from dotenv import dotenv_values
 
+from engine.discovery import discover_projects, project_facts
+
 
 DOCKER_ENV_DEFAULTS = {
     "DB_HOST": "mysql",
@@ -14,28 +15,25 @@ DOCKER_ENV_DEFAULTS = {
 
 
 def is_laravel_project(path: Path) -> bool:
-    artisan = path / "artisan"
-    composer = path / "composer.json"
-
-    if not artisan.exists() or not composer.exists():
-        return False
-
-    try:
-        data = json.loads(composer.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
-        return False
-
-    req = data.get("require") or {}
-    return "laravel/framework" in req
+    return project_facts(path).is_laravel
 
 
-def list_laravel_projects(projects_root: Path) -> list[Path]:
+def list_laravel_projects(
+    projects_root: Path,
+    *,
+    max_depth: int = 1,
+) -> list[Path]:
     """
-    Return direct child folders that are Laravel projects.
+    Return folders up to `max_depth` levels deep that are Laravel projects.
+
+    Backed by a persistent discovery index: only folders whose
+    composer.json changed since the last scan are re-parsed.
     """
-    candidates = [p for p in projects_root.iterdir() if p.is_dir()]
-    projects = [p for p in candidates if is_laravel_project(p)]
-    return sorted(projects, key=lambda p: p.name.lower())
+    projects = discover_projects(projects_root, max_depth=max_depth)
+    return sorted(
+        projects,
+        key=lambda p: p.relative_to(projects_root).as_posix().lower(),
+    )
 
 
 def ensure_env_defaults(project_path: Path) -> list[str]:
@@ -43,9 +41,27 @@ def ensure_env_defaults(project_path: Path) -> list[str]:
     Ensure docker-related defaults exist in .env.
     Returns list of keys that were modified or added.
     """
+    content, changed_keys = plan_env_defaults(project_path)
+
+    if content is not None:
+        env_path = project_path / ".env"
+        env_path.write_text(content, encoding="utf-8")
+
+    return changed_keys
+
+
+def plan_env_defaults(project_path: Path) -> tuple[str | None, list[str]]:
+    """
+    Compute the .env content with docker defaults applied.
+
+    Keys are compared by parsed value, so formatting-only differences
+    (quotes, spacing around `=`) are left alone.
+
+    Returns (new content or None when nothing changes, changed keys).
+    """
     env_path = project_path / ".env"
     if not env_path.exists():
-        return []
+        return None, []
 
     raw_lines = env_path.read_text(encoding="utf-8").splitlines()
     existing = dotenv_values(dotenv_path=env_path)
@@ -72,10 +88,11 @@ def ensure_env_defaults(project_path: Path) -> list[str]:
         key = key.strip()
 
         if key in desired:
-            new_line = f"{key}={desired[key]}"
-            if line != new_line:
+            if existing.get(key) == desired[key]:
+                new_lines.append(line)
+            else:
+                new_lines.append(f"{key}={desired[key]}")
                 changed_keys.append(key)
-            new_lines.append(new_line)
             remaining.discard(key)
         else:
             new_lines.append(line)
@@ -87,7 +104,7 @@ def ensure_env_defaults(project_path: Path) -> list[str]:
             new_lines.append(f"{key}={desired[key]}")
             changed_keys.append(key)
 
-    if changed_keys:
-        env_path.write_text("\n".join(new_lines) + "\n", encoding="utf-8")
+    if not changed_keys:
+        return None, []
 
-    return changed_keys
+    return "\n".join(new_lines) + "\n", changed_keys
@@ -1,24 +1,14 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
 from engine.artisan import artisan
-from engine.docker import CommandResult
+from engine.docker import CommandResult, _run
+from engine.discovery import project_facts
 
 
 def sail_installed(project: Path) -> bool:
-    composer = project / "composer.json"
-    if not composer.is_file():
-        return False
-
-    try:
-        data = json.loads(composer.read_text(encoding="utf-8"))
-    except json.JSONDecodeError:
-        return False
-
-    require = data.get("require-dev", {})
-    return "laravel/sail" in require
+    return project_facts(project).has_sail
 
 
 def install_sail(project: Path) -> CommandResult:
@@ -26,16 +16,28 @@ def install_sail(project: Path) -> CommandResult:
     Install Laravel Sail via Composer and run sail:install.
     Assumes containers are running.
     """
-    # 1. Require Sail
-    result = artisan(
-        project,
-        ["require", "laravel/sail", "--dev"],
+    # 1. Require Sail (a Composer command, not an artisan one)
+    result = _run(
+        [
+            "docker",
+            "compose",
+            "exec",
+            "-T",
+            "app",
+            "composer",
+            "require",
+            "laravel/sail",
+            "--dev",
+            "--no-interaction",
+        ],
+        cwd=project,
         timeout=300,
     )
     if not result.ok:
         return result
 
-    # 2. Run Sail installer (no prompt)
+    # 2. Run Sail installer (no prompt) in a fresh process: one booted
+    #    before the require would not know the sail:install command
     return artisan(
         project,
         ["sail:install", "--no-interaction"],
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.docker import _run, compose_project_name
+from engine.docker_api import DockerAPIError, get_docker_api
+from engine.fingerprint import hash_files, read_stamp, write_stamp
+
+
+MIGRATIONS_DIR = "database/migrations"
+
+
+# -------------------------------------------------
+# Fingerprint
+# -------------------------------------------------
+def _stamp_path(project: Path) -> Path:
+    """
+    Lives next to the .docker/mysql_initialized marker.
+    """
+    return project / ".docker" / "migrations.json"
+
+
+def migration_fingerprint(project: Path) -> str:
+    """
+    Hash of migration file names and contents.
+    """
+    return hash_files(project, [MIGRATIONS_DIR])
+
+
+def compose_volume_id(project: Path, volume: str) -> str | None:
+    """
+    Identity of one of the project's named volumes (its creation time).
+
+    A recreated volume gets a new identity even though the name is the
+    same. Returns None if the volume does not exist or Docker is
+    unreachable. NEVER raises.
+    """
+    name = f"{compose_project_name(project)}_{volume}"
+
+    api = get_docker_api()
+    if api is not None:
+        try:
+            created = api.inspect_volume(name).get("CreatedAt")
+            return f"{name}@{created}" if created else None
+        except DockerAPIError:
+            return None
+
+    result = _run(
+        [
+            "docker",
+            "volume",
+            "inspect",
+            "--format",
+            "{{.CreatedAt}}",
+            name,
+        ],
+        cwd=project,
+        timeout=30,
+    )
+    if not result.ok or not result.stdout:
+        return None
+    return f"{name}@{result.stdout}"
+
+
+def mysql_volume_id(project: Path) -> str | None:
+    return compose_volume_id(project, "mysql-data")
+
+
+# -------------------------------------------------
+# Stamp
+# -------------------------------------------------
+def migrations_up_to_date(project: Path) -> bool:
+    """
+    True if the last successful migrate ran against the current
+    migration set on the same database volume.
+
+    Conservative: any missing information means "run migrate".
+    """
+    stamp = read_stamp(_stamp_path(project))
+    if not stamp:
+        return False
+
+    if stamp.get("fingerprint") != migration_fingerprint(project):
+        return False
+
+    volume = mysql_volume_id(project)
+    return volume is not None and stamp.get("volume") == volume
+
+
+def record_migrations(project: Path) -> None:
+    """
+    Remember the migration set after a *successful* migrate.
+    """
+    volume = mysql_volume_id(project)
+    if volume is None:
+        return
+
+    write_stamp(
+        _stamp_path(project),
+        {
+            "fingerprint": migration_fingerprint(project),
+            "volume": volume,
+        },
+    )
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, asdict, fields
+from pathlib import Path
+from typing import Literal, get_args
+
+from engine.fingerprint import read_stamp, write_stamp
+
+
+DbMode = Literal["persistent", "ephemeral"]
+PhpProfile = Literal["dev", "perf", "prod-like"]
+MountStrategy = Literal["bind", "volumes", "watch"]
+
+# Host ports are base + slot; beyond 49 mailpit (8025) meets phpMyAdmin (8080)
+MAX_PORT_SLOT = 49
+
+
+# -------------------------------------------------
+# Generator options per project
+# -------------------------------------------------
+@dataclass(frozen=True)
+class ProjectConfig:
+    """
+    Options the Docker files were generated with.
+
+    Saved in .docker/config.json when the files are generated, so the
+    workflows act on what is actually on disk rather than on whatever
+    the UI currently shows.
+    """
+    db_mode: DbMode = "persistent"
+    mysql_memory_mb: int = 1024   # capped at half the Docker host memory
+    php_profile: PhpProfile = "dev"
+    mount_strategy: MountStrategy = "bind"
+    port_slot: int = 0            # shifts every published host port
+
+    @property
+    def ephemeral_db(self) -> bool:
+        return self.db_mode == "ephemeral"
+
+    @property
+    def preloads(self) -> bool:
+        return self.php_profile == "prod-like"
+
+    @property
+    def vendor_in_volume(self) -> bool:
+        return self.mount_strategy == "volumes"
+
+    @property
+    def watch(self) -> bool:
+        return self.mount_strategy == "watch"
+
+
+_CHOICES: dict[str, tuple[str, ...]] = {
+    "db_mode": get_args(DbMode),
+    "php_profile": get_args(PhpProfile),
+    "mount_strategy": get_args(MountStrategy),
+}
+
+_MINIMUMS: dict[str, int] = {
+    "mysql_memory_mb": 256,
+    "port_slot": 0,
+}
+
+_MAXIMUMS: dict[str, int] = {
+    "port_slot": MAX_PORT_SLOT,
+}
+
+
+def _config_path(project: Path) -> Path:
+    return project / ".docker" / "config.json"
+
+
+def load_project_config(project: Path) -> ProjectConfig:
+    """
+    Saved config, with defaults for anything missing or invalid.
+    """
+    stamp = read_stamp(_config_path(project)) or {}
+    defaults = ProjectConfig()
+    values = {}
+
+    for f in fields(ProjectConfig):
+        value = stamp.get(f.name, getattr(defaults, f.name))
+        if not _valid(f.name, value, getattr(defaults, f.name)):
+            value = getattr(defaults, f.name)
+        values[f.name] = value
+
+    return ProjectConfig(**values)
+
+
+def _valid(name: str, value: object, default: object) -> bool:
+    if name in _CHOICES:
+        return value in _CHOICES[name]
+    if type(value) is not type(default):
+        return False
+    if name in _MINIMUMS and value < _MINIMUMS[name]:  # type: ignore[operator]
+        return False
+    return name not in _MAXIMUMS or value <= _MAXIMUMS[name]  # type: ignore[operator]
+
+
+def save_project_config(project: Path, config: ProjectConfig) -> bool:
+    """
+    Persist the config. Returns False when it was already up to date.
+    """
+    if read_stamp(_config_path(project)) == asdict(config):
+        return False
+
+    write_stamp(_config_path(project), asdict(config))
+    return True
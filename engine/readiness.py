@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import json
+from pathlib import Path
+import time
+from typing import Any, Awaitable, Callable, Iterable, Literal, Mapping
+
+from engine.docker import _run_async, run_sync
+from engine.docker_health import get_environment_status_async
+from engine.tracing import span
+
+
+ProbeKind = Literal["mysql", "http", "tcp"]
+
+# Container ports probed with a protocol-level check; others get TCP
+_PROBE_BY_TARGET: dict[int, ProbeKind] = {
+    3306: "mysql",
+    80: "http",
+}
+
+# An HTTP gateway error means nginx is up but its upstream is not
+_NOT_READY_STATUS = frozenset({502, 503, 504})
+
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 1.0
+CONNECT_TIMEOUT = 1.0
+
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Probe:
+    kind: ProbeKind
+    port: int                # published host port
+    host: str = "127.0.0.1"
+
+
+@dataclass(frozen=True)
+class ServiceSpec:
+    """
+    What readiness needs to know about one compose service.
+    """
+    name: str
+    depends_on: tuple[str, ...] = ()
+    probes: tuple[Probe, ...] = ()   # empty: fall back to container status
+
+
+@dataclass(frozen=True)
+class ServiceReadiness:
+    service: str
+    ready: bool
+    elapsed: float          # seconds until ready (or until giving up)
+    detail: str = ""
+
+
+@dataclass(frozen=True)
+class ReadinessReport:
+    services: dict[str, ServiceReadiness] = field(default_factory=dict)
+    duration: float = 0.0
+    resolved: bool = True    # False: the service graph could not be loaded
+
+    @property
+    def ok(self) -> bool:
+        return all(s.ready for s in self.services.values())
+
+    @property
+    def not_ready(self) -> list[ServiceReadiness]:
+        return [s for s in self.services.values() if not s.ready]
+
+
+# -------------------------------------------------
+# Probes (pure network; testable against local listeners)
+# -------------------------------------------------
+async def probe_tcp(host: str, port: int, *, timeout: float = CONNECT_TIMEOUT) -> str | None:
+    """
+    None when a TCP connection is accepted, otherwise why not.
+    """
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        return f"connect failed: {e or 'timeout'}"
+
+    writer.close()
+    await _closed(writer)
+    return None
+
+
+async def probe_mysql(host: str, port: int, *, timeout: float = CONNECT_TIMEOUT) -> str | None:
+    """
+    None once the server sends a protocol v10 handshake.
+
+    Docker publishes the port before mysqld listens, so a bare TCP
+    connect succeeds too early; the initial handshake packet does not.
+    Packet layout: 3 byte length, 1 byte sequence, 1 byte protocol.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        return f"connect failed: {e or 'timeout'}"
+
+    try:
+        header = await asyncio.wait_for(reader.readexactly(5), timeout)
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return "no handshake"
+    finally:
+        writer.close()
+        await _closed(writer)
+
+    if header[4] != 0x0A:
+        return f"unexpected handshake byte 0x{header[4]:02x}"
+    return None
+
+
+async def probe_http(
+    host: str,
+    port: int,
+    *,
+    path: str = "/",
+    timeout: float = CONNECT_TIMEOUT * 3,
+) -> str | None:
+    """
+    None when the server answers with a non-gateway status.
+
+    Any application status (including 500) means the request went all
+    the way through; 502/503/504 mean the upstream is not there yet.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        return f"connect failed: {e or 'timeout'}"
+
+    try:
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        return f"no response: {e or 'timeout'}"
+    finally:
+        writer.close()
+        await _closed(writer)
+
+    parts = status_line.decode("latin-1").split()
+    if len(parts) < 2 or not parts[1].isdigit():
+        return "malformed HTTP response"
+
+    status = int(parts[1])
+    return f"HTTP {status}" if status in _NOT_READY_STATUS else None
+
+
+async def _closed(writer: asyncio.StreamWriter) -> None:
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+# -------------------------------------------------
+# Service graph
+# -------------------------------------------------
+async def load_service_specs(project: Path) -> dict[str, ServiceSpec] | None:
+    """
+    Services, dependencies and probes from `docker compose config`.
+
+    Returns None if the compose file cannot be resolved. NEVER raises.
+    """
+    result = await _run_async(
+        ["docker", "compose", "config", "--format", "json"],
+        cwd=project,
+        timeout=30,
+    )
+    if not result.ok:
+        return None
+
+    try:
+        config = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return None
+
+    return parse_service_specs(config)
+
+
+def parse_service_specs(config: Any) -> dict[str, ServiceSpec] | None:
+    services = config.get("services") if isinstance(config, dict) else None
+    if not isinstance(services, dict):
+        return None
+
+    specs: dict[str, ServiceSpec] = {}
+    for name, service in services.items():
+        if not isinstance(service, dict):
+            continue
+
+        depends = service.get("depends_on") or {}
+        specs[name] = ServiceSpec(
+            name=name,
+            depends_on=tuple(sorted(depends)),   # dict (long form) or list
+            probes=tuple(_probes(service.get("ports") or [])),
+        )
+    return specs
+
+
+def _probes(ports: list[Any]) -> list[Probe]:
+    probes: list[Probe] = []
+    for port in ports:
+        if not isinstance(port, dict) or port.get("protocol", "tcp") != "tcp":
+            continue
+        try:
+            target = int(port["target"])
+            published = int(port["published"])
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        host = port.get("host_ip") or "127.0.0.1"
+        if host in ("0.0.0.0", "::"):
+            host = "127.0.0.1"
+        probes.append(Probe(_PROBE_BY_TARGET.get(target, "tcp"), published, host))
+    return probes
+
+
+def _closure(specs: Mapping[str, ServiceSpec], services: Iterable[str]) -> list[str]:
+    """
+    The requested services plus everything they depend on.
+    """
+    seen: list[str] = []
+    stack = list(services)
+    while stack:
+        name = stack.pop()
+        if name in seen or name not in specs:
+            continue
+        seen.append(name)
+        stack.extend(specs[name].depends_on)
+    return seen
+
+
+# -------------------------------------------------
+# Waiting
+# -------------------------------------------------
+async def wait_until_ready_async(
+    project: Path,
+    services: Iterable[str] | None = None,
+    *,
+    timeout: float = 60,
+    specs: Mapping[str, ServiceSpec] | None = None,
+    on_ready: Callable[[ServiceReadiness], None] | None = None,
+) -> ReadinessReport:
+    """
+    Probe services concurrently until each is ready or `timeout` passes.
+
+    - `services` defaults to all; their dependencies are always included
+    - A service counts as ready when all of its own probes pass and its
+      dependencies are ready, so callers continue as soon as the part
+      of the graph they need is up
+    - Services without published ports fall back to container status
+      (running, and healthy if a healthcheck is defined)
+    - `specs` skips `docker compose config` (e.g. for tests)
+    - `on_ready` is called as each service finishes, in completion order
+    """
+    started = time.monotonic()
+    deadline = started + timeout
+    services = list(services) if services is not None else None
+
+    if specs is None:
+        specs = await load_service_specs(project)
+    if specs is None:
+        return ReadinessReport(
+            services={
+                name: ServiceReadiness(name, False, 0.0, "compose config unavailable")
+                for name in (services or [])
+            },
+            resolved=False,
+        )
+
+    names = _closure(specs, services if services is not None else specs)
+    missing = [n for n in (services or []) if n not in specs]
+
+    done = {name: asyncio.Event() for name in names}
+    results: dict[str, ServiceReadiness] = {
+        name: ServiceReadiness(name, False, 0.0, "unknown service") for name in missing
+    }
+
+    async def track(spec: ServiceSpec) -> None:
+        with span(f"ready {spec.name}", "wait", probes=[p.kind for p in spec.probes]) as attrs:
+            detail = await _poll(project, spec, deadline)
+            if detail is None:
+                for dep in spec.depends_on:
+                    if dep not in done:
+                        continue
+                    await done[dep].wait()  # every tracker finishes by the deadline
+                    if not results[dep].ready:
+                        detail = f"dependency '{dep}' not ready"
+                        break
+            attrs["ready"] = detail is None
+
+        readiness = ServiceReadiness(
+            service=spec.name,
+            ready=detail is None,
+            elapsed=time.monotonic() - started,
+            detail=detail or "",
+        )
+        results[spec.name] = readiness
+        done[spec.name].set()
+        if on_ready is not None:
+            on_ready(readiness)
+
+    await asyncio.gather(*(track(specs[name]) for name in names))
+
+    return ReadinessReport(
+        services={name: results[name] for name in [*names, *missing]},
+        duration=time.monotonic() - started,
+    )
+
+
+def wait_until_ready(
+    project: Path,
+    services: Iterable[str] | None = None,
+    *,
+    timeout: float = 60,
+    specs: Mapping[str, ServiceSpec] | None = None,
+    on_ready: Callable[[ServiceReadiness], None] | None = None,
+) -> ReadinessReport:
+    """
+    Blocking variant of `wait_until_ready_async`.
+    """
+    services = list(services) if services is not None else None
+
+    with span("readiness", "wait", services=services) as attrs:
+        report = run_sync(
+            wait_until_ready_async(
+                project,
+                services,
+                timeout=timeout,
+                specs=specs,
+                on_ready=on_ready,
+            )
+        )
+        attrs["ready"] = report.resolved and report.ok
+    return report
+
+
+async def _poll(project: Path, spec: ServiceSpec, deadline: float) -> str | None:
+    """
+    Repeat a service's probes until all pass. None when ready,
+    otherwise the last failure.
+    """
+    interval = MIN_INTERVAL
+    detail: str | None = "not probed"
+
+    while True:
+        detail = await _probe_service(project, spec)
+        if detail is None:
+            return None
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return detail
+
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * 2, MAX_INTERVAL)
+
+
+async def _probe_service(project: Path, spec: ServiceSpec) -> str | None:
+    if not spec.probes:
+        status = await get_environment_status_async(project, max_age=MIN_INTERVAL)
+        health = status.health(spec.name)
+        return None if health in ("healthy", "none") else f"container {health}"
+
+    checks: list[Awaitable[str | None]] = []
+    for probe in spec.probes:
+        if probe.kind == "mysql":
+            checks.append(probe_mysql(probe.host, probe.port))
+        elif probe.kind == "http":
+            checks.append(probe_http(probe.host, probe.port))
+        else:
+            checks.append(probe_tcp(probe.host, probe.port))
+
+    failures = [d for d in await asyncio.gather(*checks) if d is not None]
+    return failures[0] if failures else None
+
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.fingerprint import hash_files, read_stamp, write_stamp
+
+
+# Config files bind-mounted one by one (read only) into running
+# services. Regenerating them writes a new file (atomic rename), so the
+# container keeps the old inode until it is restarted.
+RUNTIME_CONFIGS: dict[str, tuple[str, ...]] = {
+    "app": ("docker/php/www.conf",),
+    "nginx": ("docker/nginx/nginx.conf", "docker/nginx/default.conf"),
+    "mysql": ("docker/mysql/my.cnf",),
+}
+
+
+def _stamp_path(project: Path) -> Path:
+    return project / ".docker" / "runtime-config.json"
+
+
+def runtime_fingerprints(project: Path) -> dict[str, str]:
+    return {
+        service: hash_files(project, files)
+        for service, files in RUNTIME_CONFIGS.items()
+    }
+
+
+def stale_services(project: Path) -> list[str]:
+    """
+    Services whose mounted config changed since the last recorded start.
+
+    Without a stamp every service counts as stale: a restart is cheap,
+    serving an outdated config is not.
+    """
+    stamp = read_stamp(_stamp_path(project)) or {}
+    return [
+        service
+        for service, fingerprint in runtime_fingerprints(project).items()
+        if stamp.get(service) != fingerprint
+    ]
+
+
+def record_runtime_config(project: Path) -> None:
+    """
+    Remember the mounted configs after the services picked them up.
+    """
+    write_stamp(_stamp_path(project), runtime_fingerprints(project))
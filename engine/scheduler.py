@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import contextvars
+from dataclasses import dataclass, field
+import time
+from typing import Callable, Iterable, Optional
+
+from engine.docker import CommandResult
+from engine.tracing import span
+
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class StepGraphError(ValueError):
+    """Raised for duplicate step names or dependency cycles."""
+    pass
+
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class StepOutcome:
+    """
+    What a step reports back: messages for the workflow log, and on
+    failure the error plus the command result that explains it.
+    """
+    ok: bool
+    messages: tuple[str, ...] = ()
+    error: Optional[str] = None
+    result: Optional[CommandResult] = None
+
+    @classmethod
+    def success(cls, *messages: str, result: Optional[CommandResult] = None) -> "StepOutcome":
+        return cls(ok=True, messages=messages, result=result)
+
+    @classmethod
+    def failure(
+        cls,
+        error: str,
+        *,
+        result: Optional[CommandResult] = None,
+        messages: Iterable[str] = (),
+    ) -> "StepOutcome":
+        return cls(ok=False, messages=tuple(messages), error=error, result=result)
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    One node of a workflow graph.
+
+    `after` names steps that must succeed first. Names that are not in
+    the graph are ignored, so optional steps can simply be left out.
+    """
+    name: str
+    run: Callable[[], StepOutcome]
+    after: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class StepTiming:
+    name: str
+    start: float   # seconds since the workflow started
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass(frozen=True)
+class StepRun:
+    step: str
+    outcome: StepOutcome
+    timing: StepTiming
+
+
+@dataclass(frozen=True)
+class ScheduleResult:
+    runs: list[StepRun] = field(default_factory=list)   # in graph order
+    skipped: list[str] = field(default_factory=list)    # blocked by a failure
+
+    @property
+    def ok(self) -> bool:
+        return not self.skipped and all(run.outcome.ok for run in self.runs)
+
+    @property
+    def failed(self) -> Optional[StepRun]:
+        """The first step that failed, by start time."""
+        failures = [run for run in self.runs if not run.outcome.ok]
+        return min(failures, key=lambda r: r.timing.start) if failures else None
+
+    @property
+    def messages(self) -> list[str]:
+        return [m for run in self.runs for m in run.outcome.messages]
+
+    @property
+    def timings(self) -> list[StepTiming]:
+        return [run.timing for run in self.runs]
+
+
+# -------------------------------------------------
+# Scheduler
+# -------------------------------------------------
+def run_steps(
+    steps: Iterable[Step],
+    *,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> ScheduleResult:
+    """
+    Run a step graph, starting every step as soon as its dependencies
+    succeeded, with at most `max_concurrency` steps at a time (at
+    least one).
+
+    After a failure no new steps start; running ones finish and
+    everything still waiting is reported as skipped. A step raising
+    an exception counts as a failure of that step.
+
+    Results are returned in the order the steps were given, which
+    keeps workflow logs stable however the steps interleaved.
+    """
+    graph = _validate(list(steps))
+    max_concurrency = max(1, max_concurrency)
+    order = [step.name for step in graph]
+    known = set(order)
+    pending = {step.name: step for step in graph}
+
+    started = time.monotonic()
+    runs: dict[str, StepRun] = {}
+    running: dict[Future[StepRun], str] = {}
+    failed = False
+
+    with ThreadPoolExecutor(
+        max_workers=max_concurrency,
+        thread_name_prefix="step",
+    ) as pool:
+        while True:
+            if not failed:
+                for name in [n for n in order if n in pending]:
+                    if len(running) >= max_concurrency:
+                        break
+                    step = pending[name]
+                    if all(dep in runs for dep in step.after if dep in known):
+                        del pending[name]
+                        # One context copy per step: spans nest under the caller's
+                        ctx = contextvars.copy_context()
+                        running[pool.submit(ctx.run, _timed, step, started)] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                run = future.result()
+                del running[future]
+                runs[run.step] = run
+                failed = failed or not run.outcome.ok
+
+    return ScheduleResult(
+        runs=[runs[name] for name in order if name in runs],
+        skipped=[name for name in order if name in pending],
+    )
+
+
+def _timed(step: Step, started: float) -> StepRun:
+    begin = time.monotonic() - started
+    with span(step.name, "step") as attrs:
+        try:
+            outcome = step.run()
+        except Exception as e:  # a crashing step must not hang the graph
+            outcome = StepOutcome.failure(f"Step '{step.name}' crashed: {e}")
+        attrs["ok"] = outcome.ok
+    end = time.monotonic() - started
+
+    return StepRun(
+        step=step.name,
+        outcome=outcome,
+        timing=StepTiming(step.name, begin, end),
+    )
+
+
+def _validate(steps: list[Step]) -> list[Step]:
+    names = [step.name for step in steps]
+    if len(names) != len(set(names)):
+        raise StepGraphError(f"Duplicate step names: {names}")
+
+    known = set(names)
+    visiting: set[str] = set()
+    visited: set[str] = set()
+    by_name = {step.name: step for step in steps}
+
+    def visit(name: str) -> None:
+        if name in visited:
+            return
+        if name in visiting:
+            raise StepGraphError(f"Dependency cycle through '{name}'")
+        visiting.add(name)
+        for dep in by_name[name].after:
+            if dep in known:
+                visit(dep)
+        visiting.discard(name)
+        visited.add(name)
+
+    for name in names:
+        visit(name)
+    return steps
@@ -1,14 +1,89 @@
-def docker_compose_yml(project_name: str) -> str:
+import hashlib
+
+
+# Published host ports for port slot 0
+HOST_PORTS = {
+    "http": 80,
+    "phpmyadmin": 8080,
+    "mysql": 3306,
+    "mailpit": 8025,
+    "smtp": 1025,
+}
+
+
+def host_ports(port_slot: int = 0) -> dict[str, int]:
+    return {name: port + port_slot for name, port in HOST_PORTS.items()}
+
+
+def docker_compose_yml(
+    project_name: str,
+    *,
+    db_mode: str = "persistent",
+    mount_strategy: str = "bind",
+    port_slot: int = 0,
+) -> str:
+    """
+    `port_slot` shifts every published host port (80 -> 80 + slot,
+    3306 -> 3306 + slot, ...) so several projects can run side by side.
+
+    `db_mode="ephemeral"` keeps MySQL data on tmpfs (lost on restart).
+
+    `mount_strategy="volumes"` keeps the source bind-mounted but moves
+    vendor/ and node_modules/ onto named volumes and the framework
+    cache, views and sessions onto tmpfs, so hot paths never cross the
+    host/VM file sharing boundary. nginx then only sees public/.
+
+    `mount_strategy="watch"` bakes the source into the image
+    (Dockerfile.watch) and lets `docker compose watch` sync changes
+    into the container; nothing but config files is bind-mounted.
+    """
+    ports = host_ports(port_slot)
+    volumes = ["mysql-data"] if db_mode == "persistent" else []
+    dockerfile = "docker/php/Dockerfile"
+    develop = ""
+
+    framework_tmpfs = """    tmpfs:
+      - /var/www/html/storage/framework/cache:mode=1777
+      - /var/www/html/storage/framework/views:mode=1777
+      - /var/www/html/storage/framework/sessions:mode=1777
+"""
+
+    if mount_strategy == "watch":
+        dockerfile = "docker/php/Dockerfile.watch"
+        app_mounts = """      - ./docker/php/www.conf:/usr/local/etc/php-fpm.d/zz-www.conf:ro
+""" + framework_tmpfs
+        nginx_mounts = """      - ./public:/var/www/html/public:ro
+"""
+        develop = _develop_watch()
+    elif mount_strategy == "volumes":
+        volumes += ["vendor", "node_modules"]
+        app_mounts = """      - ./:/var/www/html
+      - vendor:/var/www/html/vendor
+      - node_modules:/var/www/html/node_modules
+      - ./docker/php/www.conf:/usr/local/etc/php-fpm.d/zz-www.conf:ro
+""" + framework_tmpfs
+        nginx_mounts = """      - ./public:/var/www/html/public:ro
+"""
+    else:
+        app_mounts = """      - ./:/var/www/html
+      - ./docker/php/www.conf:/usr/local/etc/php-fpm.d/zz-www.conf:ro
+"""
+        nginx_mounts = """      - ./:/var/www/html
+"""
+
     return f"""
 services:
   app:
     build:
       context: .
-      dockerfile: docker/php/Dockerfile
+      dockerfile: {dockerfile}
+      args:
+        PHP_BASE_IMAGE: {php_base_image_tag()}
     working_dir: /var/www/html
     volumes:
-      - ./:/var/www/html
-    depends_on:
+{app_mounts}    cap_add:
+      - SYS_PTRACE  # php-fpm slowlog traces workers
+{develop}    depends_on:
       mysql:
         condition: service_healthy
     networks:
@@ -17,9 +92,9 @@ services:
   nginx:
     image: nginx:1.27-alpine
     ports:
-      - "80:80"
+      - "{ports['http']}:80"
     volumes:
-      - ./:/var/www/html
+{nginx_mounts}      - ./docker/nginx/nginx.conf:/etc/nginx/nginx.conf:ro
       - ./docker/nginx/default.conf:/etc/nginx/conf.d/default.conf:ro
     depends_on:
       app:
@@ -27,27 +102,7 @@ services:
     networks:
       - laravel
 
-  mysql:
-    image: mysql:8.0
-    environment:
-      MYSQL_DATABASE: laravel
-      MYSQL_USER: laravel
-      MYSQL_PASSWORD: secret
-      MYSQL_ROOT_PASSWORD: secret
-    ports:
-      - "3306:3306"
-    volumes:
-      - mysql-data:/var/lib/mysql
-    healthcheck:
-      # First-run safe, credential-aware healthcheck
-      test: ["CMD-SHELL", "mysqladmin ping -h 127.0.0.1 -uroot -p$MYSQL_ROOT_PASSWORD || exit 1"]
-      interval: 5s
-      timeout: 5s
-      retries: 20
-      start_period: 60s
-    networks:
-      - laravel
-
+{_mysql_service(db_mode, ports['mysql'])}
   phpmyadmin:
     image: phpmyadmin:5
     environment:
@@ -56,7 +111,7 @@ services:
       PMA_USER: laravel
       PMA_PASSWORD: secret
     ports:
-      - "8080:80"
+      - "{ports['phpmyadmin']}:80"
     depends_on:
       mysql:
         condition: service_healthy
@@ -66,52 +121,303 @@ services:
   mailpit:
     image: axllent/mailpit:latest
     ports:
-      - "8025:8025"
-      - "1025:1025"
+      - "{ports['mailpit']}:8025"
+      - "{ports['smtp']}:1025"
     networks:
       - laravel
 
-volumes:
-  mysql-data:
-
-networks:
+{_top_level_volumes(volumes)}networks:
   laravel:
     driver: bridge
 """
 
 
-def nginx_default_conf() -> str:
-    return r"""server {
+# Source folders synced into the container in watch mode
+WATCH_SYNC_PATHS = ("app", "bootstrap", "config", "database", "public", "resources", "routes")
+
+# Files whose change needs a new image (dependencies are baked in)
+WATCH_REBUILD_PATHS = ("composer.json", "composer.lock")
+
+
+def _develop_watch() -> str:
+    rules = [
+        f"""        - action: sync
+          path: ./{path}
+          target: /var/www/html/{path}
+"""
+        + (
+            # Caches are generated inside the container
+            """          ignore:
+            - cache/
+"""
+            if path == "bootstrap"
+            else ""
+        )
+        for path in WATCH_SYNC_PATHS
+    ]
+    rules.append("""        - action: sync+restart
+          path: ./.env
+          target: /var/www/html/.env
+""")
+    rules += [
+        f"""        - action: rebuild
+          path: ./{path}
+"""
+        for path in WATCH_REBUILD_PATHS
+    ]
+    return "    develop:\n      watch:\n" + "".join(rules)
+
+
+def _mysql_service(db_mode: str, host_port: int = 3306) -> str:
+    if db_mode == "ephemeral":
+        # Throwaway data on tmpfs: durability traded for speed
+        return f"""  mysql:
+    image: mysql:8.0
+    command:
+      - --innodb-flush-log-at-trx-commit=0
+      - --innodb-doublewrite=OFF
+      - --skip-log-bin
+    environment:
+      MYSQL_DATABASE: laravel
+      MYSQL_USER: laravel
+      MYSQL_PASSWORD: secret
+      MYSQL_ROOT_PASSWORD: secret
+    ports:
+      - "{host_port}:3306"
+    volumes:
+      - ./docker/mysql/my.cnf:/etc/mysql/conf.d/zz-ldm.cnf:ro
+    tmpfs:
+      - /var/lib/mysql
+    healthcheck:
+      # tmpfs init takes seconds: poll fast instead of waiting out start_period
+      test: ["CMD-SHELL", "mysqladmin ping -h 127.0.0.1 -uroot -p$MYSQL_ROOT_PASSWORD || exit 1"]
+      interval: 1s
+      timeout: 2s
+      retries: 60
+      start_period: 5s
+    networks:
+      - laravel
+"""
+
+    return f"""  mysql:
+    image: mysql:8.0
+    environment:
+      MYSQL_DATABASE: laravel
+      MYSQL_USER: laravel
+      MYSQL_PASSWORD: secret
+      MYSQL_ROOT_PASSWORD: secret
+    ports:
+      - "{host_port}:3306"
+    volumes:
+      - mysql-data:/var/lib/mysql
+      - ./docker/mysql/my.cnf:/etc/mysql/conf.d/zz-ldm.cnf:ro
+    healthcheck:
+      # First-run safe, credential-aware healthcheck. `compose up` waits
+      # on it (app depends on service_healthy), so poll often: a healthy
+      # result ends the start period early, the interval is pure delay.
+      test: ["CMD-SHELL", "mysqladmin ping -h 127.0.0.1 -uroot -p$MYSQL_ROOT_PASSWORD || exit 1"]
+      interval: 2s
+      timeout: 5s
+      retries: 50
+      start_period: 60s
+    networks:
+      - laravel
+"""
+
+
+def _top_level_volumes(names: list[str]) -> str:
+    if not names:
+        return ""
+    return "volumes:\n" + "".join(f"  {name}:\n" for name in names) + "\n"
+
+
+def mysql_cnf(*, cpus: int, memory_bytes: int, budget_mb: int) -> str:
+    """
+    MySQL server settings sized for the Docker host and a memory budget.
+
+    The budget is capped at half of what the host reports. Roughly 60%
+    goes to the InnoDB buffer pool; the rest covers per-connection
+    buffers and in-memory temporary tables.
+    """
+    mib = 1024 ** 2
+    budget = max(256 * mib, min(budget_mb * mib, memory_bytes // 2))
+
+    # The pool must be a multiple of 128M chunks x instances
+    share = int(budget * 0.6)
+    instances = max(1, min(8, cpus, share // 1024 ** 3))
+    unit = 128 * mib * instances
+    pool = max(unit, share // unit * unit)
+
+    # innodb_log_file_size x 2 files, as one redo capacity (MySQL >= 8.0.30)
+    redo = min(2048 * mib, max(96 * mib, pool // 2)) // mib * mib
+    tmp_table = min(256 * mib, max(16 * mib, budget // 32)) // mib * mib
+
+    # ~3M of sort/join/read buffers and thread stack per connection
+    by_memory = (budget - pool) // (3 * mib)
+    connections = max(50, min(500, cpus * 50, by_memory))
+
+    requested = "" if budget == budget_mb * mib else f" (requested {budget_mb}M)"
+
+    return f"""# Generated for {cpus} CPUs / {memory_bytes // mib}M, budget {budget // mib}M{requested}
+[mysqld]
+innodb_buffer_pool_size={pool // mib}M
+innodb_buffer_pool_instances={instances}
+innodb_redo_log_capacity={redo // mib}M
+innodb_log_buffer_size=16M
+
+max_connections={connections}
+tmp_table_size={tmp_table // mib}M
+max_heap_table_size={tmp_table // mib}M
+"""
+
+
+def nginx_conf(profile: str = "dev") -> str:
+    """
+    Main nginx.conf: workers, connection reuse, gzip and, outside dev,
+    a file descriptor cache and buffered access logs.
+    """
+    if profile == "dev":
+        caching = """    access_log /var/log/nginx/access.log main;
+    open_file_cache off;
+"""
+    else:
+        caching = """    access_log /var/log/nginx/access.log main buffer=64k flush=5s;
+    open_file_cache max=10000 inactive=60s;
+    open_file_cache_valid 30s;
+    open_file_cache_min_uses 2;
+    open_file_cache_errors on;
+"""
+
+    return f"""user nginx;
+worker_processes auto;
+worker_rlimit_nofile 65535;
+
+error_log /var/log/nginx/error.log notice;
+pid /run/nginx.pid;
+
+events {{
+    worker_connections 4096;
+    multi_accept on;
+}}
+
+http {{
+    include /etc/nginx/mime.types;
+    default_type application/octet-stream;
+
+    log_format main '$remote_addr - $remote_user [$time_local] "$request" '
+                    '$status $body_bytes_sent "$http_referer" '
+                    '"$http_user_agent" rt=$request_time urt=$upstream_response_time';
+{caching}
+    sendfile on;
+    tcp_nopush on;
+    tcp_nodelay on;
+    keepalive_timeout 65;
+    keepalive_requests 1000;
+    server_tokens off;
+    client_max_body_size 64m;
+
+    gzip on;
+    gzip_vary on;
+    gzip_proxied any;
+    gzip_comp_level 5;
+    gzip_min_length 1024;
+    gzip_types text/plain text/css text/xml application/json application/javascript
+               application/xml application/rss+xml image/svg+xml font/ttf;
+
+    include /etc/nginx/conf.d/*.conf;
+}}
+"""
+
+
+def nginx_default_conf(profile: str = "dev", *, upstream_keepalive: int = 2) -> str:
+    """
+    Laravel server block.
+
+    PHP goes through a keepalive upstream so nginx reuses FastCGI
+    connections to php-fpm. An idle kept-alive connection pins an fpm
+    worker, so `upstream_keepalive` (per nginx worker) must stay well
+    below pm.max_children. Vite's hashed /build/ assets and other
+    static files are served by nginx without touching PHP.
+    """
+    static_expires = "" if profile == "dev" else "\n    expires 7d;"
+
+    return rf"""upstream php {{
+  server app:9000;
+  keepalive {upstream_keepalive};
+  keepalive_timeout 10s;
+}}
+
+server {{
   listen 80;
   server_name localhost;
   root /var/www/html/public;
 
   index index.php index.html;
 
-  location / {
+  location / {{
     try_files $uri $uri/ /index.php?$query_string;
-  }
+  }}
+
+  # Vite build output: content-hashed, safe to cache forever
+  location ^~ /build/ {{
+    access_log off;
+    add_header Cache-Control "public, max-age=31536000, immutable";
+    try_files $uri =404;
+  }}
+
+  location ~* \.(?:css|js|mjs|map|ico|svg|png|jpe?g|gif|webp|avif|woff2?|ttf|txt)$ {{
+    access_log off;{static_expires}
+    try_files $uri /index.php?$query_string;
+  }}
 
-  location ~ \.php$ {
+  location ~ \.php$ {{
     include fastcgi_params;
-    fastcgi_pass app:9000;
+    fastcgi_pass php;
+    fastcgi_keep_conn on;
     fastcgi_index index.php;
     fastcgi_param SCRIPT_FILENAME $document_root$fastcgi_script_name;
     fastcgi_param PATH_INFO $fastcgi_path_info;
-  }
 
-  location ~ /\. {
+    fastcgi_buffer_size 32k;
+    fastcgi_buffers 16 16k;
+    fastcgi_busy_buffers_size 64k;
+    fastcgi_read_timeout 120s;
+  }}
+
+  # php-fpm pool status (see docker/php/www.conf); local networks only
+  location ~ ^/(fpm-status|fpm-ping)$ {{
+    allow 127.0.0.1;
+    allow 10.0.0.0/8;
+    allow 172.16.0.0/12;
+    allow 192.168.0.0/16;
     deny all;
-  }
-}
+    access_log off;
+    include fastcgi_params;
+    fastcgi_param SCRIPT_NAME $uri;
+    fastcgi_param SCRIPT_FILENAME $uri;
+    fastcgi_pass php;
+  }}
+
+  location ~ /\. {{
+    deny all;
+  }}
+}}
 """
 
 
-def php_dockerfile() -> str:
-    return r"""FROM php:8.3-fpm-alpine
+def php_base_dockerfile() -> str:
+    """
+    Shared PHP image: system packages, compiled extensions, Composer.
 
-# System deps
-RUN apk add --no-cache \
+    Identical for every project, so it is built once per template
+    version and tagged with `php_base_image_tag()`.
+    """
+    return r"""# syntax=docker/dockerfile:1
+FROM php:8.3-fpm-alpine
+
+# System deps (BuildKit cache mount keeps downloaded packages across rebuilds)
+RUN --mount=type=cache,target=/etc/apk/cache,sharing=locked \
+    apk add --update-cache \
     bash \
     curl \
     git \
@@ -134,23 +440,221 @@ RUN docker-php-ext-install \
 # Composer
 COPY --from=composer:2 /usr/bin/composer /usr/bin/composer
 
+WORKDIR /var/www/html
+
+CMD ["php-fpm"]
+"""
+
+
+def php_base_image_tag() -> str:
+    digest = hashlib.sha256(php_base_dockerfile().encode("utf-8")).hexdigest()
+    return f"laravel-docker-manager/php-base:{digest[:12]}"
+
+
+def php_dockerfile() -> str:
+    """
+    Per-project image: only project config on top of the shared base.
+    """
+    return f"""ARG PHP_BASE_IMAGE={php_base_image_tag()}
+FROM ${{PHP_BASE_IMAGE}}
+
 # PHP overrides
 COPY docker/php/zz-overrides.ini /usr/local/etc/php/conf.d/zz-overrides.ini
+"""
 
-WORKDIR /var/www/html
 
-CMD ["php-fpm"]
+def php_watch_dockerfile() -> str:
+    """
+    Image with the project source baked in, for the watch mount strategy.
+
+    Dependencies are installed in their own layer (Composer cache on a
+    BuildKit cache mount), so a source-only rebuild skips them.
+    """
+    return f"""# syntax=docker/dockerfile:1
+ARG PHP_BASE_IMAGE={php_base_image_tag()}
+FROM ${{PHP_BASE_IMAGE}}
+
+# PHP overrides
+COPY docker/php/zz-overrides.ini /usr/local/etc/php/conf.d/zz-overrides.ini
+
+# Dependencies: rebuilt only when composer files change
+COPY composer.json composer.lock* ./
+RUN --mount=type=cache,target=/tmp/composer-cache \\
+    COMPOSER_CACHE_DIR=/tmp/composer-cache \\
+    composer install --no-interaction --no-progress --prefer-dist --no-scripts --no-autoloader
+
+# Source (see .dockerignore); later changes arrive via compose watch
+COPY . .
+RUN composer dump-autoload --optimize --no-scripts \\
+    && mkdir -p storage/logs bootstrap/cache \\
+    && chown -R www-data:www-data storage bootstrap/cache
 """
 
 
-def php_ini_overrides() -> str:
-    return r"""memory_limit=512M
+def dockerignore() -> str:
+    return """.git
+.docker
+.env.backup
+node_modules
+vendor
+storage/logs/*
+storage/framework/cache/*
+storage/framework/sessions/*
+storage/framework/views/*
+bootstrap/cache/*.php
+docker-compose*.yml
+"""
+
+
+def php_ini_overrides(profile: str = "dev") -> str:
+    """
+    PHP ini for a runtime profile.
+
+    - dev: every request sees code changes immediately
+    - perf: large opcache, JIT, realpath cache; changes seen within 2s
+    - prod-like: as production: no timestamp checks, framework preloaded.
+      Code changes need an app container restart.
+    """
+    base = r"""memory_limit=512M
 upload_max_filesize=64M
 post_max_size=64M
 max_execution_time=120
 
 opcache.enable=1
 opcache.enable_cli=1
+"""
+
+    if profile == "perf":
+        return base + r"""opcache.memory_consumption=256
+opcache.interned_strings_buffer=32
+opcache.max_accelerated_files=20000
 opcache.validate_timestamps=1
+opcache.revalidate_freq=2
+opcache.jit=tracing
+opcache.jit_buffer_size=64M
+
+realpath_cache_size=4096K
+realpath_cache_ttl=600
+"""
+
+    if profile == "prod-like":
+        return base + r"""opcache.memory_consumption=256
+opcache.interned_strings_buffer=32
+opcache.max_accelerated_files=20000
+opcache.validate_timestamps=0
+opcache.jit=tracing
+opcache.jit_buffer_size=128M
+opcache.preload=/var/www/html/docker/php/preload.php
+opcache.preload_user=www-data
+
+realpath_cache_size=4096K
+realpath_cache_ttl=600
+
+zend.assertions=-1
+"""
+
+    return base + r"""opcache.validate_timestamps=1
 opcache.revalidate_freq=0
 """
+
+
+def php_fpm_max_children(*, cpus: int, memory_bytes: int, memory_limit_mb: int) -> int:
+    """
+    Workers capped by CPU (4 per core: requests mostly wait on MySQL)
+    and by half the host memory, assuming a worker averages a quarter
+    of memory_limit.
+    """
+    per_worker = max(32, memory_limit_mb // 4) * 1024 ** 2
+    by_cpu = cpus * 4
+    by_memory = (memory_bytes // 2) // per_worker
+    return max(4, min(by_cpu, by_memory))
+
+
+def php_fpm_pool_conf(
+    *,
+    cpus: int,
+    memory_bytes: int,
+    memory_limit_mb: int,
+    profile: str = "dev",
+) -> str:
+    """
+    php-fpm [www] pool sized for the Docker host.
+
+    dev keeps a dynamic pool; the other profiles pre-fork a static one
+    like production.
+    """
+    mib = 1024 ** 2
+    children = php_fpm_max_children(
+        cpus=cpus,
+        memory_bytes=memory_bytes,
+        memory_limit_mb=memory_limit_mb,
+    )
+
+    min_spare = max(1, children // 8)
+    start = max(min_spare, children // 4)
+    max_spare = max(start, children // 2)
+
+    if profile == "dev":
+        pm = f"""pm = dynamic
+pm.start_servers = {start}
+pm.min_spare_servers = {min_spare}
+pm.max_spare_servers = {max_spare}
+pm.max_requests = 500"""
+        slow = "5s"
+    else:
+        pm = """pm = static
+pm.max_requests = 1000"""
+        slow = "2s"
+
+    return f"""; Generated for {cpus} CPUs / {memory_bytes // mib}M, memory_limit {memory_limit_mb}M
+[www]
+{pm}
+pm.max_children = {children}
+
+pm.status_path = /fpm-status
+ping.path = /fpm-ping
+
+slowlog = /proc/self/fd/2
+request_slowlog_timeout = {slow}
+request_slowlog_trace_depth = 20
+"""
+
+
+def php_preload_script() -> str:
+    """
+    opcache.preload script: compiles the framework classes once at
+    php-fpm startup so requests never load them from disk.
+    """
+    return r"""<?php
+
+// Generated by Laravel Docker Manager for the prod-like PHP profile.
+// Runs once when php-fpm starts; restart the app container after
+// composer install/update.
+
+if (PHP_SAPI === 'cli') {
+    return; // CLI processes do not share the preloaded classes
+}
+
+$root = dirname(__DIR__, 2);
+
+if (!is_file($root . '/vendor/autoload.php')) {
+    return;
+}
+
+require $root . '/vendor/autoload.php';
+
+$classmap = $root . '/vendor/composer/autoload_classmap.php';
+$classes = is_file($classmap) ? require $classmap : [];
+
+foreach ($classes as $class => $file) {
+    if (strncmp($class, 'Illuminate\\', 11) !== 0) {
+        continue;
+    }
+    try {
+        // Autoloading links parents and interfaces in order
+        class_exists($class) || interface_exists($class) || trait_exists($class);
+    } catch (Throwable $e) {
+        // Optional dependency missing: skip the class
+    }
+}
+"""
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import itertools
+import json
+import threading
+import time
+from typing import Any, Iterator, Literal, Optional
+
+
+SpanCategory = Literal["workflow", "step", "command", "wait"]
+
+
+# -------------------------------------------------
+# Types
+# -------------------------------------------------
+@dataclass(frozen=True)
+class Span:
+    span_id: int
+    parent_id: Optional[int]
+    name: str
+    category: SpanCategory
+    start: float             # seconds since the trace started
+    end: float
+    thread: str
+    thread_id: int
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Trace:
+    """
+    Spans recorded during one traced run.
+
+    Spans are added as they close, from any thread; `spans` returns
+    them ordered by start time.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.time()
+        self._origin = time.monotonic()
+        self._ids = itertools.count(1)
+        self._spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.monotonic() - self._origin
+
+    @property
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return sorted(self._spans, key=lambda s: (s.start, s.span_id))
+
+    @property
+    def duration(self) -> float:
+        spans = self.spans
+        return max(s.end for s in spans) if spans else 0.0
+
+    def subprocess_time(self, span: Span) -> float:
+        """
+        Wall time during `span` in which at least one of its commands
+        was running. Overlapping commands are only counted once.
+        """
+        spans = self.spans
+        children: dict[Optional[int], list[Span]] = {}
+        for s in spans:
+            children.setdefault(s.parent_id, []).append(s)
+
+        intervals: list[tuple[float, float]] = []
+        stack = [span]
+        while stack:
+            s = stack.pop()
+            if s.category == "command":
+                intervals.append((s.start, s.end))   # nested spans are inside it
+                continue
+            stack.extend(children.get(s.span_id, []))
+
+        return _union_length(intervals)
+
+    def breakdown(self) -> list[dict[str, Any]]:
+        """
+        One row per span, in start order, for tables.
+        """
+        spans = self.spans
+        depth: dict[int, int] = {}
+        rows: list[dict[str, Any]] = []
+
+        for s in spans:
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1 if s.parent_id else 0
+            rows.append({
+                "span": "  " * depth[s.span_id] + s.name,
+                "kind": s.category,
+                "start (s)": round(s.start, 3),
+                "wall (s)": round(s.duration, 3),
+                "subprocess (s)": round(self.subprocess_time(s), 3),
+                "exit code": s.attrs.get("exit_code"),
+                "thread": s.thread,
+            })
+        return rows
+
+    # ---------- export ----------
+    def to_jsonl(self) -> str:
+        """
+        One JSON object per span.
+        """
+        lines = [
+            json.dumps({
+                "trace": self.name,
+                "started_at": self.started_at,
+                "id": s.span_id,
+                "parent": s.parent_id,
+                "name": s.name,
+                "category": s.category,
+                "start": round(s.start, 6),
+                "end": round(s.end, 6),
+                "duration": round(s.duration, 6),
+                "subprocess_time": round(self.subprocess_time(s), 6),
+                "thread": s.thread,
+                "attrs": s.attrs,
+            }, default=str)
+            for s in self.spans
+        ]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_chrome(self) -> str:
+        """
+        Chrome trace-event JSON (chrome://tracing, Perfetto).
+        """
+        spans = self.spans
+        events: list[dict[str, Any]] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": tid,
+                "args": {"name": thread},
+            }
+            for tid, thread in sorted({(s.thread_id, s.thread) for s in spans})
+        ]
+        events += [
+            {
+                "name": s.name,
+                "cat": s.category,
+                "ph": "X",
+                "ts": round(s.start * 1_000_000),
+                "dur": round(s.duration * 1_000_000),
+                "pid": 1,
+                "tid": s.thread_id,
+                "args": s.attrs,
+            }
+            for s in spans
+        ]
+        return json.dumps(
+            {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"trace": self.name}},
+            default=str,
+        )
+
+    # ---------- internals ----------
+    def _next_id(self) -> int:
+        with self._lock:
+            return next(self._ids)
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+
+def _union_length(intervals: list[tuple[float, float]]) -> float:
+    total = 0.0
+    current: tuple[float, float] | None = None
+
+    for start, end in sorted(intervals):
+        if current is None or start > current[1]:
+            if current is not None:
+                total += current[1] - current[0]
+            current = (start, end)
+        else:
+            current = (current[0], max(current[1], end))
+
+    if current is not None:
+        total += current[1] - current[0]
+    return total
+
+
+# -------------------------------------------------
+# Recording
+# -------------------------------------------------
+_trace: ContextVar[Optional[Trace]] = ContextVar("ldm_trace", default=None)
+_parent: ContextVar[Optional[tuple[int, SpanCategory]]] = ContextVar("ldm_span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+def in_span(category: SpanCategory) -> bool:
+    """
+    Whether the innermost open span is of `category`.
+    """
+    parent = _parent.get()
+    return parent is not None and parent[1] == category
+
+
+@contextmanager
+def span(name: str, category: SpanCategory, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """
+    Record the block as a span of the active trace.
+
+    Yields the span's attributes; entries added while the block runs
+    (e.g. an exit code) are kept. Without an active trace this only
+    yields the dict, so instrumented code costs next to nothing.
+
+    Context variables follow asyncio tasks automatically; threads
+    must be started in a copied context (see `run_steps`).
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield attrs
+        return
+
+    span_id = trace._next_id()
+    parent = _parent.get()
+    token = _parent.set((span_id, category))
+    thread = threading.current_thread()
+    start = trace.now()
+
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs.setdefault("error", repr(e))
+        raise
+    finally:
+        _parent.reset(token)
+        trace._add(Span(
+            span_id=span_id,
+            parent_id=parent[0] if parent is not None else None,
+            name=name,
+            category=category,
+            start=start,
+            end=trace.now(),
+            thread=thread.name,
+            thread_id=thread.ident or 0,
+            attrs=attrs,
+        ))
+
+
+@contextmanager
+def tracing(name: str) -> Iterator[Trace]:
+    """
+    Trace everything run inside the block.
+
+    Inside an already active trace this only adds a workflow span to
+    it, so a workflow started by another one shows up nested.
+    """
+    trace = _trace.get()
+    if trace is not None:
+        with span(name, "workflow"):
+            yield trace
+        return
+
+    trace = Trace(name)
+    token = _trace.set(trace)
+    try:
+        with span(name, "workflow"):
+            yield trace
+    finally:
+        _trace.reset(token)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from engine.docker import CommandResult, OutputCallback, _run, _run_streaming
+from engine.fingerprint import hash_files, read_stamp, write_stamp
+from engine.migrations import compose_volume_id
+
+
+# Files that decide what `composer install` puts into vendor/
+VENDOR_INPUTS = ("composer.json", "composer.lock")
+
+VENDOR_VOLUME = "vendor"
+
+_COMPOSER_INSTALL = [
+    "composer",
+    "install",
+    "--no-interaction",
+    "--no-progress",
+    "--prefer-dist",
+    "--optimize-autoloader",
+]
+
+
+# -------------------------------------------------
+# Stamp
+# -------------------------------------------------
+def _stamp_path(project: Path) -> Path:
+    return project / ".docker" / "vendor.json"
+
+
+def vendor_fingerprint(project: Path) -> str:
+    return hash_files(project, VENDOR_INPUTS)
+
+
+def vendor_up_to_date(project: Path) -> bool:
+    """
+    True if the vendor volume was populated from the current
+    composer.json / composer.lock.
+
+    Only meaningful with the `volumes` mount strategy. A recreated
+    (empty) volume has a new identity, so it is always repopulated.
+    """
+    stamp = read_stamp(_stamp_path(project))
+    if not stamp:
+        return False
+
+    if stamp.get("fingerprint") != vendor_fingerprint(project):
+        return False
+
+    volume = compose_volume_id(project, VENDOR_VOLUME)
+    return volume is not None and stamp.get("volume") == volume
+
+
+def record_vendor(project: Path) -> None:
+    """
+    Remember the composer inputs after a *successful* install.
+    """
+    volume = compose_volume_id(project, VENDOR_VOLUME)
+    if volume is None:
+        return
+
+    write_stamp(
+        _stamp_path(project),
+        {
+            "fingerprint": vendor_fingerprint(project),
+            "volume": volume,
+        },
+    )
+
+
+# -------------------------------------------------
+# Install
+# -------------------------------------------------
+def install_vendor(
+    project: Path,
+    *,
+    on_output: Optional[OutputCallback] = None,
+    timeout: int = 1200,
+) -> CommandResult:
+    """
+    Run `composer install` in the app container, filling the vendor volume.
+    """
+    cmd = ["docker", "compose", "exec", "-T", "app", *_COMPOSER_INSTALL]
+
+    if on_output is None:
+        return _run(cmd, cwd=project, timeout=timeout)
+    return _run_streaming(cmd, cwd=project, on_line=on_output, timeout=timeout)
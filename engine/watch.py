@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+from typing import IO
+
+from engine.docker import CommandResult, _kill_process_group, _process_group_kwargs
+from engine.fs import ensure_directory
+
+
+WATCH_CMD = ("docker", "compose", "watch", "--no-up")
+
+# A watcher that dies this soon after starting is reported, not retried
+STARTUP_GRACE = 2.0
+
+# Restart backoff; reset once a watcher stayed up for STABLE_AFTER
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+STABLE_AFTER = 60.0
+
+
+def _pid_path(project: Path) -> Path:
+    return project / ".docker" / "watch.pid"
+
+
+def _log_path(project: Path) -> Path:
+    return project / ".docker" / "watch.log"
+
+
+# -------------------------------------------------
+# Supervisor
+# -------------------------------------------------
+class WatchSupervisor:
+    """
+    Keeps `docker compose watch --no-up` running for one project.
+
+    The watcher is restarted with exponential backoff when it exits
+    (e.g. after a rebuild failed or the daemon restarted). Its pid is
+    written to .docker/watch.pid so a watcher orphaned by a previous
+    run of this tool is cleaned up instead of duplicated. Output goes
+    to .docker/watch.log.
+    """
+
+    def __init__(self, project: Path):
+        self.project = project
+        self.restarts = 0
+        self._proc: subprocess.Popen[bytes] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._log: IO[bytes] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> CommandResult:
+        if self.running:
+            return CommandResult.success(stdout="File watcher already running")
+
+        _kill_orphan(self.project)
+        ensure_directory(self.project / ".docker")
+        self._log = _log_path(self.project).open("wb")
+        self._stop.clear()
+
+        spawned = self._spawn()
+        if not spawned.ok:
+            self._close_log()
+            return spawned
+
+        # Fail fast on e.g. a Compose version without `watch`
+        assert self._proc is not None
+        try:
+            self._proc.wait(timeout=STARTUP_GRACE)
+        except subprocess.TimeoutExpired:
+            pass
+        else:
+            code = self._proc.returncode
+            self._cleanup_process()
+            self._close_log()
+            return CommandResult.failure(
+                stderr=_log_tail(self.project) or "docker compose watch exited",
+                exit_code=code,
+            )
+
+        self._thread = threading.Thread(
+            target=self._supervise,
+            name=f"watch-{self.project.name}",
+            daemon=True,
+        )
+        self._thread.start()
+        return CommandResult.success()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._proc is not None and self._proc.poll() is None:
+            _kill_process_group(self._proc.pid)
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._thread = None
+        self._cleanup_process()
+        self._close_log()
+
+    # ---------- internals ----------
+    def _spawn(self) -> CommandResult:
+        try:
+            self._proc = subprocess.Popen(
+                list(WATCH_CMD),
+                cwd=str(self.project),
+                stdin=subprocess.DEVNULL,
+                stdout=self._log,
+                stderr=subprocess.STDOUT,
+                **_process_group_kwargs(),
+            )
+        except FileNotFoundError:
+            return CommandResult.failure(stderr="Command not found: docker")
+
+        _pid_path(self.project).write_text(str(self._proc.pid), encoding="utf-8")
+        return CommandResult.success()
+
+    def _supervise(self) -> None:
+        backoff = MIN_BACKOFF
+
+        while not self._stop.is_set():
+            started = time.monotonic()
+            assert self._proc is not None
+            self._proc.wait()
+
+            if self._stop.is_set():
+                return
+
+            if time.monotonic() - started >= STABLE_AFTER:
+                backoff = MIN_BACKOFF
+
+            if self._stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+            self.restarts += 1
+            if not self._spawn().ok:
+                return
+
+    def _cleanup_process(self) -> None:
+        if self._proc is not None:
+            if self._proc.poll() is None:
+                _kill_process_group(self._proc.pid)
+            self._proc.wait()
+            self._proc = None
+        _pid_path(self.project).unlink(missing_ok=True)
+
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def _log_tail(project: Path, lines: int = 20) -> str:
+    try:
+        text = _log_path(project).read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return ""
+    return "\n".join(text.strip().splitlines()[-lines:])
+
+
+def _kill_orphan(project: Path) -> None:
+    """
+    Kill a watcher left behind by an earlier process. NEVER raises.
+
+    The pid is only trusted if it still belongs to `docker compose
+    watch`; pids get reused.
+    """
+    try:
+        pid = int(_pid_path(project).read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        return
+
+    if _is_watch_process(pid):
+        _kill_process_group(pid)
+    _pid_path(project).unlink(missing_ok=True)
+
+
+def _is_watch_process(pid: int) -> bool:
+    if sys.platform == "win32":
+        return False  # cannot verify cheaply; leave it alone
+
+    try:
+        cmdline = Path(f"/proc/{pid}/cmdline").read_bytes().replace(b"\0", b" ").decode()
+    except OSError:
+        try:
+            cmdline = subprocess.run(
+                ["ps", "-p", str(pid), "-o", "command="],
+                capture_output=True,
+                text=True,
+                timeout=5,
+                check=False,
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            return False
+
+    return "compose" in cmdline and "watch" in cmdline
+
+
+# -------------------------------------------------
+# Per-project registry
+# -------------------------------------------------
+_supervisors: dict[Path, WatchSupervisor] = {}
+_supervisors_lock = threading.Lock()
+
+
+def start_watch(project: Path) -> CommandResult:
+    """
+    Start (or keep) the file watcher for a project.
+    """
+    with _supervisors_lock:
+        supervisor = _supervisors.setdefault(project, WatchSupervisor(project))
+    return supervisor.start()
+
+
+def stop_watch(project: Path) -> bool:
+    """
+    Stop the project's file watcher. Returns False if none was running.
+    """
+    with _supervisors_lock:
+        supervisor = _supervisors.pop(project, None)
+
+    if supervisor is None:
+        _kill_orphan(project)
+        return False
+
+    supervisor.stop()
+    return True
+
+
+def watch_running(project: Path) -> bool:
+    with _supervisors_lock:
+        supervisor = _supervisors.get(project)
+    return supervisor is not None and supervisor.running
@@ -1,19 +1,40 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+import functools
 from pathlib import Path
-from typing import Iterable, Optional
+from typing import Callable, Iterable, Optional
 
 from engine.docker import (
     CommandResult,
+    OutputCallback,
     docker_compose_up,
     docker_compose_down,
+    docker_compose_restart,
     mark_mysql_initialized,
 )
 from engine.artisan import artisan
+from engine.artisan_session import ArtisanSession
 from engine.app import wait_for_service_healthy
+from engine.docker_health import invalidate_status_cache
 from engine.safety import require_confirmation, SafetyContext
 from engine.laravel_sail import sail_installed, install_sail
+from engine.migrations import migrations_up_to_date, record_migrations
+from engine.db_snapshots import SnapshotCache, snapshot_key
+from engine.build_cache import build_up_to_date, record_build
+from engine.base_image import ensure_php_base_image, uses_php_base_image
+from engine.project_config import load_project_config
+from engine.runtime_config import record_runtime_config, stale_services
+from engine.vendor import install_vendor, record_vendor, vendor_up_to_date
+from engine.watch import start_watch, stop_watch
+from engine.readiness import wait_until_ready
+from engine.scheduler import (
+    DEFAULT_MAX_CONCURRENCY,
+    Step,
+    StepOutcome,
+    run_steps,
+)
+from engine.tracing import Trace, tracing
 
 
 # -------------------------------------------------
@@ -25,6 +46,7 @@ class WorkflowResult:
     steps: list[str]
     result: Optional[CommandResult] = None
     error: Optional[str] = None
+    trace: Optional[Trace] = None
 
     @classmethod
     def success(
@@ -55,9 +77,24 @@ class WorkflowResult:
         )
 
 
+def _traced(name: str) -> Callable[[Callable[..., WorkflowResult]], Callable[..., WorkflowResult]]:
+    """
+    Run a workflow inside a trace and attach it to the result.
+    """
+    def decorate(workflow: Callable[..., WorkflowResult]) -> Callable[..., WorkflowResult]:
+        @functools.wraps(workflow)
+        def wrapper(*args: object, **kwargs: object) -> WorkflowResult:
+            with tracing(name) as trace:
+                result = workflow(*args, **kwargs)
+            return replace(result, trace=trace)
+        return wrapper
+    return decorate
+
+
 # -------------------------------------------------
 # Workflows
 # -------------------------------------------------
+@_traced("Start environment")
 def start_environment(
     project: Path,
     *,
@@ -66,6 +103,9 @@ def start_environment(
     wait_for_health: bool = True,
     health_service: str = "mysql",
     health_timeout: int = 60,
+    force_build: bool = False,
+    on_output: Optional[OutputCallback] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
 ) -> WorkflowResult:
     """
     Start the Docker environment and optionally:
@@ -73,91 +113,243 @@ def start_environment(
     - install Laravel Sail if missing
     - run migrations
 
-    Order is important and intentional.
+    The image is only rebuilt when its build inputs changed since the
+    last successful build (or `force_build` is set).
+    `on_output` receives `docker compose up` output line by line.
+
+    With an ephemeral database (see ProjectConfig) migrations always
+    run: the data did not survive the previous stop. With the `volumes`
+    mount strategy the vendor volume is filled by `composer install`
+    whenever composer.json / composer.lock changed. With `watch` the
+    image (which contains the source) is always rebuilt and
+    `docker compose watch` is started and supervised afterwards.
+    Services whose bind-mounted config files changed since the last
+    start are restarted so they read the new files.
+
+    Steps run as a graph; independent ones overlap:
+
+        base image -> up -> marker
+                         -> config -> watch
+                                   -> health ------------------> migrate
+                                   -> vendor -> sail ----------/
     """
-    steps: list[str] = []
+    config = load_project_config(project)
+    up_result: list[CommandResult] = []
+
+    # -------------------------------------------------
+    # Shared base image
+    # -------------------------------------------------
+    def base_image() -> StepOutcome:
+        base, base_built = ensure_php_base_image(project)
+        if not base.ok:
+            return StepOutcome.failure(
+                "Failed to build the shared PHP base image",
+                result=base,
+            )
+
+        return StepOutcome.success(
+            "Shared PHP base image built"
+            if base_built
+            else "Shared PHP base image already available"
+        )
 
     # -------------------------------------------------
     # Docker up
     # -------------------------------------------------
-    result = docker_compose_up(project)
-    if not result.ok:
-        return WorkflowResult.failure(
-            steps=steps,
-            error="Docker failed to start",
-            result=result,
+    def up() -> StepOutcome:
+        build = force_build or config.watch or not build_up_to_date(project)
+
+        result = docker_compose_up(project, build=build, on_output=on_output)
+        invalidate_status_cache(project)
+        up_result.append(result)
+
+        if not result.ok:
+            return StepOutcome.failure("Docker failed to start", result=result)
+
+        if build:
+            record_build(project)
+            return StepOutcome.success("Docker environment built and started")
+        return StepOutcome.success(
+            "Docker environment started (image unchanged, build skipped)"
+        )
+
+    def marker() -> StepOutcome:
+        if config.ephemeral_db:
+            return StepOutcome.success("MySQL runs on tmpfs (data is discarded on stop)")
+
+        mark_mysql_initialized(project)
+        return StepOutcome.success("MySQL marked as initialized")
+
+    # -------------------------------------------------
+    # Mounted config files (re-read only on restart)
+    # -------------------------------------------------
+    def config_files() -> StepOutcome:
+        stale = stale_services(project)
+        if not stale:
+            return StepOutcome.success("Service config unchanged since last start")
+
+        restarted = docker_compose_restart(project, *stale)
+        if not restarted.ok:
+            return StepOutcome.failure(
+                "Failed to restart services for changed config",
+                result=restarted,
+            )
+
+        record_runtime_config(project)
+        return StepOutcome.success(
+            "Restarted for changed config: " + ", ".join(stale)
         )
 
-    steps.append("Docker environment started")
+    # -------------------------------------------------
+    # File sync into the container
+    # -------------------------------------------------
+    def watch() -> StepOutcome:
+        watcher = start_watch(project)
+
+        if not watcher.ok:
+            return StepOutcome.failure(
+                "docker compose watch failed to start (needs Compose 2.22+)",
+                result=watcher,
+            )
+        return StepOutcome.success("File watcher running (docker compose watch)")
+
+    # -------------------------------------------------
+    # Vendor volume (runs while MySQL is still starting)
+    # -------------------------------------------------
+    def vendor() -> StepOutcome:
+        if vendor_up_to_date(project):
+            return StepOutcome.success("Vendor volume up to date (composer install skipped)")
+
+        installed = install_vendor(project, on_output=on_output)
+        if not installed.ok:
+            return StepOutcome.failure("composer install failed", result=installed)
 
-    mark_mysql_initialized(project)
-    steps.append("MySQL marked as initialized")
+        record_vendor(project)
+        messages = ["Vendor volume populated (composer install)"]
+
+        if config.preloads:
+            # php-fpm preloads the framework from vendor/ at startup only
+            if docker_compose_restart(project, "app").ok:
+                messages.append("App restarted to preload the framework")
+
+        return StepOutcome.success(*messages)
 
     # -------------------------------------------------
     # Optional health check
     # -------------------------------------------------
-    if wait_for_health:
-        healthy = wait_for_service_healthy(
+    def health() -> StepOutcome:
+        # Probes the service and its dependencies from the host; falls
+        # back to Docker's healthcheck if the compose graph is unavailable
+        readiness = wait_until_ready(
             project,
-            service=health_service,
+            [health_service],
             timeout=health_timeout,
         )
 
-        if not healthy:
-            return WorkflowResult.failure(
-                steps=steps,
-                error=f"Service '{health_service}' did not become healthy in time",
+        if readiness.resolved:
+            if not readiness.ok:
+                return StepOutcome.failure(
+                    "Not ready in time: " + "; ".join(
+                        f"{s.service} ({s.detail})" for s in readiness.not_ready
+                    ),
+                )
+            return StepOutcome.success(
+                f"Service '{health_service}' is ready ({readiness.duration:.1f}s)"
             )
 
-        steps.append(f"Service '{health_service}' is healthy")
+        if wait_for_service_healthy(
+            project,
+            service=health_service,
+            timeout=health_timeout,
+        ):
+            return StepOutcome.success(f"Service '{health_service}' is healthy")
+
+        return StepOutcome.failure(
+            f"Service '{health_service}' did not become healthy in time",
+        )
 
     # -------------------------------------------------
     # Optional Sail install
     # -------------------------------------------------
-    if ensure_sail:
+    def sail() -> StepOutcome:
         if sail_installed(project):
-            steps.append("Laravel Sail already installed")
-        else:
-            sail = install_sail(project)
-
-            if not sail.ok:
-                return WorkflowResult.failure(
-                    steps=steps,
-                    error="Failed to install Laravel Sail",
-                    result=sail,
-                )
+            return StepOutcome.success("Laravel Sail already installed")
 
-            steps.append("Laravel Sail installed")
+        installed = install_sail(project)
+        if not installed.ok:
+            return StepOutcome.failure("Failed to install Laravel Sail", result=installed)
+        return StepOutcome.success("Laravel Sail installed")
 
     # -------------------------------------------------
     # Optional migrations
     # -------------------------------------------------
-    if auto_migrate:
-        mig = artisan(project, ["migrate"])
+    def migrate() -> StepOutcome:
+        if not config.ephemeral_db and migrations_up_to_date(project):
+            return StepOutcome.success("Migrations unchanged since last run (skipped)")
 
+        mig = artisan(project, ["migrate"])
         if not mig.ok:
-            return WorkflowResult.failure(
-                steps=steps,
-                error="Database migration failed",
-                result=mig,
-            )
+            return StepOutcome.failure("Database migration failed", result=mig)
+
+        if not config.ephemeral_db:
+            record_migrations(project)
+        return StepOutcome.success("Database migrations completed")
+
+    graph = [
+        Step("base_image", base_image)
+        if uses_php_base_image(project, watch=config.watch)
+        else None,
+        Step("up", up, after=("base_image",)),
+        Step("marker", marker, after=("up",)),
+        Step("config", config_files, after=("up",)),
+        Step("watch", watch, after=("config",)) if config.watch else None,
+        Step("vendor", vendor, after=("config",)) if config.vendor_in_volume else None,
+        Step("health", health, after=("config",)) if wait_for_health else None,
+        Step("sail", sail, after=("config", "vendor")) if ensure_sail else None,
+        Step("migrate", migrate, after=("config", "health", "vendor", "sail"))
+        if auto_migrate
+        else None,
+    ]
+
+    schedule = run_steps(
+        [step for step in graph if step is not None],
+        max_concurrency=max_concurrency,
+    )
 
-        steps.append("Database migrations completed")
+    if not schedule.ok:
+        failed = schedule.failed
+        return WorkflowResult.failure(
+            steps=schedule.messages,
+            error=(
+                failed.outcome.error or f"Step '{failed.step}' failed"
+                if failed is not None
+                else "Steps not run: " + ", ".join(schedule.skipped)
+            ),
+            result=failed.outcome.result if failed is not None else None,
+        )
 
     return WorkflowResult.success(
-        steps=steps,
-        result=result,
+        steps=schedule.messages,
+        result=up_result[0] if up_result else None,
     )
 
 
+@_traced("Reset database")
 def reset_database(
     project: Path,
     *,
     seed: bool,
     safety: SafetyContext,
+    use_snapshot: bool = True,
+    snapshots: Optional[SnapshotCache] = None,
 ) -> WorkflowResult:
     """
     Reset the database using migrate:fresh.
+
+    With `seed` and `use_snapshot`, a dump of a previous fresh + seed
+    with identical migrations, seeders and factories is restored
+    instead of running PHP. Successful fresh + seed runs are dumped
+    into the snapshot cache for next time.
     """
     require_confirmation(
         safety,
@@ -165,29 +357,62 @@ def reset_database(
     )
 
     steps: list[str] = []
+    ephemeral = load_project_config(project).ephemeral_db
+
+    key: Optional[str] = None
+    if seed and use_snapshot:
+        snapshots = snapshots or SnapshotCache()
+        key = snapshot_key(project)
+        snapshot = snapshots.lookup(key)
+
+        if snapshot is not None:
+            restored = snapshots.restore(project, snapshot)
+
+            if restored.ok:
+                if not ephemeral:
+                    record_migrations(project)
+                steps.append(f"Database restored from seeded snapshot {key}")
+                return WorkflowResult.success(
+                    steps=steps,
+                    result=restored,
+                )
 
-    result = artisan(project, ["migrate:fresh"])
-
-    if not result.ok:
-        return WorkflowResult.failure(
-            steps=steps,
-            error="migrate:fresh failed",
-            result=result,
-        )
-
-    steps.append("Database reset with migrate:fresh")
+            steps.append("Snapshot restore failed, rebuilding from scratch")
 
-    if seed:
-        seed_result = artisan(project, ["db:seed"])
+    # One bootstrapped Laravel process for fresh + seed
+    with ArtisanSession(project) as session:
+        result = session.run(["migrate:fresh"])
 
-        if not seed_result.ok:
+        if not result.ok:
             return WorkflowResult.failure(
                 steps=steps,
-                error="Database seeding failed",
-                result=seed_result,
+                error="migrate:fresh failed",
+                result=result,
             )
 
-        steps.append("Database seeded")
+        if not ephemeral:
+            record_migrations(project)
+        steps.append("Database reset with migrate:fresh")
+
+        if seed:
+            seed_result = session.run(["db:seed"])
+
+            if not seed_result.ok:
+                return WorkflowResult.failure(
+                    steps=steps,
+                    error="Database seeding failed",
+                    result=seed_result,
+                )
+
+            steps.append("Database seeded")
+
+    if snapshots is not None and key is not None:
+        saved = snapshots.save(project, key)
+        steps.append(
+            f"Seeded snapshot saved ({key})"
+            if saved.ok
+            else f"Seeded snapshot not saved: {saved.stderr or 'dump failed'}"
+        )
 
     return WorkflowResult.success(
         steps=steps,
@@ -195,6 +420,7 @@ def reset_database(
     )
 
 
+@_traced("Stop environment")
 def stop_environment(
     project: Path,
     *,
@@ -210,7 +436,11 @@ def stop_environment(
 
     steps: list[str] = []
 
+    if stop_watch(project):
+        steps.append("File watcher stopped")
+
     result = docker_compose_down(project)
+    invalidate_status_cache(project)
 
     if not result.ok:
         return WorkflowResult.failure(
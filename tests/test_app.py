@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.app import plan_docker_files
+
+# docker/php/Dockerfile as generated before the shared base image
+PREVIOUS_DOCKERFILE = r"""# syntax=docker/dockerfile:1
+FROM php:8.3-fpm-alpine
+
+# System deps (BuildKit cache mount keeps downloaded packages across rebuilds)
+RUN --mount=type=cache,target=/etc/apk/cache,sharing=locked \
+    apk add --update-cache \
+    bash \
+    curl \
+    git \
+    unzip \
+    libzip-dev \
+    icu-dev \
+    oniguruma-dev \
+    zlib-dev \
+    linux-headers \
+    $PHPIZE_DEPS
+
+# PHP extensions commonly needed by Laravel
+RUN docker-php-ext-install \
+    pdo_mysql \
+    mbstring \
+    intl \
+    zip \
+    opcache
+
+# Composer
+COPY --from=composer:2 /usr/bin/composer /usr/bin/composer
+
+# PHP overrides
+COPY docker/php/zz-overrides.ini /usr/local/etc/php/conf.d/zz-overrides.ini
+
+WORKDIR /var/www/html
+
+CMD ["php-fpm"]
+"""
+
+
+def _project(root: Path, dockerfile: str) -> Path:
+    (root / "artisan").write_text("#!/usr/bin/env php\n", encoding="utf-8")
+    (root / "composer.json").write_text("{}", encoding="utf-8")
+    (root / "docker" / "php").mkdir(parents=True)
+    (root / "docker" / "php" / "Dockerfile").write_text(dockerfile, encoding="utf-8")
+    return root
+
+
+def _dockerfile_action(project: Path) -> str:
+    plan = plan_docker_files(project, update_env=False)
+    (planned,) = [f for f in plan.files if f.path.name == "Dockerfile"]
+    assert planned.action == "unchanged" or planned.backup
+    return planned.action
+
+
+def test_previously_generated_dockerfile_is_replaced(tmp_path: Path) -> None:
+    project = _project(tmp_path, PREVIOUS_DOCKERFILE)
+
+    assert _dockerfile_action(project) == "update"
+
+
+def test_edited_dockerfile_is_kept(tmp_path: Path) -> None:
+    project = _project(tmp_path, PREVIOUS_DOCKERFILE + "RUN apk add imagemagick\n")
+
+    assert _dockerfile_action(project) == "unchanged"
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.base_image import uses_php_base_image
+from engine.templates import php_watch_dockerfile
+
+
+LEGACY_DOCKERFILE = "FROM php:8.3-fpm\nRUN docker-php-ext-install pdo_mysql\n"
+
+
+def _dockerfile(project: Path, name: str, content: str) -> None:
+    folder = project / "docker" / "php"
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / name).write_text(content, encoding="utf-8")
+
+
+def test_legacy_dockerfile_needs_no_base_image(tmp_path: Path) -> None:
+    _dockerfile(tmp_path, "Dockerfile", LEGACY_DOCKERFILE)
+
+    assert not uses_php_base_image(tmp_path)
+
+
+def test_watch_mode_needs_the_base_image_with_a_legacy_dockerfile(tmp_path: Path) -> None:
+    _dockerfile(tmp_path, "Dockerfile", LEGACY_DOCKERFILE)
+
+    assert uses_php_base_image(tmp_path, watch=True)
+
+    _dockerfile(tmp_path, "Dockerfile.watch", php_watch_dockerfile())
+    assert uses_php_base_image(tmp_path)
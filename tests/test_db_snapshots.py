@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.db_snapshots import _exec_mysql, snapshot_key
+
+
+def test_snapshots_follow_the_env_database(tmp_path: Path) -> None:
+    (tmp_path / "database" / "migrations").mkdir(parents=True)
+    default_key = snapshot_key(tmp_path)
+    assert "LDM_DB" not in " ".join(_exec_mysql(tmp_path, "true"))
+
+    (tmp_path / ".env").write_text("APP_NAME=Shop\nDB_DATABASE=shop\n", encoding="utf-8")
+
+    assert snapshot_key(tmp_path) != default_key
+    assert _exec_mysql(tmp_path, "true")[:6] == [
+        "docker", "compose", "exec", "-T", "-e", "LDM_DB=shop",
+    ]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from engine.discovery import DiscoveryIndex, discover_projects
+
+
+def _laravel(folder: Path) -> None:
+    folder.mkdir(parents=True)
+    (folder / "artisan").write_text("#!/usr/bin/env php\n", encoding="utf-8")
+    (folder / "composer.json").write_text(
+        json.dumps({"require": {"laravel/framework": "^11.0"}}),
+        encoding="utf-8",
+    )
+
+
+def test_deleted_composer_json_drops_the_project(tmp_path: Path) -> None:
+    root = tmp_path / "projects"
+    _laravel(root / "shop")
+    _laravel(root / "blog")
+    index_path = tmp_path / "index.json"
+
+    found = discover_projects(root, index=DiscoveryIndex(root, index_path))
+    assert sorted(p.name for p in found) == ["blog", "shop"]
+
+    (root / "shop" / "composer.json").unlink()
+
+    found = discover_projects(root, index=DiscoveryIndex(root, index_path))
+    assert [p.name for p in found] == ["blog"]
+
+    saved = json.loads(index_path.read_text(encoding="utf-8"))
+    assert list(saved["entries"]) == ["blog"]
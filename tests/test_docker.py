@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from engine.docker import _run, _run_async, _run_streaming
+
+
+# Invalid UTF-8 byte followed by "é"
+CMD = ["printf", "\\377\\303\\251"]
+
+
+def test_runners_decode_output_identically(tmp_path: Path) -> None:
+    lines: list[str] = []
+
+    sync = _run(CMD, cwd=tmp_path)
+    async_ = asyncio.run(_run_async(CMD, cwd=tmp_path))
+    streamed = _run_streaming(CMD, cwd=tmp_path, on_line=lambda _, line: lines.append(line))
+
+    assert sync.stdout == async_.stdout == streamed.stdout == "�é"
+    assert lines == ["�é"]
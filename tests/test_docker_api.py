@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler
+import json
+from pathlib import Path
+import socketserver
+import tempfile
+import threading
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from engine import docker_api
+from engine.docker_api import DockerAPI, DockerAPIError, get_docker_api, reset_docker_api
+from engine.docker_health import _api_snapshot
+
+
+# -------------------------------------------------
+# Fake daemon
+# -------------------------------------------------
+CONTAINERS = [
+    {
+        "Id": "aaa111",
+        "Labels": {
+            "com.docker.compose.project": "demo",
+            "com.docker.compose.service": "mysql",
+            "com.docker.compose.oneoff": "False",
+        },
+    },
+]
+
+INSPECT = {
+    "aaa111": {
+        "Id": "aaa111bbb222ccc333",
+        "Name": "/demo-mysql-1",
+        "RestartCount": 0,
+        "Config": {
+            "Labels": {
+                "com.docker.compose.project": "demo",
+                "com.docker.compose.service": "mysql",
+            },
+        },
+        "State": {
+            "Status": "running",
+            "StartedAt": "2024-01-01T00:00:00.123456789Z",
+            "Health": {"Status": "healthy"},
+        },
+        "NetworkSettings": {
+            "Ports": {"3306/tcp": [{"HostIp": "0.0.0.0", "HostPort": "3306"}]},
+        },
+    },
+}
+
+
+class _Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        super().__init__(path, _Handler)
+        self.requests: list[tuple[str, str, dict[str, list[str]]]] = []
+        self.connections = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like dockerd
+    server: _Daemon
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        self.server.requests.append(("GET", url.path, query))
+
+        if url.path == "/_ping":
+            self._send(200, b"OK", "text/plain")
+        elif url.path == "/containers/json":
+            filters = json.loads(query.get("filters", ["{}"])[0])
+            wanted = filters.get("label", [])
+            matching = [
+                c for c in CONTAINERS
+                if all(
+                    c["Labels"].get(key) == value
+                    for key, _, value in (label.partition("=") for label in wanted)
+                )
+            ]
+            self._json(200, matching)
+        elif url.path.startswith("/containers/") and url.path.endswith("/json"):
+            container = url.path.split("/")[2]
+            if container in INSPECT:
+                self._json(200, INSPECT[container])
+            else:
+                self._json(404, {"message": f"No such container: {container}"})
+        else:
+            self._json(404, {"message": "page not found"})
+
+    def _json(self, status: int, body: Any) -> None:
+        self._send(status, json.dumps(body).encode("utf-8"), "application/json")
+
+    def _send(self, status: int, data: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def daemon() -> Iterator[_Daemon]:
+    # Short path: Unix socket paths are limited to ~100 bytes
+    with tempfile.TemporaryDirectory(prefix="ldm-") as folder:
+        server = _Daemon(str(Path(folder) / "docker.sock"))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+@pytest.fixture
+def api(daemon: _Daemon) -> Iterator[DockerAPI]:
+    client = DockerAPI(daemon.server_address, timeout=5)  # type: ignore[arg-type]
+    try:
+        yield client
+    finally:
+        client.close()
+
+
+# -------------------------------------------------
+# Tests
+# -------------------------------------------------
+def test_list_containers_filters_by_label(api: DockerAPI, daemon: _Daemon) -> None:
+    listed = api.list_containers(
+        labels={"com.docker.compose.project": "demo"},
+        all=False,
+    )
+
+    assert [c["Id"] for c in listed] == ["aaa111"]
+    _, path, query = daemon.requests[-1]
+    assert path == "/containers/json"
+    assert query["all"] == ["0"]
+    assert json.loads(query["filters"][0]) == {
+        "label": ["com.docker.compose.project=demo"],
+    }
+
+    assert api.list_containers(labels={"com.docker.compose.project": "other"}) == []
+
+
+def test_inspect_and_health_snapshot(api: DockerAPI, tmp_path: Path) -> None:
+    assert api.inspect_container("aaa111")["State"]["Health"]["Status"] == "healthy"
+
+    with pytest.raises(DockerAPIError, match="404"):
+        api.inspect_container("missing")
+
+    project = tmp_path / "demo"
+    project.mkdir()
+    snapshot = _api_snapshot(api, project)
+
+    assert snapshot is not None
+    assert snapshot.health("mysql") == "healthy"
+    assert snapshot.health("app") == "not_found"
+    (container,) = snapshot.service("mysql")
+    assert container.name == "demo-mysql-1"
+    assert container.container_id == "aaa111bbb222"
+    assert [p.host_port for p in container.ports] == [3306]
+
+
+def test_requests_reuse_one_keep_alive_connection(api: DockerAPI, daemon: _Daemon) -> None:
+    assert api.ping()
+    api.list_containers()
+    api.inspect_container("aaa111")
+
+    assert len(daemon.requests) == 3
+    assert daemon.connections == 1
+
+
+def test_reconnects_after_the_daemon_dropped_the_connection(
+    api: DockerAPI,
+    daemon: _Daemon,
+) -> None:
+    assert api.ping()
+    assert api._conn is not None and api._conn.sock is not None
+    api._conn.sock.close()   # stale keep-alive connection
+
+    assert api.ping()
+    assert daemon.connections == 2
+
+
+def test_missing_socket_falls_back_to_cli(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    missing = tmp_path / "nowhere.sock"
+
+    assert not DockerAPI(str(missing)).ping()
+    with pytest.raises(DockerAPIError, match="unreachable"):
+        DockerAPI(str(missing)).info()
+
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{missing}")
+    monkeypatch.delenv(docker_api.BACKEND_ENV, raising=False)
+    reset_docker_api()
+    try:
+        assert get_docker_api() is None
+    finally:
+        reset_docker_api()
+
+
+def test_shared_client_uses_a_reachable_socket(
+    daemon: _Daemon,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("DOCKER_HOST", f"unix://{daemon.server_address}")
+    monkeypatch.delenv(docker_api.BACKEND_ENV, raising=False)
+    reset_docker_api()
+    try:
+        client = get_docker_api()
+        assert client is not None
+        assert get_docker_api() is client
+
+        monkeypatch.setenv(docker_api.BACKEND_ENV, "cli")
+        assert get_docker_api() is None
+    finally:
+        reset_docker_api()
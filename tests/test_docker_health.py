@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from engine.docker_health import _die_is_final
+
+
+def _die(exit_code: str) -> dict[str, object]:
+    return {"Action": "die", "Actor": {"ID": "aaa111", "Attributes": {"exitCode": exit_code}}}
+
+
+def test_die_is_final_only_without_a_restart() -> None:
+    assert _die_is_final("no", _die("1"))
+    assert _die_is_final("", _die("1"))
+    assert not _die_is_final("always", _die("0"))
+    assert not _die_is_final("unless-stopped", _die("137"))
+    assert not _die_is_final("on-failure", _die("1"))
+    assert _die_is_final("on-failure", _die("0"))
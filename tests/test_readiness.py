@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import socket
+from typing import Awaitable, Callable
+
+from engine.readiness import (
+    Probe,
+    ServiceSpec,
+    parse_service_specs,
+    probe_http,
+    probe_mysql,
+    probe_tcp,
+    wait_until_ready_async,
+)
+
+
+Handler = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+
+# Protocol v10 handshake: 3 byte length, sequence 0, protocol byte 0x0a
+MYSQL_HANDSHAKE = b"\x4a\x00\x00\x00\x0a8.0.36\x00"
+# ERR packet: header byte 0xff, e.g. "Host is not allowed to connect"
+MYSQL_ERROR = b"\x17\x00\x00\x00\xff\x6a\x04Host is not allowed"
+
+
+# -------------------------------------------------
+# Stand-in listeners
+# -------------------------------------------------
+async def _listen(handler: Handler) -> tuple[asyncio.AbstractServer, int]:
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def _reply(data: bytes) -> Handler:
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(data)
+        await writer.drain()
+        writer.close()
+    return handler
+
+
+def _http(status_line: str) -> Handler:
+    async def handler(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(f"{status_line}\r\nContent-Length: 0\r\n\r\n".encode("ascii"))
+        await writer.drain()
+        writer.close()
+    return handler
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _probe(handler: Handler, probe: Callable[..., Awaitable[str | None]]) -> str | None:
+    async def run() -> str | None:
+        server, port = await _listen(handler)
+        async with server:
+            return await probe("127.0.0.1", port)
+    return asyncio.run(run())
+
+
+# -------------------------------------------------
+# Probes
+# -------------------------------------------------
+def test_mysql_probe_accepts_a_handshake() -> None:
+    assert _probe(_reply(MYSQL_HANDSHAKE), probe_mysql) is None
+
+
+def test_mysql_probe_rejects_an_error_packet() -> None:
+    assert _probe(_reply(MYSQL_ERROR), probe_mysql) == "unexpected handshake byte 0xff"
+
+
+def test_mysql_probe_rejects_an_early_close() -> None:
+    assert _probe(_reply(b""), probe_mysql) == "no handshake"
+
+
+def test_http_probe_reads_the_status_line() -> None:
+    assert _probe(_http("HTTP/1.1 200 OK"), probe_http) is None
+    assert _probe(_http("HTTP/1.1 500 Internal Server Error"), probe_http) is None
+    assert _probe(_http("HTTP/1.1 502 Bad Gateway"), probe_http) == "HTTP 502"
+    assert _probe(_reply(b"garbage\r\n"), probe_http) == "malformed HTTP response"
+
+
+def test_tcp_probe() -> None:
+    assert _probe(_reply(b""), probe_tcp) is None
+    assert asyncio.run(probe_tcp("127.0.0.1", _free_port())).startswith("connect failed")
+
+
+# -------------------------------------------------
+# Service graph
+# -------------------------------------------------
+def test_parse_service_specs_picks_probes_by_container_port() -> None:
+    specs = parse_service_specs({
+        "services": {
+            "mysql": {"ports": [{"target": 3306, "published": "3307", "protocol": "tcp"}]},
+            "nginx": {
+                "depends_on": {"app": {"condition": "service_started"}},
+                "ports": [{"target": 80, "published": "8081", "host_ip": "0.0.0.0"}],
+            },
+            "app": {"depends_on": ["mysql"]},
+        },
+    })
+
+    assert specs is not None
+    assert specs["mysql"].probes == (Probe("mysql", 3307),)
+    assert specs["nginx"].probes == (Probe("http", 8081),)
+    assert specs["nginx"].depends_on == ("app",)
+    assert specs["app"].depends_on == ("mysql",)
+    assert specs["app"].probes == ()
+
+
+def test_dependency_not_ready_blocks_its_dependents() -> None:
+    async def run() -> dict[str, tuple[bool, str]]:
+        db, db_port = await _listen(_reply(MYSQL_ERROR))
+        web, web_port = await _listen(_http("HTTP/1.1 200 OK"))
+        async with db, web:
+            specs = {
+                "mysql": ServiceSpec("mysql", probes=(Probe("mysql", db_port),)),
+                "nginx": ServiceSpec(
+                    "nginx",
+                    depends_on=("mysql",),
+                    probes=(Probe("http", web_port),),
+                ),
+            }
+            report = await wait_until_ready_async(
+                Path("."), ["nginx"], timeout=0.5, specs=specs,
+            )
+        return {
+            name: (s.ready, s.detail) for name, s in report.services.items()
+        }
+
+    assert asyncio.run(run()) == {
+        "nginx": (False, "dependency 'mysql' not ready"),
+        "mysql": (False, "unexpected handshake byte 0xff"),
+    }
+
+
+def test_ready_once_dependencies_are_ready() -> None:
+    async def run() -> tuple[bool, list[str]]:
+        db, db_port = await _listen(_reply(MYSQL_HANDSHAKE))
+        web, web_port = await _listen(_http("HTTP/1.1 200 OK"))
+        finished: list[str] = []
+        async with db, web:
+            specs = {
+                "mysql": ServiceSpec("mysql", probes=(Probe("mysql", db_port),)),
+                "nginx": ServiceSpec(
+                    "nginx",
+                    depends_on=("mysql",),
+                    probes=(Probe("http", web_port),),
+                ),
+            }
+            report = await wait_until_ready_async(
+                Path("."),
+                ["nginx"],
+                timeout=5,
+                specs=specs,
+                on_ready=lambda s: finished.append(s.service),
+            )
+        return report.ok, finished
+
+    ok, finished = asyncio.run(run())
+    assert ok
+    assert finished.index("mysql") < finished.index("nginx")
+
+
+def test_unknown_service_is_reported() -> None:
+    report = asyncio.run(
+        wait_until_ready_async(Path("."), ["nope"], timeout=0.1, specs={})
+    )
+
+    assert not report.ok
+    assert report.services["nope"].detail == "unknown service"
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from engine.fs import _atomic_write
+from engine.runtime_config import record_runtime_config, stale_services
+from engine.templates import mysql_cnf
+
+
+def _write(project: Path, rel: str, content: str) -> None:
+    path = project / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(path, content)
+
+
+def test_changed_pool_config_restarts_the_app(tmp_path: Path) -> None:
+    _write(tmp_path, "docker/php/www.conf", "[www]\npm.max_children = 5\n")
+    assert "app" in stale_services(tmp_path)
+
+    record_runtime_config(tmp_path)
+    assert stale_services(tmp_path) == []
+
+    _write(tmp_path, "docker/php/www.conf", "[www]\npm.max_children = 8\n")
+    assert stale_services(tmp_path) == ["app"]
+
+
+def test_changed_site_config_restarts_nginx_only(tmp_path: Path) -> None:
+    _write(tmp_path, "docker/nginx/nginx.conf", "worker_processes auto;\n")
+    _write(tmp_path, "docker/nginx/default.conf", "server { listen 80; }\n")
+    record_runtime_config(tmp_path)
+
+    _write(tmp_path, "docker/nginx/default.conf", "server { listen 80; gzip on; }\n")
+    assert stale_services(tmp_path) == ["nginx"]
+
+
+def test_resized_mysql_config_restarts_mysql(tmp_path: Path) -> None:
+    mib = 1024 ** 2
+    host = {"cpus": 4, "memory_bytes": 8192 * mib}
+    _write(tmp_path, "docker/mysql/my.cnf", mysql_cnf(**host, budget_mb=1024))
+    record_runtime_config(tmp_path)
+
+    _write(tmp_path, "docker/mysql/my.cnf", mysql_cnf(**host, budget_mb=2048))
+    assert stale_services(tmp_path) == ["mysql"]
+
+
+def test_mysql_cnf_header_shows_the_effective_budget() -> None:
+    mib = 1024 ** 2
+    capped = mysql_cnf(cpus=2, memory_bytes=2048 * mib, budget_mb=4096)
+    assert capped.startswith("# Generated for 2 CPUs / 2048M, budget 1024M (requested 4096M)\n")
+
+    fits = mysql_cnf(cpus=2, memory_bytes=8192 * mib, budget_mb=1024)
+    assert fits.startswith("# Generated for 2 CPUs / 8192M, budget 1024M\n")
@@ -1,18 +1,29 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from pathlib import Path
 from dataclasses import dataclass
+from collections import deque
+import threading
+import time
 
 from engine.laravel import list_laravel_projects
 from engine.docker import mysql_volume_exists
+from engine.docker_health import EnvironmentStatus, get_environment_status
 from engine.fs import MountError
-from engine.app import generate_docker_files
+from engine.app import generate_docker_files, plan_docker_files
 from engine.workflows import (
     start_environment,
     stop_environment,
     reset_database,
     WorkflowResult,
 )
-from engine.safety import SafetyContext, SafetyError
+from engine.safety import SafetyContext, SafetyError, require_confirmation
+from engine.fleet import FleetResult, start_fleet, stop_fleet
+from engine.backups import BackupError, BackupStore
+from engine.project_config import MAX_PORT_SLOT, ProjectConfig, load_project_config
+from engine.templates import host_ports
+from engine.readiness import ReadinessReport, wait_until_ready
+from engine.tracing import Trace
 
 
 # -------------------------------------------------
@@ -35,21 +46,174 @@ def render_workflow(result: WorkflowResult) -> None:
         if result.result.stderr:
             st.code(result.result.stderr, language="text")
 
+    if result.trace:
+        render_trace(result.trace)
+
     if result.ok:
         st.success("Workflow completed successfully 🚀")
     else:
         st.error(result.error or "Workflow failed")
 
 
+def render_trace(trace: Trace) -> None:
+    with st.expander(f"⏱️ Timing breakdown ({trace.duration:.1f}s)"):
+        st.dataframe(trace.breakdown(), use_container_width=True)
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(trace.started_at))
+        slug = trace.name.lower().replace(" ", "-")
+        jsonl_col, chrome_col = st.columns(2)
+        jsonl_col.download_button(
+            "Download trace (JSON Lines)",
+            trace.to_jsonl(),
+            file_name=f"{slug}-{stamp}.jsonl",
+            mime="application/jsonl",
+            key=f"trace-jsonl-{id(trace)}",
+        )
+        chrome_col.download_button(
+            "Download trace (Chrome / Perfetto)",
+            trace.to_chrome(),
+            file_name=f"{slug}-{stamp}.trace.json",
+            mime="application/json",
+            key=f"trace-chrome-{id(trace)}",
+        )
+
+
+class LiveLog:
+    """
+    Bounded scrollback for streamed command output.
+
+    Renders into a single placeholder, throttled so a chatty build
+    does not flood the frontend with updates. Safe to call from the
+    workflow's step threads: they are attached to this script run.
+    """
+
+    def __init__(self, max_lines: int = 200, min_interval: float = 0.2):
+        self._lines: deque[str] = deque(maxlen=max_lines)
+        self._placeholder = st.empty()
+        self._min_interval = min_interval
+        self._last_render = 0.0
+        self._lock = threading.Lock()
+        self._ctx = get_script_run_ctx()
+
+    def __call__(self, stream: str, line: str) -> None:
+        with self._lock:
+            self._lines.append(f"[{stream}] {line}" if stream == "stderr" else line)
+
+            now = time.monotonic()
+            if now - self._last_render >= self._min_interval:
+                self._render()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._render()
+
+    def _render(self) -> None:
+        if self._ctx is not None and get_script_run_ctx() is None:
+            add_script_run_ctx(threading.current_thread(), self._ctx)
+        self._last_render = time.monotonic()
+        self._placeholder.code("\n".join(self._lines), language="text")
+
+
+def project_label(project: Path) -> str:
+    try:
+        return project.relative_to(root).as_posix()
+    except ValueError:
+        return project.name
+
+
+def render_fleet(fleet: FleetResult) -> None:
+    st.dataframe(
+        [
+            {
+                "project": project_label(run.project),
+                "ok": run.ok,
+                "duration (s)": round(run.duration, 1),
+                "last step": run.result.steps[-1] if run.result.steps else "-",
+                "error": run.result.error or "",
+            }
+            for run in fleet.runs
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    if fleet.ok:
+        st.success(f"{len(fleet.runs)} projects done in {fleet.duration:.1f}s 🚀")
+    else:
+        st.error(f"{len(fleet.failed)} of {len(fleet.runs)} projects failed")
+
+
+def render_services(status: EnvironmentStatus) -> None:
+    if not status.containers:
+        st.caption("No containers for this project.")
+        return
+
+    st.dataframe(
+        [
+            {
+                "service": c.service,
+                "container": c.name,
+                "state": c.state,
+                "health": c.health,
+                "ports": ", ".join(
+                    dict.fromkeys(
+                        f"{p.host_port}→{p.container_port}/{p.protocol}"
+                        for p in c.ports
+                    )
+                ),
+                "restarts": c.restart_count,
+                "uptime": _format_uptime(c.uptime),
+            }
+            for c in status.containers
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+def render_readiness(report: ReadinessReport) -> None:
+    if not report.resolved:
+        st.warning("Could not read the compose configuration")
+        return
+
+    st.dataframe(
+        [
+            {
+                "service": r.service,
+                "ready": r.ready,
+                "after (s)": round(r.elapsed, 2),
+                "detail": r.detail,
+            }
+            for r in report.services.values()
+        ],
+        hide_index=True,
+        use_container_width=True,
+    )
+
+
+def _format_uptime(seconds: float | None) -> str:
+    if seconds is None:
+        return "-"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {secs:02d}s"
+
+
 # -------------------------------------------------
 # UI state
 # -------------------------------------------------
+DB_MODES = ["persistent", "ephemeral"]
+PHP_PROFILES = ["dev", "perf", "prod-like"]
+MOUNT_STRATEGIES = ["bind", "volumes", "watch"]
+
+
 @dataclass(frozen=True)
 class UiOptions:
     overwrite_compose: bool
     update_env: bool
     auto_migrate: bool
     ensure_sail: bool
+    force_build: bool
     confirm_destructive: bool
 
 
@@ -78,6 +242,14 @@ with st.sidebar:
         value=str((Path.cwd() / "../").resolve()),
     )
 
+    discovery_depth = st.number_input(
+        "Search depth",
+        min_value=1,
+        max_value=5,
+        value=1,
+        help="How many folder levels below the root to look for projects",
+    )
+
     st.divider()
     st.header("⚙️ Setup options")
 
@@ -99,6 +271,11 @@ with st.sidebar:
             value=False,
             help="Installs laravel/sail via Composer if not already present",
         ),
+        force_build=st.checkbox(
+            "Force image rebuild",
+            value=False,
+            help="By default the image is only rebuilt when its Dockerfile or config changed",
+        ),
         confirm_destructive=st.checkbox(
             "I understand this may delete data",
             value=False,
@@ -115,7 +292,7 @@ if not root.exists():
     st.error(f"Folder does not exist: {root}")
     st.stop()
 
-projects = list_laravel_projects(root)
+projects = list_laravel_projects(root, max_depth=int(discovery_depth))
 
 if not projects:
     st.warning("No Laravel projects found.")
@@ -124,12 +301,106 @@ if not projects:
 project = st.selectbox(
     "Laravel project",
     projects,
-    format_func=lambda p: p.name,
+    format_func=project_label,
 )
 
 st.success(f"Using project: **{project.name}**")
 
 
+# -------------------------------------------------
+# Generator options (seeded from the project's saved config)
+# -------------------------------------------------
+project_config = load_project_config(project)
+
+with st.sidebar:
+    st.divider()
+    st.header("🧩 Generator options")
+
+    config = ProjectConfig(
+        db_mode=st.selectbox(
+            "Database mode",
+            DB_MODES,
+            index=DB_MODES.index(project_config.db_mode),
+            key=f"db_mode:{project}",
+            help=(
+                "Ephemeral keeps MySQL data in memory (tmpfs): much faster "
+                "migrations and seeding, but all data is lost on stop. "
+                "Applied when Docker files are generated."
+            ),
+        ),
+        mysql_memory_mb=int(
+            st.number_input(
+                "MySQL memory budget (MB)",
+                min_value=256,
+                max_value=65536,
+                value=min(project_config.mysql_memory_mb, 65536),
+                step=256,
+                key=f"mysql_memory_mb:{project}",
+                help=(
+                    "Sizes the buffer pool, connections and temp tables in "
+                    "docker/mysql/my.cnf. Capped at half of the Docker host "
+                    "memory; restart MySQL after generating to apply."
+                ),
+            )
+        ),
+        php_profile=st.selectbox(
+            "Runtime profile",
+            PHP_PROFILES,
+            index=PHP_PROFILES.index(project_config.php_profile),
+            key=f"php_profile:{project}",
+            help=(
+                "Tunes PHP, php-fpm and nginx together. "
+                "dev: code changes visible on every request. "
+                "perf: bigger opcache, JIT, realpath cache, nginx file "
+                "cache. prod-like: no file timestamp checks and a "
+                "preloaded framework, to reproduce production latency."
+            ),
+        ),
+        mount_strategy=st.selectbox(
+            "Mount strategy",
+            MOUNT_STRATEGIES,
+            index=MOUNT_STRATEGIES.index(project_config.mount_strategy),
+            key=f"mount_strategy:{project}",
+            help=(
+                "bind: the whole project is shared with the containers. "
+                "volumes: source stays shared, but vendor/ and "
+                "node_modules/ live in Docker volumes and framework "
+                "caches in memory. Much faster on Docker Desktop; the "
+                "host's vendor/ is no longer what the app runs. "
+                "watch: source is copied into the image and synced by "
+                "docker compose watch (Compose 2.22+); no bind mounts."
+            ),
+        ),
+        port_slot=int(
+            st.number_input(
+                "Host port slot",
+                min_value=0,
+                max_value=MAX_PORT_SLOT,
+                value=project_config.port_slot,
+                key=f"port_slot:{project}",
+                help=(
+                    "Added to every published host port, so projects with "
+                    "different slots can run at the same time (fleet mode)."
+                ),
+            )
+        ),
+    )
+
+    st.caption(
+        "Host ports: "
+        + ", ".join(f"{name} {port}" for name, port in host_ports(config.port_slot).items())
+    )
+
+    if config.ephemeral_db:
+        st.warning("Ephemeral database: data is discarded whenever MySQL stops.")
+
+    if config.php_profile == "prod-like":
+        st.warning(
+            "prod-like PHP: code changes are NOT picked up until the app "
+            "container restarts."
+        )
+
+
 # -------------------------------------------------
 # Warnings
 # -------------------------------------------------
@@ -139,6 +410,29 @@ if mysql_volume_exists(project):
         "Destructive actions require confirmation."
     )
 
+if project_config.ephemeral_db:
+    st.info(
+        "🧪 This project runs MySQL on tmpfs (ephemeral). "
+        "Data does not survive a stop or restart."
+    )
+
+if project_config.php_profile == "prod-like":
+    st.warning(
+        "⚡ This project uses the prod-like PHP profile: opcache does not "
+        "check file timestamps. Restart the app container to see code changes."
+    )
+
+
+# -------------------------------------------------
+# Service status
+# -------------------------------------------------
+with st.expander("📊 Services", expanded=False):
+    render_services(get_environment_status(project))
+
+    if st.button("Probe readiness"):
+        with st.spinner("Probing services..."):
+            render_readiness(wait_until_ready(project, timeout=5))
+
 
 # -------------------------------------------------
 # Main actions
@@ -162,6 +456,7 @@ with col1:
                     project,
                     overwrite_compose=options.overwrite_compose,
                     update_env=options.update_env,
+                    config=config,
                 )
 
             for action in actions:
@@ -173,6 +468,25 @@ with col1:
             st.error("Filesystem validation failed")
             st.code(str(e))
 
+    if st.button("Preview changes"):
+        try:
+            plan = plan_docker_files(
+                project,
+                overwrite_compose=options.overwrite_compose,
+                update_env=options.update_env,
+                config=config,
+            )
+        except MountError as e:
+            st.error("Filesystem validation failed")
+            st.code(str(e))
+        else:
+            if plan.is_noop:
+                st.success("All Docker files up to date")
+            for planned in plan.changes:
+                st.info(f"{planned.action}: {planned.description}")
+                if planned.diff:
+                    st.code(planned.diff, language="diff")
+
 
 # ---------- Stop ----------
 with col2:
@@ -194,11 +508,15 @@ with col3:
     st.markdown("### 🚀 Start")
     if st.button("Docker up"):
         with st.status("Starting environment...", expanded=True):
+            live_log = LiveLog()
             result = start_environment(
                 project,
                 auto_migrate=options.auto_migrate,
                 ensure_sail=options.ensure_sail,
+                force_build=options.force_build,
+                on_output=live_log,
             )
+            live_log.flush()
         render_workflow(result)
 
 
@@ -231,6 +549,78 @@ with col4:
             st.error(str(e))
 
 
+# -------------------------------------------------
+# Backups
+# -------------------------------------------------
+with st.expander("🗄️ Backups", expanded=False):
+    backup_store = BackupStore(project)
+    backup_entries = backup_store.list()
+
+    if not backup_entries:
+        st.caption("No backups yet.")
+    else:
+        chosen = st.selectbox(
+            "Backup",
+            backup_entries,
+            format_func=lambda e: f"{e.path} · {e.timestamp} · {e.hash[:12]}",
+        )
+        if st.button("Restore backup"):
+            try:
+                require_confirmation(safety, action=f"restore {chosen.path}")
+                backup_store.restore(project / chosen.path, chosen.timestamp)
+                st.success(
+                    f"Restored {chosen.path} from {chosen.timestamp} "
+                    "(previous content backed up)"
+                )
+            except (BackupError, SafetyError) as e:
+                st.error(str(e))
+
+
+# -------------------------------------------------
+# Fleet
+# -------------------------------------------------
+st.markdown("---")
+with st.expander("🚢 Fleet: many projects at once", expanded=False):
+    fleet_projects = st.multiselect(
+        "Projects",
+        projects,
+        format_func=project_label,
+    )
+    fleet_workers = st.slider(
+        "Concurrent projects",
+        min_value=1,
+        max_value=12,
+        value=4,
+    )
+    st.caption(
+        "Projects run side by side only with different host port slots; "
+        "clashing projects fail before anything starts."
+    )
+
+    fcol1, fcol2 = st.columns(2)
+
+    with fcol1:
+        if st.button("Start selected", disabled=not fleet_projects):
+            with st.status(f"Starting {len(fleet_projects)} projects..."):
+                fleet = start_fleet(
+                    fleet_projects,
+                    max_workers=fleet_workers,
+                    auto_migrate=options.auto_migrate,
+                    ensure_sail=options.ensure_sail,
+                )
+            render_fleet(fleet)
+
+    with fcol2:
+        if st.button("Stop selected", disabled=not fleet_projects):
+            with st.status(f"Stopping {len(fleet_projects)} projects..."):
+                fleet = stop_fleet(
+                    fleet_projects,
+                    confirmed=options.confirm_destructive,
+                    max_workers=fleet_workers,
+                )
+            render_fleet(fleet)
+
+
 # -------------------------------------------------
 # Footer
 # -------------------------------------------------